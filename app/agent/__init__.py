@@ -1,11 +1,27 @@
+from importlib import import_module
+
 from app.agent.base import BaseAgent
-from app.agent.browser import BrowserAgent
-from app.agent.mcp import MCPAgent
 from app.agent.react import ReActAgent
-from app.agent.swe import SWEAgent
 from app.agent.toolcall import ToolCallAgent
 
 
+# Agents whose tools pull in heavy dependencies are imported on first access
+_LAZY_AGENTS = {
+    "BrowserAgent": "app.agent.browser",
+    "MCPAgent": "app.agent.mcp",
+    "SWEAgent": "app.agent.swe",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_AGENTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "BaseAgent",
     "BrowserAgent",
@@ -1,13 +1,18 @@
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from typing import Any, List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
 from app.llm import LLM
 from app.logger import logger
-from app.sandbox.client import SANDBOX_CLIENT
+from app.sandbox.client import (
+    CURRENT_SANDBOX_CLIENT,
+    BaseSandboxClient,
+    LeasedSandboxClient,
+)
 from app.schema import ROLE_TYPE, AgentState, Memory, Message
+from app.tracing import tracer
 
 
 class BaseAgent(BaseModel, ABC):
@@ -32,6 +37,10 @@ class BaseAgent(BaseModel, ABC):
     # Dependencies
     llm: LLM = Field(default_factory=LLM, description="Language model instance")
     memory: Memory = Field(default_factory=Memory, description="Agent's memory store")
+    sandbox_client: BaseSandboxClient = Field(
+        default_factory=LeasedSandboxClient,
+        description="Sandbox leased by this agent, kept between runs",
+    )
     state: AgentState = Field(
         default=AgentState.IDLE, description="Current agent state"
     )
@@ -42,6 +51,9 @@ class BaseAgent(BaseModel, ABC):
 
     duplicate_threshold: int = 2
 
+    # app.checkpoint.RunCheckpoint; the state is saved after every step
+    checkpoint: Optional[Any] = Field(default=None, exclude=True)
+
     class Config:
         arbitrary_types_allowed = True
         extra = "allow"  # Allow extra fields for flexibility in subclasses
@@ -132,25 +144,44 @@ class BaseAgent(BaseModel, ABC):
             self.update_memory("user", request)
 
         results: List[str] = []
-        async with self.state_context(AgentState.RUNNING):
-            while (
-                self.current_step < self.max_steps and self.state != AgentState.FINISHED
-            ):
-                self.current_step += 1
-                logger.info(f"Executing step {self.current_step}/{self.max_steps}")
-                step_result = await self.step()
-
-                # Check for stuck state
-                if self.is_stuck():
-                    self.handle_stuck_state()
-
-                results.append(f"Step {self.current_step}: {step_result}")
-
-            if self.current_step >= self.max_steps:
-                self.current_step = 0
-                self.state = AgentState.IDLE
-                results.append(f"Terminated: Reached max steps ({self.max_steps})")
-        await SANDBOX_CLIENT.cleanup()
+        # Sandbox-backed tools resolve their client from the running agent
+        token = CURRENT_SANDBOX_CLIENT.set(self.sandbox_client)
+        try:
+            with tracer.span("agent.run", target=self.name) as run_span:
+                async with self.state_context(AgentState.RUNNING):
+                    while (
+                        self.current_step < self.max_steps
+                        and self.state != AgentState.FINISHED
+                    ):
+                        self.current_step += 1
+                        logger.info(
+                            f"Executing step {self.current_step}/{self.max_steps}"
+                        )
+                        with tracer.span(
+                            "agent.step", target=self.name, step=self.current_step
+                        ):
+                            step_result = await self.step()
+
+                        # Check for stuck state
+                        if self.is_stuck():
+                            self.handle_stuck_state()
+
+                        if self.checkpoint is not None:
+                            await self.checkpoint.save_agent(self)
+
+                        results.append(f"Step {self.current_step}: {step_result}")
+
+                    run_span.set(steps=len(results))
+                    if self.current_step >= self.max_steps:
+                        self.current_step = 0
+                        self.state = AgentState.IDLE
+                        results.append(
+                            f"Terminated: Reached max steps ({self.max_steps})"
+                        )
+        finally:
+            CURRENT_SANDBOX_CLIENT.reset(token)
+            # Return the lease; the sandbox is reused by the next run
+            await self.sandbox_client.cleanup()
         return "\n".join(results) if results else "No steps executed"
 
     @abstractmethod
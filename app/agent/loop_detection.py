@@ -0,0 +1,73 @@
+"""Detection of tool call loops: the same calls repeated with the same results.
+
+Every tool call is reduced to a signature hashing the tool name, its
+canonical JSON arguments and a digest of the result. For each cycle length
+``p`` up to `max_period`, the detector keeps how many calls in a row matched
+the call ``p`` positions earlier, so recording a call is O(max_period)
+regardless of the history length. A call repeated `min_repeats` times
+(A-A-A) or a cycle repeated `cycle_repeats` times (A-B-A-B) is a loop.
+"""
+
+import hashlib
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+
+@dataclass
+class Loop:
+    """A detected loop: the calls of one cycle, oldest first."""
+
+    period: int
+    tools: List[str]
+
+
+def call_signature(name: str, arguments: str, result: str) -> str:
+    """Hash of a tool call and its result; formatting of the arguments is ignored."""
+    try:
+        arguments = json.dumps(
+            json.loads(arguments or "{}"), sort_keys=True, separators=(",", ":")
+        )
+    except (TypeError, ValueError):
+        pass
+    digest = hashlib.sha1()
+    for part in (name, arguments, result):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LoopDetector:
+    """Rolling index of recent tool call signatures, see the module docstring."""
+
+    def __init__(
+        self, max_period: int = 3, min_repeats: int = 3, cycle_repeats: int = 2
+    ):
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.cycle_repeats = cycle_repeats
+        self._recent: Deque[Tuple[str, str]] = deque(maxlen=max_period)
+        # _matches[p]: calls in a row equal to the call p positions earlier
+        self._matches = [0] * (max_period + 1)
+
+    def record(self, name: str, arguments: str, result: str) -> Optional[Loop]:
+        """Add a call; returns the loop it completes, if any."""
+        signature = call_signature(name, arguments, result)
+        for period in range(1, self.max_period + 1):
+            if len(self._recent) >= period and self._recent[-period][0] == signature:
+                self._matches[period] += 1
+            else:
+                self._matches[period] = 0
+        self._recent.append((signature, name))
+
+        for period in range(1, self.max_period + 1):
+            repeats = self.min_repeats if period == 1 else self.cycle_repeats
+            if self._matches[period] >= period * (repeats - 1):
+                calls = list(self._recent)[-period:]
+                return Loop(period, [call_name for _, call_name in calls])
+        return None
+
+    def reset(self) -> None:
+        self._recent.clear()
+        self._matches = [0] * (self.max_period + 1)
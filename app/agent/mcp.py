@@ -32,7 +32,8 @@ class MCPAgent(ToolCallAgent):
 
     # Track tool schemas to detect changes
     tool_schemas: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
-    _refresh_tools_interval: int = 5  # Refresh tools every N steps
+    # Poll servers without tools/list_changed support every N steps
+    _refresh_tools_interval: int = 5
 
     # Special tool names that should trigger termination
     special_tool_names: List[str] = Field(default_factory=lambda: ["terminate"])
@@ -71,7 +72,9 @@ class MCPAgent(ToolCallAgent):
         self.available_tools = self.mcp_clients
 
         # Store initial tool schemas
-        await self._refresh_tools()
+        self.tool_schemas = {
+            name: tool.parameters for name, tool in self.mcp_clients.tool_map.items()
+        }
 
         # Add system message about available tools
         tool_names = list(self.mcp_clients.tool_map.keys())
@@ -85,7 +88,10 @@ class MCPAgent(ToolCallAgent):
         )
 
     async def _refresh_tools(self) -> Tuple[List[str], List[str]]:
-        """Refresh the list of available tools from the MCP server.
+        """Refresh the list of available tools from the MCP servers.
+
+        Only servers that announced a tool list change, or that cannot announce
+        one, are queried; see `MCPClients.refresh_tools`.
 
         Returns:
             A tuple of (added_tools, removed_tools)
@@ -93,25 +99,14 @@ class MCPAgent(ToolCallAgent):
         if not self.mcp_clients.sessions:
             return [], []
 
-        # Get current tool schemas directly from the server
-        response = await self.mcp_clients.list_tools()
-        current_tools = {tool.name: tool.inputSchema for tool in response.tools}
-
-        # Determine added, removed, and changed tools
-        current_names = set(current_tools.keys())
-        previous_names = set(self.tool_schemas.keys())
-
-        added_tools = list(current_names - previous_names)
-        removed_tools = list(previous_names - current_names)
-
-        # Check for schema changes in existing tools
-        changed_tools = []
-        for name in current_names.intersection(previous_names):
-            if current_tools[name] != self.tool_schemas.get(name):
-                changed_tools.append(name)
+        changes = await self.mcp_clients.refresh_tools()
+        added_tools, removed_tools, changed_tools = changes
 
         # Update stored schemas
-        self.tool_schemas = current_tools
+        for name in added_tools + changed_tools:
+            self.tool_schemas[name] = self.mcp_clients.tool_map[name].parameters
+        for name in removed_tools:
+            self.tool_schemas.pop(name, None)
 
         # Log and notify about changes
         if added_tools:
@@ -139,8 +134,11 @@ class MCPAgent(ToolCallAgent):
             self.state = AgentState.FINISHED
             return False
 
-        # Refresh tools periodically
-        if self.current_step % self._refresh_tools_interval == 0:
+        # Refresh tools when a server announced a change, and poll periodically
+        if (
+            self.mcp_clients.has_pending_changes
+            or self.current_step % self._refresh_tools_interval == 0
+        ):
             await self._refresh_tools()
             # All tools removed indicates shutdown
             if not self.mcp_clients.tool_map:
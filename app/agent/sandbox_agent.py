@@ -1,3 +1,4 @@
+import uuid
 from typing import Dict, List, Optional
 
 from pydantic import Field, model_validator
@@ -5,7 +6,7 @@ from pydantic import Field, model_validator
 from app.agent.browser import BrowserContextHelper
 from app.agent.toolcall import ToolCallAgent
 from app.config import config
-from app.daytona.sandbox import create_sandbox, delete_sandbox
+from app.daytona.sandbox import SANDBOX_REGISTRY, delete_sandbox
 from app.daytona.tool_base import SandboxToolsBase
 from app.logger import logger
 from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
@@ -52,6 +53,9 @@ class SandboxManus(ToolCallAgent):
         default_factory=dict
     )  # server_id -> url/command
     _initialized: bool = False
+    # Sandbox tools of the same project share a sandbox; each agent has its own
+    # unless a project id is given explicitly
+    project_id: Optional[str] = Field(default_factory=lambda: uuid.uuid4().hex)
     sandbox_link: Optional[dict[str, dict[str, str]]] = Field(default_factory=dict)
 
     @model_validator(mode="after")
@@ -76,7 +80,9 @@ class SandboxManus(ToolCallAgent):
         try:
             # 创建新沙箱
             if password:
-                sandbox = create_sandbox(password=password)
+                sandbox = await SANDBOX_REGISTRY.acquire(
+                    self.project_id, password=password
+                )
                 self.sandbox = sandbox
             else:
                 raise ValueError("password must be provided")
@@ -99,10 +105,10 @@ class SandboxManus(ToolCallAgent):
             logger.info(f"Website URL: {website_url}")
             SandboxToolsBase._urls_printed = True
             sb_tools = [
-                SandboxBrowserTool(sandbox),
-                SandboxFilesTool(sandbox),
-                SandboxShellTool(sandbox),
-                SandboxVisionTool(sandbox),
+                SandboxBrowserTool(sandbox, project_id=self.project_id),
+                SandboxFilesTool(sandbox, project_id=self.project_id),
+                SandboxShellTool(sandbox, project_id=self.project_id),
+                SandboxVisionTool(sandbox, project_id=self.project_id),
             ]
             self.available_tools.add_tools(*sb_tools)
 
@@ -4,15 +4,35 @@ from typing import Any, List, Optional, Union
 
 from pydantic import Field
 
+from app.agent.loop_detection import Loop, LoopDetector
 from app.agent.react import ReActAgent
-from app.exceptions import TokenLimitExceeded
-from app.logger import logger
+from app.exceptions import TokenLimitExceeded, ToolError
+from app.logger import clip, logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
-from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
+from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, Role, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tool.artifacts import (
+    CURRENT_ARTIFACT_STORE,
+    ArtifactStore,
+    ReadArtifact,
+    expire_previews,
+    preview,
+)
+from app.tool.base import ToolFailure
+from app.tool.tool_collection import ToolResultCache
+from app.tracing import tracer
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
+LOOP_GUIDANCE = (
+    "You called {calls} again with the same arguments and got the same result. "
+    "Repeating it will not make progress: use the result you already have, try "
+    "a different approach, or finish with `terminate` if the task is done."
+)
+LOOP_BLOCKED = (
+    "You are still repeating {calls}. {tools} cannot be used in the next step; "
+    "choose a different tool."
+)
 
 
 class ToolCallAgent(ReActAgent):
@@ -35,6 +55,16 @@ class ToolCallAgent(ReActAgent):
 
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
+    # Longer tool outputs are stored as artifacts and shown as a preview
+    artifact_threshold: Optional[int] = 8000
+    artifacts: ArtifactStore = Field(default_factory=ArtifactStore, exclude=True)
+    read_artifact: ReadArtifact = Field(default_factory=ReadArtifact, exclude=True)
+    # Results of read-only tool calls, reused within a run
+    tool_cache: ToolResultCache = Field(default_factory=ToolResultCache, exclude=True)
+    # Repeated identical tool calls: warn, then block the tools, then stop
+    loop_detector: LoopDetector = Field(default_factory=LoopDetector, exclude=True)
+    loop_escalations: int = 0
+    blocked_tools: List[str] = Field(default_factory=list)
 
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
@@ -42,6 +72,10 @@ class ToolCallAgent(ReActAgent):
             user_msg = Message.user_message(self.next_step_prompt)
             self.messages += [user_msg]
 
+        tools_tokens = self.available_tools.count_params_tokens(self.llm.count_tokens)
+        if self._artifact_tool():
+            tools_tokens += self.llm.count_tokens(str(self.read_artifact.to_param()))
+
         try:
             # Get response with tool options
             response = await self.llm.ask_tool(
@@ -51,7 +85,8 @@ class ToolCallAgent(ReActAgent):
                     if self.system_prompt
                     else None
                 ),
-                tools=self.available_tools.to_params(),
+                tools=self._offered_tools(),
+                tools_tokens=tools_tokens,
                 tool_choice=self.tool_choices,
             )
         except ValueError:
@@ -78,7 +113,9 @@ class ToolCallAgent(ReActAgent):
         content = response.content if response and response.content else ""
 
         # Log response info
-        logger.info(f"✨ {self.name}'s thoughts: {content}")
+        logger.info(
+            "✨ {agent}'s thoughts: {thoughts}", agent=self.name, thoughts=clip(content)
+        )
         logger.info(
             f"🛠️ {self.name} selected {len(tool_calls) if tool_calls else 0} tools to use"
         )
@@ -86,7 +123,10 @@ class ToolCallAgent(ReActAgent):
             logger.info(
                 f"🧰 Tools being prepared: {[call.function.name for call in tool_calls]}"
             )
-            logger.info(f"🔧 Tool arguments: {tool_calls[0].function.arguments}")
+            logger.info(
+                "🔧 Tool arguments: {arguments}",
+                arguments=clip(tool_calls[0].function.arguments),
+            )
 
         try:
             if response is None:
@@ -138,17 +178,30 @@ class ToolCallAgent(ReActAgent):
             return self.messages[-1].content or "No content or commands to execute"
 
         results = []
+        loop = None
+        recorded = False
         for command in self.tool_calls:
             # Reset base64_image for each tool call
             self._current_base64_image = None
 
+            blocked = command.function.name in self.blocked_tools
             result = await self.execute_tool(command)
+            # Every call that ran is recorded, or the history would have gaps
+            if not blocked:
+                found = self.loop_detector.record(
+                    command.function.name, command.function.arguments, result
+                )
+                loop = loop or found
+                recorded = True
+            result = await self._store_large_output(command.function.name, result)
 
             if self.max_observe:
                 result = result[: self.max_observe]
 
             logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                "🎯 Tool '{tool}' completed its mission! Result: {result}",
+                tool=command.function.name,
+                result=clip(result),
             )
 
             # Add tool response to memory
@@ -161,16 +214,98 @@ class ToolCallAgent(ReActAgent):
             self.memory.add_message(tool_msg)
             results.append(result)
 
+        # Tools are blocked for the step after a repeated loop only
+        self.blocked_tools = []
+        if loop is None:
+            if recorded:
+                # A later, unrelated loop starts again with guidance
+                self.loop_escalations = 0
+        elif self.state != AgentState.FINISHED:
+            self._handle_loop(loop)
         return "\n\n".join(results)
 
+    def _offered_tools(self) -> List[dict]:
+        """Schemas of the tools the model may call in this step."""
+        params = self.available_tools.to_params()
+        artifact_tool = self._artifact_tool()
+        if artifact_tool:
+            params = [*params, artifact_tool.to_param()]
+        if not self.blocked_tools:
+            return params
+        return [p for p in params if p["function"]["name"] not in self.blocked_tools]
+
+    def _artifact_tool(self) -> Optional[ReadArtifact]:
+        """`read_artifact`, offered in this run once an output was stored."""
+        if not len(self.artifacts) or self.read_artifact.name in (
+            self.available_tools.tool_map
+        ):
+            return None
+        return self.read_artifact
+
+    def _handle_loop(self, loop: Loop) -> None:
+        """Escalate on each loop: guidance, then blocking its tools, then stop."""
+        self.loop_escalations += 1
+        calls = " -> ".join(f"`{name}`" for name in loop.tools)
+        if self.loop_escalations == 1:
+            logger.warning(f"🔁 {self.name} is repeating {calls}; adding guidance")
+            self.memory.add_message(
+                Message.user_message(LOOP_GUIDANCE.format(calls=calls))
+            )
+        elif self.loop_escalations == 2:
+            special = {name.lower() for name in self.special_tool_names}
+            self.blocked_tools = sorted(
+                {name for name in loop.tools if name.lower() not in special}
+            )
+            logger.warning(
+                f"🔁 {self.name} is still repeating {calls}; "
+                f"blocking {self.blocked_tools} for the next step"
+            )
+            tools = ", ".join(f"`{name}`" for name in self.blocked_tools)
+            self.memory.add_message(
+                Message.user_message(LOOP_BLOCKED.format(calls=calls, tools=tools))
+            )
+        else:
+            logger.error(f"🛑 {self.name} kept repeating {calls}; stopping the run")
+            self.memory.add_message(
+                Message.assistant_message(
+                    f"Stopped early: the same tool calls ({calls}) kept returning "
+                    "the same results."
+                )
+            )
+            self.state = AgentState.FINISHED
+
+    async def _store_large_output(self, name: str, result: str) -> str:
+        """Replace an output above the threshold by a preview of its artifact."""
+        limit = self.artifact_threshold
+        if self.max_observe and not isinstance(self.max_observe, bool):
+            limit = min(limit, self.max_observe) if limit else self.max_observe
+        if not limit or len(result) <= limit or name == self.read_artifact.name:
+            return result
+        artifact = await self.artifacts.put(result)
+        logger.info(
+            f"📦 Stored {len(result):,} chars of '{name}' output as {artifact.id}"
+        )
+        return preview(result, artifact)
+
+    def _expire_artifact_previews(self) -> None:
+        """Tell the model the artifacts previewed in memory are gone."""
+        for message in self.memory.messages:
+            if message.role == Role.TOOL and message.content:
+                message.content = expire_previews(message.content)
+
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
             return "Error: Invalid command format"
 
         name = command.function.name
-        if name not in self.available_tools.tool_map:
+        artifact_tool = self._artifact_tool()
+        if artifact_tool is not None and name != artifact_tool.name:
+            artifact_tool = None
+        if name not in self.available_tools.tool_map and artifact_tool is None:
             return f"Error: Unknown tool '{name}'"
+        if name in self.blocked_tools:
+            return f"Error: Tool '{name}' is blocked in this step; use another tool"
 
         try:
             # Parse arguments
@@ -178,7 +313,20 @@ class ToolCallAgent(ReActAgent):
 
             # Execute the tool
             logger.info(f"🔧 Activating tool: '{name}'...")
-            result = await self.available_tools.execute(name=name, tool_input=args)
+            with tracer.span("tool.execute", target=name) as span:
+                hits = self.tool_cache.hits
+                if artifact_tool is not None:
+                    result = await self._read_artifact(artifact_tool, args)
+                else:
+                    result = await self.available_tools.execute(
+                        name=name, tool_input=args, cache=self.tool_cache
+                    )
+                if self.tool_cache.hits > hits:
+                    logger.info(f"♻️ Reusing the result of an identical '{name}' call")
+                    span.set(cache_hits=1)
+                span.set(bytes=len(str(result)) if result else 0)
+                if getattr(result, "error", None):
+                    span.set_error("ToolFailure")
 
             # Handle special tools
             await self._handle_special_tool(name=name, result=result)
@@ -207,6 +355,13 @@ class ToolCallAgent(ReActAgent):
             logger.exception(error_msg)
             return f"Error: {error_msg}"
 
+    @staticmethod
+    async def _read_artifact(tool: ReadArtifact, args: dict) -> Any:
+        try:
+            return await tool(**args)
+        except ToolError as e:
+            return ToolFailure(error=e.message)
+
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
         """Handle special tool execution and state changes"""
         if not self._is_special_tool(name):
@@ -244,7 +399,23 @@ class ToolCallAgent(ReActAgent):
 
     async def run(self, request: Optional[str] = None) -> str:
         """Run the agent with cleanup when done."""
+        # Tool results and artifacts are kept within a run only
+        cache = self.tool_cache
+        cache.clear()
+        self.loop_detector.reset()
+        self.loop_escalations = 0
+        self.blocked_tools = []
+        # Memory restored from a checkpoint may still name old artifacts
+        self._expire_artifact_previews()
+        token = CURRENT_ARTIFACT_STORE.set(self.artifacts)
         try:
             return await super().run(request)
         finally:
+            CURRENT_ARTIFACT_STORE.reset(token)
+            self.artifacts.clear()
+            self._expire_artifact_previews()
+            if cache.hits:
+                logger.info(
+                    f"Tool result cache: {cache.hits} hits, {cache.misses} misses"
+                )
             await self.cleanup()
@@ -0,0 +1,189 @@
+"""Run many prompts concurrently, each through a fresh agent or flow.
+
+Tasks are read as JSONL, one ``{"id": ..., "prompt": ...}`` object per line;
+the id defaults to the line number, and a line that is not a JSON object is
+taken as a prompt. Results are appended to the output JSONL as tasks finish:
+
+    {"id": ..., "status": "ok" | "error" | "timeout", "result": ...,
+     "error": ..., "seconds": ..., "input_tokens": ..., "completion_tokens": ...}
+
+Running again with the same output file skips the tasks that already finished
+with status ``ok``.
+
+Workers share the LLM client and its request limiter (see
+``max_concurrent_requests`` and ``requests_per_minute`` under ``[llm]``) and
+the sandbox manager; ``max_input_tokens`` applies to each task on its own.
+Every task gets its own agent instances; each worker leases one sandbox
+session and reuses it for its tasks.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from app.llm import track_token_usage
+from app.logger import logger
+
+
+# Runs one prompt with fresh agents; gets the prompt and a sandbox session id
+TaskRunner = Callable[[str, str], Awaitable[str]]
+
+
+@dataclass
+class BatchTask:
+    id: str
+    prompt: str
+
+
+def read_tasks(lines: Iterable[str]) -> List[BatchTask]:
+    """Parse task lines; blank lines are skipped, ids must be unique.
+
+    Raises:
+        ValueError: If a line has no prompt or an id is repeated.
+    """
+    tasks = []
+    seen = set()
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        if not isinstance(record, dict):
+            record = {"prompt": line.strip()}
+        prompt = record.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError(f"Task on line {line_number} has no prompt")
+        task_id = str(record.get("id", line_number))
+        if task_id in seen:
+            raise ValueError(f"Duplicate task id {task_id!r} on line {line_number}")
+        seen.add(task_id)
+        tasks.append(BatchTask(task_id, prompt))
+    return tasks
+
+
+def completed_ids(path: Path) -> Set[str]:
+    """Ids of the tasks in the output file that finished successfully."""
+    done = set()
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed while writing leaves a truncated last line
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record["id"]))
+    return done
+
+
+class BatchRunner:
+    """Runs tasks on `workers` concurrent workers, streaming results to a file."""
+
+    def __init__(
+        self,
+        run_task: TaskRunner,
+        output: Path,
+        workers: int = 4,
+        timeout: Optional[float] = 3600,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.run_task = run_task
+        self.output = Path(output)
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+        self._finished = 0
+        self._total = 0
+
+    async def run(self, tasks: List[BatchTask]) -> Dict[str, Any]:
+        """Run the tasks not yet completed in the output file.
+
+        Returns:
+            Counts of the tasks run by status, the skipped tasks, and the
+            elapsed seconds.
+        """
+        done = completed_ids(self.output)
+        pending = [task for task in tasks if task.id not in done]
+        skipped = len(tasks) - len(pending)
+        if skipped:
+            logger.info(f"Skipping {skipped} tasks already completed in {self.output}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for task in pending:
+            queue.put_nowait(task)
+        self._finished = 0
+        self._total = len(pending)
+        counts: Dict[str, int] = {}
+
+        start = time.perf_counter()
+        workers = [
+            asyncio.create_task(self._worker(f"batch-worker-{i}", queue, counts))
+            for i in range(min(self.workers, len(pending)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Batch finished {len(pending)} tasks in {elapsed:.1f}s "
+            f"({len(pending) / elapsed if elapsed else 0:.2f} tasks/s): {counts}"
+        )
+        return {**counts, "skipped": skipped, "seconds": elapsed}
+
+    async def _worker(
+        self, session_id: str, queue: asyncio.Queue, counts: Dict[str, int]
+    ) -> None:
+        while True:
+            try:
+                task = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await self._run_one(task, session_id)
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            await self._append(record)
+
+    async def _run_one(self, task: BatchTask, session_id: str) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": task.id, "status": "ok"}
+        start = time.perf_counter()
+        with track_token_usage() as usage:
+            try:
+                record["result"] = await asyncio.wait_for(
+                    self.run_task(task.prompt, session_id), self.timeout
+                )
+            except asyncio.TimeoutError:
+                record["status"] = "timeout"
+                record["error"] = f"Timed out after {self.timeout}s"
+            except Exception as e:
+                logger.exception(f"Batch task {task.id} failed")
+                record["status"] = "error"
+                record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        record["input_tokens"] = usage.input_tokens
+        record["completion_tokens"] = usage.completion_tokens
+        return record
+
+    async def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._write, line)
+            self._finished += 1
+        logger.info(
+            f"[{self._finished}/{self._total}] Task {record['id']}: "
+            f"{record['status']} in {record['seconds']:.1f}s"
+        )
+
+    def _write(self, line: str) -> None:
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        with self.output.open("a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
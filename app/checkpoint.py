@@ -0,0 +1,247 @@
+"""Append-only checkpoints of agent and flow runs.
+
+A run is logged to ``checkpoints/<run_id>.jsonl``, one JSON record per line:
+
+* ``{"t": "meta", ...}``: run id, kind and prompt, written once;
+* ``{"t": "agent", "key": ..., "step": ..., "state": ..., ...}``: written
+  after every agent step. Messages are stored as a delta against the
+  previous record of the same agent (messages dropped from the front by the
+  memory limit, plus new messages), and tool state and the next step prompt
+  only when they changed;
+* ``{"t": "flow", ...}``: plan state of a planning flow;
+* ``{"t": "done", "result": ...}``: the run finished.
+
+Replaying the log in order rebuilds the latest state. A crash while writing
+leaves at most one truncated last line, which is ignored.
+
+Tools opt into checkpointing by implementing ``checkpoint_state() -> dict``
+and ``restore_state(state: dict)``.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import config
+from app.logger import logger
+from app.schema import AgentState, Message
+
+
+CHECKPOINT_DIR: Path = config.root_path / "checkpoints"
+
+
+@dataclass
+class AgentCheckpoint:
+    """Latest state of one agent in a run."""
+
+    step: int = 0
+    state: str = AgentState.IDLE.value
+    messages: List[dict] = field(default_factory=list)
+    tools: Dict[str, dict] = field(default_factory=dict)
+    next_step_prompt: Optional[str] = None
+
+
+@dataclass
+class _AgentCursor:
+    """What was already written for an agent, to write only deltas."""
+
+    last_message: Optional[Message] = None
+    count: int = 0
+    tool_digests: Dict[str, str] = field(default_factory=dict)
+    next_step_prompt: Optional[str] = None
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class RunCheckpoint:
+    """Checkpoint log of one run; see the module docstring for the format."""
+
+    def __init__(self, run_id: Optional[str] = None, directory: Optional[Path] = None):
+        self.run_id = run_id or new_run_id()
+        self.directory = Path(directory or CHECKPOINT_DIR)
+        self.path = self.directory / f"{self.run_id}.jsonl"
+
+        self.meta: Dict[str, Any] = {}
+        self.agents: Dict[str, AgentCheckpoint] = {}
+        self.flow: Optional[Dict[str, Any]] = None
+        self.done = False
+        self.result: Optional[str] = None
+
+        self._cursors: Dict[str, _AgentCursor] = {}
+        self._flow_digest: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @classmethod
+    def load(cls, run_id: str, directory: Optional[Path] = None) -> "RunCheckpoint":
+        """Replay the log of `run_id`.
+
+        Raises:
+            FileNotFoundError: If the run has no checkpoint.
+        """
+        checkpoint = cls(run_id, directory)
+        with checkpoint.path.open(encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Ignoring unreadable checkpoint record {line_number} "
+                        f"of run {run_id}"
+                    )
+                    continue
+                checkpoint._apply(record)
+        return checkpoint
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        kind = record.get("t")
+        if kind == "meta":
+            self.meta = record
+        elif kind == "agent":
+            agent = self.agents.setdefault(record["key"], AgentCheckpoint())
+            if record.get("reset"):
+                agent.messages = []
+            agent.messages = agent.messages[record.get("drop", 0) :]
+            agent.messages.extend(record.get("append", []))
+            agent.step = record["step"]
+            agent.state = record["state"]
+            agent.tools.update(record.get("tools", {}))
+            if "next_step_prompt" in record:
+                agent.next_step_prompt = record["next_step_prompt"]
+        elif kind == "flow":
+            self.flow = record
+        elif kind == "done":
+            self.done = True
+            self.result = record.get("result")
+
+    async def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._write, line)
+
+    def _write(self, line: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+
+    async def start(self, kind: str, prompt: Optional[str] = None) -> None:
+        """Write the run header."""
+        self.meta = {"t": "meta", "run_id": self.run_id, "kind": kind, "prompt": prompt}
+        await self._append(self.meta)
+        logger.info(f"Checkpointing run {self.run_id} to {self.path}")
+
+    async def finish(self, result: Optional[str] = None) -> None:
+        self.done, self.result = True, result
+        await self._append({"t": "done", "result": result})
+
+    async def save_agent(self, agent: Any) -> None:
+        """Record the state of `agent` after a step."""
+        key = agent.name
+        cursor = self._cursors.setdefault(key, _AgentCursor())
+        messages = agent.memory.messages
+        record: Dict[str, Any] = {
+            "t": "agent",
+            "key": key,
+            "step": agent.current_step,
+            "state": AgentState(agent.state).value,
+        }
+
+        # Find the last written message to append only what came after it
+        index = -1
+        if cursor.last_message is not None:
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i] is cursor.last_message:
+                    index = i
+                    break
+        if index < 0 and cursor.count:
+            record["reset"] = True
+            new = messages
+        else:
+            record["drop"] = cursor.count - (index + 1)
+            new = messages[index + 1 :]
+        record["append"] = [m.model_dump(exclude_none=True) for m in new]
+
+        tools = {}
+        for tool in _tools_of(agent):
+            state = tool.checkpoint_state()
+            digest = _digest(state)
+            if cursor.tool_digests.get(tool.name) != digest:
+                cursor.tool_digests[tool.name] = digest
+                tools[tool.name] = state
+        if tools:
+            record["tools"] = tools
+        if agent.next_step_prompt != cursor.next_step_prompt:
+            record["next_step_prompt"] = agent.next_step_prompt
+
+        await self._append(record)
+        cursor.last_message = messages[-1] if messages else None
+        cursor.count = len(messages)
+        cursor.next_step_prompt = agent.next_step_prompt
+
+    def restore_agent(self, agent: Any, resume_steps: bool = True) -> bool:
+        """Load the checkpointed state into `agent`; False if there is none.
+
+        Args:
+            agent: Agent whose `name` was used when checkpointing.
+            resume_steps: Continue the interrupted run with its step count and
+                finished state; when False the agent keeps its memory and tool
+                state but starts a fresh run.
+        """
+        saved = self.agents.get(agent.name)
+        if saved is None:
+            return False
+
+        agent.memory.messages = [Message(**m) for m in saved.messages]
+        # A step interrupted mid-way is simply run again
+        finished = resume_steps and saved.state == AgentState.FINISHED.value
+        agent.state = AgentState.FINISHED if finished else AgentState.IDLE
+        agent.current_step = saved.step if resume_steps else 0
+        if saved.next_step_prompt is not None:
+            agent.next_step_prompt = saved.next_step_prompt
+        for tool in _tools_of(agent):
+            if tool.name in saved.tools:
+                tool.restore_state(saved.tools[tool.name])
+
+        # Continue the log as a delta of the restored state
+        cursor = self._cursors[agent.name] = _AgentCursor()
+        messages = agent.memory.messages
+        cursor.last_message = messages[-1] if messages else None
+        cursor.count = len(messages)
+        cursor.tool_digests = {
+            name: _digest(state) for name, state in saved.tools.items()
+        }
+        cursor.next_step_prompt = agent.next_step_prompt
+        return True
+
+    async def save_flow(self, state: Dict[str, Any]) -> None:
+        """Record flow state if it changed since the last record."""
+        digest = _digest(state)
+        if digest == self._flow_digest:
+            return
+        self._flow_digest = digest
+        self.flow = {"t": "flow", **state}
+        await self._append(self.flow)
+
+
+def _tools_of(agent: Any) -> List[Any]:
+    tools = getattr(agent, "available_tools", None)
+    return [
+        tool
+        for tool in getattr(tools, "tools", ())
+        if hasattr(tool, "checkpoint_state") and hasattr(tool, "restore_state")
+    ]
@@ -28,6 +28,12 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    max_concurrent_requests: Optional[int] = Field(
+        None, description="Maximum requests in flight at once (None for unlimited)"
+    )
+    requests_per_minute: Optional[int] = Field(
+        None, description="Maximum requests started per minute (None for unlimited)"
+    )
 
 
 class ProxySettings(BaseModel):
@@ -64,6 +70,18 @@ class RunflowSettings(BaseModel):
     use_data_analysis_agent: bool = Field(
         default=False, description="Enable data analysis agent in run flow"
     )
+    vmind_workers: int = Field(
+        default=2, description="Node worker processes used for chart generation"
+    )
+    vmind_max_concurrency: int = Field(
+        default=4, description="Charts generated concurrently across VMind workers"
+    )
+    chart_max_points: int = Field(
+        default=2000, description="Rows sent to chart generation per CSV"
+    )
+    chart_top_k: int = Field(
+        default=20, description="Categories kept per chart, others become 'Other'"
+    )
 
 
 class BrowserSettings(BaseModel):
@@ -103,6 +121,9 @@ class SandboxSettings(BaseModel):
     network_enabled: bool = Field(
         False, description="Whether network access is allowed"
     )
+    idle_timeout: int = Field(
+        600, description="Seconds a released sandbox is kept for reuse"
+    )
 
 
 class DaytonaSettings(BaseModel):
@@ -122,6 +143,66 @@ class DaytonaSettings(BaseModel):
     VNC_password: Optional[str] = Field(
         "123456", description="VNC password for the vnc service in sandbox"
     )
+    readiness_ports: List[int] = Field(
+        [6080, 8000, 8003],
+        description="Sandbox service ports that must accept connections before use",
+    )
+    readiness_timeout: float = Field(
+        60.0, description="Seconds to wait for sandbox services to come up"
+    )
+    browser_api_port: int = Field(
+        8003, description="Port of the browser automation API in the sandbox"
+    )
+    browser_direct_http: bool = Field(
+        True,
+        description="Call the browser automation API through the preview link "
+        "instead of running curl in the sandbox",
+    )
+
+
+class LoggingSettings(BaseModel):
+    """Configuration for the log sinks, see app/logger.py"""
+
+    max_record_chars: int = Field(
+        4000, description="Log messages are truncated to this many characters"
+    )
+    background: bool = Field(
+        True, description="Write log records from background threads"
+    )
+    rotation: Optional[str] = Field(
+        "50 MB", description="Start a new log file at this size or interval"
+    )
+    retention: Optional[str] = Field(
+        "14 days", description="Delete rotated log files older than this"
+    )
+    compression: Optional[str] = Field(
+        "gz", description="Compress rotated log files in this format"
+    )
+    serialize: bool = Field(
+        False, description="Write the log file as JSON lines with structured fields"
+    )
+    sample_every: int = Field(
+        1, description="Keep one in N records of each high-volume kind"
+    )
+
+
+class TracingSettings(BaseModel):
+    """Configuration for span tracing, see app/tracing.py"""
+
+    enabled: bool = Field(False, description="Record spans of agent runs")
+    max_spans: int = Field(
+        10000, description="Finished spans kept in memory for the JSON trace"
+    )
+    trace_file: Optional[str] = Field(
+        None, description="Write the JSON trace here on exit, relative to the root"
+    )
+    metrics_port: Optional[int] = Field(
+        None, description="Serve /metrics (Prometheus) and /trace on this port"
+    )
+    metrics_host: str = Field("127.0.0.1", description="Metrics server address")
+    otlp_endpoint: Optional[str] = Field(
+        None, description="Export spans over OTLP/HTTP to this URL"
+    )
 
 
 class MCPServerConfig(BaseModel):
@@ -144,6 +225,22 @@ class MCPSettings(BaseModel):
     servers: Dict[str, MCPServerConfig] = Field(
         default_factory=dict, description="MCP server configurations"
     )
+    call_timeout: float = Field(
+        120.0, description="Seconds to wait for an MCP request before failing it"
+    )
+    max_inflight: int = Field(8, description="Concurrent requests per MCP server")
+    ping_interval: float = Field(
+        30.0,
+        description="Seconds without traffic before a server is pinged, 0 disables",
+    )
+    ping_timeout: float = Field(10.0, description="Seconds to wait for a ping")
+    reconnect_attempts: int = Field(
+        5, description="Reconnect attempts before a lost server is dropped"
+    )
+    reconnect_delay: float = Field(
+        1.0, description="First reconnect delay, doubled on every attempt"
+    )
+    reconnect_max_delay: float = Field(30.0, description="Longest reconnect delay")
 
     @classmethod
     def load_server_config(cls) -> Dict[str, MCPServerConfig]:
@@ -189,6 +286,12 @@ class AppConfig(BaseModel):
     daytona_config: Optional[DaytonaSettings] = Field(
         None, description="Daytona configuration"
     )
+    tracing_config: Optional[TracingSettings] = Field(
+        None, description="Tracing configuration"
+    )
+    logging_config: Optional[LoggingSettings] = Field(
+        None, description="Logging configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -255,6 +358,8 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "max_concurrent_requests": base_llm.get("max_concurrent_requests"),
+            "requests_per_minute": base_llm.get("requests_per_minute"),
         }
 
         # handle browser config.
@@ -319,6 +424,8 @@ class Config:
             run_flow_settings = RunflowSettings(**run_flow_config)
         else:
             run_flow_settings = RunflowSettings()
+        tracing_settings = TracingSettings(**raw_config.get("tracing", {}))
+        logging_settings = LoggingSettings(**raw_config.get("logging", {}))
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -333,6 +440,8 @@ class Config:
             "mcp_config": mcp_settings,
             "run_flow_config": run_flow_settings,
             "daytona_config": daytona_settings,
+            "tracing_config": tracing_settings,
+            "logging_config": logging_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -367,6 +476,16 @@ class Config:
         """Get the Run Flow configuration"""
         return self._config.run_flow_config
 
+    @property
+    def tracing(self) -> TracingSettings:
+        """Get the tracing configuration"""
+        return self._config.tracing_config
+
+    @property
+    def logging(self) -> LoggingSettings:
+        """Get the logging configuration"""
+        return self._config.logging_config
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -0,0 +1,99 @@
+"""Pooled HTTP channel to the browser automation API of a Daytona sandbox."""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+import httpx
+from daytona import Sandbox
+
+from app.utils.logger import logger
+
+
+# Replies larger than this are decoded off the event loop (screenshots)
+_LARGE_REPLY_BYTES = 256 * 1024
+
+
+class BrowserAutomationClient:
+    """Keep-alive HTTP client for the automation API of one sandbox.
+
+    The API listens on `port` inside the sandbox and is reached through the
+    sandbox's preview link, so an action is one request on a pooled
+    connection rather than a `curl` process started in the sandbox. The
+    preview link is fetched once; it is fetched again if the server rejects
+    its token.
+    """
+
+    def __init__(
+        self,
+        sandbox: Sandbox,
+        port: int = 8003,
+        timeout: float = 30.0,
+        max_connections: int = 4,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.sandbox = sandbox
+        self.sandbox_id = sandbox.id
+        self.port = port
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        async with self._lock:
+            if self._client is None:
+                # The SDK call is a blocking HTTP request
+                link = await asyncio.to_thread(self.sandbox.get_preview_link, self.port)
+                url = link.url if hasattr(link, "url") else str(link)
+                headers = {"Accept": "application/json"}
+                token = getattr(link, "token", None)
+                if token:
+                    headers["X-Daytona-Preview-Token"] = token
+                self._client = httpx.AsyncClient(
+                    base_url=f"{url.rstrip('/')}/api/automation/",
+                    headers=headers,
+                    timeout=self.timeout,
+                    transport=self.transport,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=60,
+                    ),
+                )
+            return self._client
+
+    async def request(
+        self, endpoint: str, params: Optional[dict] = None, method: str = "POST"
+    ) -> Dict[str, Any]:
+        """Call `endpoint` and return its decoded JSON reply.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+            json.JSONDecodeError: If the reply is not JSON.
+        """
+        for attempt in range(2):
+            client = await self._get_client()
+            if method == "GET":
+                response = await client.get(endpoint, params=params)
+            else:
+                response = await client.request(method, endpoint, json=params)
+            if response.status_code in (401, 403) and not attempt:
+                # Preview tokens expire; fetch a fresh link once
+                logger.debug(f"Refreshing preview link of sandbox {self.sandbox_id}")
+                await self.close()
+                continue
+            response.raise_for_status()
+            break
+
+        content = response.content
+        if len(content) > _LARGE_REPLY_BYTES:
+            return await asyncio.to_thread(json.loads, content)
+        return json.loads(content)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
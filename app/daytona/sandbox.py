@@ -1,5 +1,5 @@
-import time
-from typing import Optional
+import asyncio
+from typing import Dict, Optional, Sequence
 
 from daytona import (
     CreateSandboxFromImageParams,
@@ -61,27 +61,8 @@ async def get_or_start_sandbox(sandbox_id: str):
     logger.info(f"Getting or starting sandbox with ID: {sandbox_id}")
 
     try:
-        sandbox = daytona.get(sandbox_id)
-
-        # Check if sandbox needs to be started
-        if (
-            sandbox.state == SandboxState.ARCHIVED
-            or sandbox.state == SandboxState.STOPPED
-        ):
-            logger.info(f"Sandbox is in {sandbox.state} state. Starting...")
-            try:
-                daytona.start(sandbox)
-                # Wait a moment for the sandbox to initialize
-                # sleep(5)
-                # Refresh sandbox state after starting
-                sandbox = daytona.get(sandbox_id)
-
-                # Start supervisord in a session when restarting
-                start_supervisord_session(sandbox)
-            except Exception as e:
-                logger.error(f"Error starting sandbox: {e}")
-                raise e
-
+        sandbox = await asyncio.to_thread(daytona.get, sandbox_id)
+        await ensure_sandbox_started(sandbox)
         logger.info(f"Sandbox {sandbox_id} is ready")
         return sandbox
 
@@ -90,8 +71,28 @@ async def get_or_start_sandbox(sandbox_id: str):
         raise e
 
 
+async def ensure_sandbox_started(sandbox: Sandbox) -> None:
+    """Start a stopped or archived sandbox and wait for its services."""
+    if sandbox.state not in (SandboxState.ARCHIVED, SandboxState.STOPPED):
+        return
+
+    logger.info(f"Sandbox is in {sandbox.state} state. Starting...")
+    try:
+        await asyncio.to_thread(daytona.start, sandbox)
+        # Start supervisord in a session when restarting
+        await asyncio.to_thread(start_supervisord_session, sandbox)
+    except Exception as e:
+        logger.error(f"Error starting sandbox: {e}")
+        raise e
+    await wait_for_services(sandbox)
+
+
 def start_supervisord_session(sandbox: Sandbox):
-    """Start supervisord in a session."""
+    """Start supervisord in a session.
+
+    Returns as soon as the command is submitted; use `wait_for_services` to
+    wait until the services it manages accept connections.
+    """
     session_id = "supervisord-session"
     try:
         logger.info(f"Creating session {session_id} for supervisord")
@@ -105,13 +106,54 @@ def start_supervisord_session(sandbox: Sandbox):
                 var_async=True,
             ),
         )
-        time.sleep(25)  # Wait a bit to ensure supervisord starts properly
         logger.info(f"Supervisord started in session {session_id}")
     except Exception as e:
         logger.error(f"Error starting supervisord session: {str(e)}")
         raise e
 
 
+async def wait_for_services(
+    sandbox: Sandbox,
+    ports: Optional[Sequence[int]] = None,
+    timeout: Optional[float] = None,
+    initial_delay: float = 0.5,
+    max_delay: float = 4.0,
+) -> bool:
+    """Poll the sandbox until its service ports accept connections.
+
+    Probes run in a worker thread and are retried with exponential backoff,
+    so the event loop stays responsive while supervisord brings services up.
+
+    Returns:
+        True if every port is ready, False if `timeout` expired first.
+    """
+    ports = daytona_settings.readiness_ports if ports is None else ports
+    timeout = daytona_settings.readiness_timeout if timeout is None else timeout
+    probe = " && ".join(f"(exec 3<>/dev/tcp/127.0.0.1/{port})" for port in ports)
+    command = f"bash -c '{probe or 'true'}' >/dev/null 2>&1"
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = initial_delay
+    while True:
+        try:
+            response = await asyncio.to_thread(sandbox.process.exec, command, timeout=5)
+            if response.exit_code == 0:
+                logger.info(f"Sandbox services ready on ports {list(ports)}")
+                return True
+        except Exception as e:
+            logger.debug(f"Sandbox readiness probe failed: {e}")
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            logger.warning(
+                f"Sandbox services on ports {list(ports)} not ready after {timeout}s"
+            )
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
 def create_sandbox(password: str, project_id: str = None):
     """Create a new sandbox with all required services configured and running."""
 
@@ -163,6 +205,13 @@ def create_sandbox(password: str, project_id: str = None):
     return sandbox
 
 
+async def create_sandbox_async(password: str, project_id: str = None) -> Sandbox:
+    """Create a sandbox off the event loop and wait until its services are up."""
+    sandbox = await asyncio.to_thread(create_sandbox, password, project_id)
+    await wait_for_services(sandbox)
+    return sandbox
+
+
 async def delete_sandbox(sandbox_id: str):
     """Delete a sandbox by its ID."""
     if not daytona:
@@ -172,13 +221,69 @@ async def delete_sandbox(sandbox_id: str):
 
     try:
         # Get the sandbox
-        sandbox = daytona.get(sandbox_id)
+        sandbox = await asyncio.to_thread(daytona.get, sandbox_id)
 
         # Delete the sandbox
-        daytona.delete(sandbox)
+        await asyncio.to_thread(daytona.delete, sandbox)
+        SANDBOX_REGISTRY.forget(sandbox_id)
 
         logger.info(f"Successfully deleted sandbox {sandbox_id}")
         return True
     except Exception as e:
         logger.error(f"Error deleting sandbox {sandbox_id}: {str(e)}")
         raise e
+
+
+class SandboxRegistry:
+    """Process-wide registry handing every sandbox tool of a project one sandbox.
+
+    The first caller for a project creates the sandbox while later callers,
+    concurrent or not, wait for and share it. Stopped or archived sandboxes
+    are restarted on access. Callers without a project id get a sandbox of
+    their own, so a sandbox is only shared when its project is named.
+    """
+
+    def __init__(self):
+        self._sandboxes: Dict[str, Sandbox] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(
+        self, project_id: Optional[str] = None, password: Optional[str] = None
+    ) -> Sandbox:
+        """Return the project's sandbox, creating or restarting it if needed.
+
+        Without a `project_id`, a new sandbox is created and not shared.
+        """
+        if not daytona:
+            raise RuntimeError(
+                "Daytona is not initialized. Please provide a valid API key in the "
+                "configuration to use sandbox features."
+            )
+
+        password = password or daytona_settings.VNC_password
+        if not project_id:
+            return await create_sandbox_async(password=password)
+
+        async with self._locks.setdefault(project_id, asyncio.Lock()):
+            sandbox = self._sandboxes.get(project_id)
+            if sandbox is None:
+                sandbox = await create_sandbox_async(
+                    password=password, project_id=project_id
+                )
+                self._sandboxes[project_id] = sandbox
+            else:
+                await ensure_sandbox_started(sandbox)
+            return sandbox
+
+    def register(self, sandbox: Sandbox, project_id: str) -> None:
+        """Share an externally created sandbox with the project's tools."""
+        self._sandboxes[project_id] = sandbox
+
+    def forget(self, sandbox_id: str) -> None:
+        """Drop a deleted sandbox so the next acquire creates a new one."""
+        for key, sandbox in list(self._sandboxes.items()):
+            if sandbox.id == sandbox_id:
+                del self._sandboxes[key]
+
+
+SANDBOX_REGISTRY = SandboxRegistry()
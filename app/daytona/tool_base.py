@@ -2,20 +2,16 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, ClassVar, Dict, Optional
 
-from daytona import Daytona, DaytonaConfig, Sandbox, SandboxState
+from daytona import Sandbox
 from pydantic import Field
 
 from app.config import config
-from app.daytona.sandbox import create_sandbox, start_supervisord_session, daytona
+from app.daytona.sandbox import SANDBOX_REGISTRY, ensure_sandbox_started
 from app.tool.base import BaseTool
 from app.utils.files_utils import clean_path
 from app.utils.logger import logger
 
 
-# Import daytona instance from sandbox module (will be None if API key is not set)
-from app.daytona.sandbox import daytona
-
-
 @dataclass
 class ThreadMessage:
     """
@@ -63,53 +59,35 @@ class SandboxToolsBase(BaseTool):
         underscore_attrs_are_private = True
 
     async def _ensure_sandbox(self) -> Sandbox:
-        """Ensure we have a valid sandbox instance, retrieving it from the project if needed."""
-        if not daytona:
-            raise RuntimeError("Daytona is not initialized. Please provide a valid API key in the configuration to use sandbox features.")
-
-        if self._sandbox is None:
-            # Get or start the sandbox
-            try:
-                self._sandbox = create_sandbox(password=config.daytona.VNC_password)
-                # Log URLs if not already printed
-                if not SandboxToolsBase._urls_printed:
-                    vnc_link = self._sandbox.get_preview_link(6080)
-                    website_link = self._sandbox.get_preview_link(8080)
-
-                    vnc_url = (
-                        vnc_link.url if hasattr(vnc_link, "url") else str(vnc_link)
-                    )
-                    website_url = (
-                        website_link.url
-                        if hasattr(website_link, "url")
-                        else str(website_link)
-                    )
-
-                    print("\033[95m***")
-                    print(f"VNC URL: {vnc_url}")
-                    print(f"Website URL: {website_url}")
-                    print("***\033[0m")
-                    SandboxToolsBase._urls_printed = True
-            except Exception as e:
-                logger.error(f"Error retrieving or starting sandbox: {str(e)}")
-                raise e
-        else:
-            if (
-                self._sandbox.state == SandboxState.ARCHIVED
-                or self._sandbox.state == SandboxState.STOPPED
-            ):
-                logger.info(f"Sandbox is in {self._sandbox.state} state. Starting...")
-                try:
-                    daytona.start(self._sandbox)
-                    # Wait a moment for the sandbox to initialize
-                    # sleep(5)
-                    # Refresh sandbox state after starting
-
-                    # Start supervisord in a session when restarting
-                    start_supervisord_session(self._sandbox)
-                except Exception as e:
-                    logger.error(f"Error starting sandbox: {e}")
-                    raise e
+        """Ensure we have a valid sandbox instance, shared by all tools of the project."""
+        if self._sandbox is not None:
+            await ensure_sandbox_started(self._sandbox)
+            return self._sandbox
+
+        try:
+            self._sandbox = await SANDBOX_REGISTRY.acquire(
+                self.project_id, password=config.daytona.VNC_password
+            )
+            # Log URLs if not already printed
+            if not SandboxToolsBase._urls_printed:
+                vnc_link = self._sandbox.get_preview_link(6080)
+                website_link = self._sandbox.get_preview_link(8080)
+
+                vnc_url = vnc_link.url if hasattr(vnc_link, "url") else str(vnc_link)
+                website_url = (
+                    website_link.url
+                    if hasattr(website_link, "url")
+                    else str(website_link)
+                )
+
+                print("\033[95m***")
+                print(f"VNC URL: {vnc_url}")
+                print(f"Website URL: {website_url}")
+                print("***\033[0m")
+                SandboxToolsBase._urls_printed = True
+        except Exception as e:
+            logger.error(f"Error retrieving or starting sandbox: {str(e)}")
+            raise e
         return self._sandbox
 
     @property
@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Union
 from pydantic import BaseModel
 
 from app.agent.base import BaseAgent
+from app.sandbox.client import LeasedSandboxClient
 
 
 class BaseFlow(BaseModel, ABC):
@@ -38,6 +39,26 @@ class BaseFlow(BaseModel, ABC):
 
         # Initialize using BaseModel's init
         super().__init__(**data)
+        self._share_sandbox_lease()
+
+    def _share_sandbox_lease(self) -> None:
+        """Give every agent the sandbox lease of the primary agent.
+
+        The agents of a flow work on the same files, so they use one sandbox;
+        other flows keep their own. Agents whose client already holds a
+        sandbox or is not leased keep their client.
+        """
+        client = getattr(self.primary_agent, "sandbox_client", None)
+        if not isinstance(client, LeasedSandboxClient):
+            return
+        for agent in self.agents.values():
+            other = agent.sandbox_client
+            if (
+                isinstance(other, LeasedSandboxClient)
+                and other.session_id != client.session_id
+                and other.sandbox is None
+            ):
+                agent.sandbox_client = client
 
     @property
     def primary_agent(self) -> Optional[BaseAgent]:
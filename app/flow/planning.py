@@ -1,7 +1,7 @@
 import json
 import time
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import Field
 
@@ -50,6 +50,8 @@ class PlanningFlow(BaseFlow):
     executor_keys: List[str] = Field(default_factory=list)
     active_plan_id: str = Field(default_factory=lambda: f"plan_{int(time.time())}")
     current_step_index: Optional[int] = None
+    # app.checkpoint.RunCheckpoint; plans and agents are saved after each step
+    checkpoint: Optional[Any] = Field(default=None, exclude=True)
 
     def __init__(
         self, agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent]], **data
@@ -97,6 +99,10 @@ class PlanningFlow(BaseFlow):
             if not self.primary_agent:
                 raise ValueError("No primary agent available")
 
+            if self.checkpoint is not None:
+                for agent in self.agents.values():
+                    agent.checkpoint = self.checkpoint
+
             # Create initial plan if input provided
             if input_text:
                 await self._create_initial_plan(input_text)
@@ -107,6 +113,7 @@ class PlanningFlow(BaseFlow):
                         f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
                     )
                     return f"Failed to create plan for: {input_text}"
+                await self._save_checkpoint()
 
             result = ""
             while True:
@@ -123,6 +130,7 @@ class PlanningFlow(BaseFlow):
                 executor = self.get_executor(step_type)
                 step_result = await self._execute_step(executor, step_info)
                 result += step_result + "\n"
+                await self._save_checkpoint()
 
                 # Check if agent wants to terminate
                 if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
@@ -133,6 +141,31 @@ class PlanningFlow(BaseFlow):
             logger.error(f"Error in PlanningFlow: {str(e)}")
             return f"Execution failed: {str(e)}"
 
+    def restore_checkpoint(self, checkpoint: Any) -> bool:
+        """Load plans and agent state from a `RunCheckpoint` of this flow.
+
+        `execute("")` then continues with the first step that was not
+        completed; a step interrupted mid-way is run again. Returns False if
+        no plan was checkpointed yet.
+        """
+        self.checkpoint = checkpoint
+        if not checkpoint.flow:
+            return False
+        self.active_plan_id = checkpoint.flow["active_plan_id"]
+        self.planning_tool.restore_state(checkpoint.flow["planning"])
+        for agent in self.agents.values():
+            checkpoint.restore_agent(agent, resume_steps=False)
+        return True
+
+    async def _save_checkpoint(self) -> None:
+        if self.checkpoint is not None:
+            await self.checkpoint.save_flow(
+                {
+                    "active_plan_id": self.active_plan_id,
+                    "planning": self.planning_tool.checkpoint_state(),
+                }
+            )
+
     async def _create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
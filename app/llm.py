@@ -1,7 +1,11 @@
+import asyncio
 import math
-from typing import Dict, List, Optional, Union
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Union
 
-import tiktoken
 from openai import (
     APIError,
     AsyncAzureOpenAI,
@@ -18,7 +22,6 @@ from tenacity import (
     wait_random_exponential,
 )
 
-from app.bedrock import BedrockClient
 from app.config import LLMSettings, config
 from app.exceptions import TokenLimitExceeded
 from app.logger import logger  # Assuming a logger is set up in your app
@@ -29,6 +32,7 @@ from app.schema import (
     Message,
     ToolChoice,
 )
+from app.tracing import tracer
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -42,6 +46,127 @@ MULTIMODAL_MODELS = [
 ]
 
 
+class StreamEcho:
+    """Echoes streamed chunks to stdout, flushing at most every `interval`.
+
+    A flush per chunk is a write syscall per token; flushing a few times a
+    second still reads as live output.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self._last_flush = time.monotonic()
+
+    def write(self, text: str) -> None:
+        sys.stdout.write(text)
+        now = time.monotonic()
+        if now - self._last_flush >= self.interval:
+            sys.stdout.flush()
+            self._last_flush = now
+
+    def end(self) -> None:
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+
+class RequestLimiter:
+    """Limits the concurrent and per-minute requests made through one LLM.
+
+    The LLM instance is shared, so every agent running in the process queues
+    here: many concurrent tasks wait for a slot instead of all tripping the
+    provider's rate limit. A rate limit response pauses all callers.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+    ):
+        self._semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold back requests that have not started for `seconds`."""
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+    async def __aenter__(self) -> "RequestLimiter":
+        if self._semaphore:
+            await self._semaphore.acquire()
+        try:
+            while True:
+                # Reserve the next start slot; a pause may move it while asleep
+                now = time.monotonic()
+                if self._next_start <= now:
+                    self._next_start = now + self._interval
+                    return self
+                await asyncio.sleep(self._next_start - now)
+        except BaseException:
+            if self._semaphore:
+                self._semaphore.release()
+            raise
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._semaphore:
+            self._semaphore.release()
+
+
+def _retry_after(error: RateLimitError, default: float = 1.0) -> float:
+    """Seconds the provider asked to wait, from the rate limit response."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        return float(headers.get("retry-after", default))
+    except ValueError:
+        return default
+
+
+class TokenUsage:
+    """Tokens used by the requests of one task, see `track_token_usage`."""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, input_tokens: int = 0, completion_tokens: int = 0) -> None:
+        self.input_tokens += input_tokens
+        self.completion_tokens += completion_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.completion_tokens
+
+
+_task_usage: ContextVar[Optional[TokenUsage]] = ContextVar(
+    "llm_task_usage", default=None
+)
+
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """Count the tokens of the LLM requests made in the current task.
+
+    The LLM totals are shared by every agent in the process; this counts only
+    the requests made from the current asyncio task and the tasks it starts.
+    While a task is tracked, ``max_input_tokens`` limits its own input tokens
+    rather than the process total, so one task reaching the limit does not
+    fail the others.
+    """
+    usage = TokenUsage()
+    token = _task_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _task_usage.reset(token)
+
+
+def _record_task_usage(input_tokens: int = 0, completion_tokens: int = 0) -> None:
+    usage = _task_usage.get()
+    if usage is not None:
+        usage.add(input_tokens, completion_tokens)
+
+
 class TokenCounter:
     # Token constants
     BASE_MESSAGE_TOKENS = 4
@@ -206,12 +331,15 @@ class LLM:
                 else None
             )
 
-            # Initialize tokenizer
-            try:
-                self.tokenizer = tiktoken.encoding_for_model(self.model)
-            except KeyError:
-                # If the model is not in tiktoken's presets, use cl100k_base as default
-                self.tokenizer = tiktoken.get_encoding("cl100k_base")
+            # Shared by every agent using this config
+            self.limiter = RequestLimiter(
+                getattr(llm_config, "max_concurrent_requests", None),
+                getattr(llm_config, "requests_per_minute", None),
+            )
+
+            # Tokenizer is loaded on first use, see the `tokenizer` property
+            self._tokenizer = None
+            self._token_counter: Optional[TokenCounter] = None
 
             if self.api_type == "azure":
                 self.client = AsyncAzureOpenAI(
@@ -220,11 +348,31 @@ class LLM:
                     api_version=self.api_version,
                 )
             elif self.api_type == "aws":
+                # boto3 is only imported when a Bedrock model is configured
+                from app.bedrock import BedrockClient
+
                 self.client = BedrockClient()
             else:
                 self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
 
-            self.token_counter = TokenCounter(self.tokenizer)
+    @property
+    def tokenizer(self):
+        """tiktoken encoding for the model, imported and loaded on first use"""
+        if self._tokenizer is None:
+            import tiktoken
+
+            try:
+                self._tokenizer = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                # If the model is not in tiktoken's presets, use cl100k_base as default
+                self._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return self._tokenizer
+
+    @property
+    def token_counter(self) -> TokenCounter:
+        if self._token_counter is None:
+            self._token_counter = TokenCounter(self.tokenizer)
+        return self._token_counter
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
@@ -240,26 +388,40 @@ class LLM:
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
-        logger.info(
-            f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
-            f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
-            f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
+        _record_task_usage(input_tokens, completion_tokens)
+        logger.bind(sample="llm.tokens").info(
+            "Token usage: Input={input_tokens}, Completion={completion_tokens}, "
+            "Cumulative Input={total_input_tokens}, "
+            "Cumulative Completion={total_completion_tokens}, "
+            "Total={total_tokens}, Cumulative Total={cumulative_tokens}",
+            input_tokens=input_tokens,
+            completion_tokens=completion_tokens,
+            total_input_tokens=self.total_input_tokens,
+            total_completion_tokens=self.total_completion_tokens,
+            total_tokens=input_tokens + completion_tokens,
+            cumulative_tokens=self.total_input_tokens + self.total_completion_tokens,
         )
 
+    def _used_input_tokens(self) -> int:
+        """Input tokens counted against the limit: the tracked task's, if any."""
+        usage = _task_usage.get()
+        return usage.input_tokens if usage is not None else self.total_input_tokens
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
-            return (self.total_input_tokens + input_tokens) <= self.max_input_tokens
+            return (self._used_input_tokens() + input_tokens) <= self.max_input_tokens
         # If max_input_tokens is not set, always return True
         return True
 
     def get_limit_error_message(self, input_tokens: int) -> str:
         """Generate error message for token limit exceeded"""
+        used = self._used_input_tokens()
         if (
             self.max_input_tokens is not None
-            and (self.total_input_tokens + input_tokens) > self.max_input_tokens
+            and (used + input_tokens) > self.max_input_tokens
         ):
-            return f"Request may exceed input token limit (Current: {self.total_input_tokens}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
+            return f"Request may exceed input token limit (Current: {used}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
 
         return "Token limit exceeded"
 
@@ -292,58 +454,21 @@ class LLM:
         formatted_messages = []
 
         for message in messages:
-            # Convert Message objects to dictionaries
             if isinstance(message, Message):
-                message = message.to_dict()
-
-            if isinstance(message, dict):
+                # Reuses the message's cached dict, so only new messages are formatted
+                formatted = message.to_formatted_dict(supports_images)
+            elif isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
                 if "role" not in message:
                     raise ValueError("Message dict must contain 'role' field")
-
-                # Process base64 images if present and model supports images
-                if supports_images and message.get("base64_image"):
-                    # Initialize or convert content to appropriate format
-                    if not message.get("content"):
-                        message["content"] = []
-                    elif isinstance(message["content"], str):
-                        message["content"] = [
-                            {"type": "text", "text": message["content"]}
-                        ]
-                    elif isinstance(message["content"], list):
-                        # Convert string items to proper text objects
-                        message["content"] = [
-                            (
-                                {"type": "text", "text": item}
-                                if isinstance(item, str)
-                                else item
-                            )
-                            for item in message["content"]
-                        ]
-
-                    # Add the image to content
-                    message["content"].append(
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{message['base64_image']}"
-                            },
-                        }
-                    )
-
-                    # Remove the base64_image field
-                    del message["base64_image"]
-                # If model doesn't support images but message has base64_image, handle gracefully
-                elif not supports_images and message.get("base64_image"):
-                    # Just remove the base64_image field and keep the text content
-                    del message["base64_image"]
-
-                if "content" in message or "tool_calls" in message:
-                    formatted_messages.append(message)
-                # else: do not include the message
+                formatted = Message.format_dict(message, supports_images)
             else:
                 raise TypeError(f"Unsupported message type: {type(message)}")
 
+            if formatted is not None:
+                formatted_messages.append(formatted)
+            # else: do not include the message
+
         # Validate all messages have required fields
         for msg in formatted_messages:
             if msg["role"] not in ROLE_VALUES:
@@ -418,9 +543,16 @@ class LLM:
 
             if not stream:
                 # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
-                )
+                async with self.limiter:
+                    with tracer.span("llm.request", target=self.model) as span:
+                        response = await self.client.chat.completions.create(
+                            **params, stream=False
+                        )
+                        if response.usage:
+                            span.set(
+                                input_tokens=response.usage.prompt_tokens,
+                                completion_tokens=response.usage.completion_tokens,
+                            )
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
@@ -435,27 +567,35 @@ class LLM:
             # Streaming request, For streaming, update estimated token count before making the request
             self.update_token_count(input_tokens)
 
-            response = await self.client.chat.completions.create(**params, stream=True)
-
             collected_messages = []
+            echo = StreamEcho()
             completion_text = ""
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                completion_text += chunk_message
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
-            if not full_response:
-                raise ValueError("Empty response from streaming LLM")
-
-            # estimate completion tokens for streaming response
-            completion_tokens = self.count_tokens(completion_text)
+            async with self.limiter:
+                with tracer.span(
+                    "llm.request", target=self.model, input_tokens=input_tokens
+                ) as span:
+                    response = await self.client.chat.completions.create(
+                        **params, stream=True
+                    )
+                    async for chunk in response:
+                        chunk_message = chunk.choices[0].delta.content or ""
+                        collected_messages.append(chunk_message)
+                        completion_text += chunk_message
+                        echo.write(chunk_message)
+
+                    echo.end()  # Newline after streaming
+                    full_response = "".join(collected_messages).strip()
+                    if not full_response:
+                        raise ValueError("Empty response from streaming LLM")
+
+                    # estimate completion tokens for streaming response
+                    completion_tokens = self.count_tokens(completion_text)
+                    span.set(completion_tokens=completion_tokens)
             logger.info(
                 f"Estimated completion tokens for streaming response: {completion_tokens}"
             )
             self.total_completion_tokens += completion_tokens
+            _record_task_usage(completion_tokens=completion_tokens)
 
             return full_response
 
@@ -471,6 +611,7 @@ class LLM:
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
                 logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                self.limiter.pause(_retry_after(oe))
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
@@ -529,15 +670,17 @@ class LLM:
                     "The last message must be from the user to attach images"
                 )
 
-            # Process the last user message to include images
-            last_message = formatted_messages[-1]
+            # Process the last user message to include images. Formatted
+            # messages are shared with the message cache, so work on a copy.
+            last_message = dict(formatted_messages[-1])
+            formatted_messages[-1] = last_message
 
             # Convert content to multimodal format if needed
             content = last_message["content"]
             multimodal_content = (
                 [{"type": "text", "text": content}]
                 if isinstance(content, str)
-                else content
+                else list(content)
                 if isinstance(content, list)
                 else []
             )
@@ -590,7 +733,14 @@ class LLM:
 
             # Handle non-streaming request
             if not stream:
-                response = await self.client.chat.completions.create(**params)
+                async with self.limiter:
+                    with tracer.span("llm.request", target=self.model) as span:
+                        response = await self.client.chat.completions.create(**params)
+                        if response.usage:
+                            span.set(
+                                input_tokens=response.usage.prompt_tokens,
+                                completion_tokens=response.usage.completion_tokens,
+                            )
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
@@ -600,15 +750,19 @@ class LLM:
 
             # Handle streaming request
             self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
-
             collected_messages = []
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
+            echo = StreamEcho()
+            async with self.limiter:
+                with tracer.span(
+                    "llm.request", target=self.model, input_tokens=input_tokens
+                ):
+                    response = await self.client.chat.completions.create(**params)
+                    async for chunk in response:
+                        chunk_message = chunk.choices[0].delta.content or ""
+                        collected_messages.append(chunk_message)
+                        echo.write(chunk_message)
+
+            echo.end()  # Newline after streaming
             full_response = "".join(collected_messages).strip()
 
             if not full_response:
@@ -627,6 +781,7 @@ class LLM:
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
                 logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                self.limiter.pause(_retry_after(oe))
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
@@ -649,6 +804,7 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        tools_tokens: Optional[int] = None,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -661,6 +817,7 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            tools_tokens: Precomputed token count of `tools`, counted here if omitted
             **kwargs: Additional completion arguments
 
         Returns:
@@ -691,10 +848,11 @@ class LLM:
             input_tokens = self.count_message_tokens(messages)
 
             # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
+            if tools_tokens is None:
+                tools_tokens = 0
+                if tools:
+                    for tool in tools:
+                        tools_tokens += self.count_tokens(str(tool))
 
             input_tokens += tools_tokens
 
@@ -729,9 +887,16 @@ class LLM:
                 )
 
             params["stream"] = False  # Always use non-streaming for tool requests
-            response: ChatCompletion = await self.client.chat.completions.create(
-                **params
-            )
+            async with self.limiter:
+                with tracer.span("llm.request", target=self.model) as span:
+                    response: ChatCompletion = (
+                        await self.client.chat.completions.create(**params)
+                    )
+                    if response.usage:
+                        span.set(
+                            input_tokens=response.usage.prompt_tokens,
+                            completion_tokens=response.usage.completion_tokens,
+                        )
 
             # Check if response is valid
             if not response.choices or not response.choices[0].message:
@@ -758,6 +923,7 @@ class LLM:
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
                 logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                self.limiter.pause(_retry_after(oe))
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
@@ -1,28 +1,151 @@
+import copy
+import queue
 import sys
+import threading
 from datetime import datetime
+from typing import Any, Callable, Optional
 
 from loguru import logger as _logger
 
-from app.config import PROJECT_ROOT
+from app.config import PROJECT_ROOT, LoggingSettings, config
 
 
 _print_level = "INFO"
+_file_log = None
+
+
+class BackgroundSink:
+    """Loguru sink that hands formatted records to a writer thread.
+
+    The caller only formats and enqueues a record; a slow terminal, a slow
+    disk or a log file rotation (with compression) blocks the writer thread
+    instead of the event loop. Records queued together are written at once.
+    """
+
+    def __init__(self, write: Callable[[str], Any], name: str = "log-writer"):
+        self._write = write
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        self._queue.put(message)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            text = "".join(message for message in batch if message is not None)
+            if text:
+                try:
+                    self._write(text)
+                except Exception as e:
+                    print(f"Failed to write log records: {e}", file=sys.__stderr__)
+            if None in batch:
+                return
+
+    def stop(self) -> None:
+        """Write the queued records and end the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+def _stream_writer(stream) -> Callable[[str], None]:
+    def write(text: str) -> None:
+        stream.write(text)
+        stream.flush()
+
+    return write
+
+
+def _file_writer(path, settings: LoggingSettings) -> Callable[[str], None]:
+    """Writes preformatted text to `path` with loguru's rotation and retention."""
+    global _file_log
+    if _file_log is None:
+        # An independent logger whose only sink is the log file
+        _file_log = copy.deepcopy(_logger)
+    _file_log.remove()
+    _file_log.add(
+        path,
+        level=0,
+        format="{message}",
+        rotation=settings.rotation,
+        retention=settings.retention,
+        compression=settings.compression,
+    )
+    raw = _file_log.opt(raw=True)
+    return lambda text: raw.log("DEBUG", text)
+
+
+def clip(value: Any, limit: Optional[int] = None) -> str:
+    """`value` as a string of at most `limit` characters, for log fields.
+
+    Clip large payloads (tool results, arguments) before passing them to the
+    logger, so formatting the record does not copy the whole payload.
+    """
+    if limit is None:
+        limit = (config.logging or LoggingSettings()).max_record_chars
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}… [{len(text) - limit} more chars]"
+
+
+def _record_patcher(settings: LoggingSettings):
+    """Caps messages and marks sampled-out records, once per record."""
+    seen = {}
+
+    def patch(record) -> None:
+        message = record["message"]
+        if len(message) > settings.max_record_chars:
+            record["message"] = clip(message, settings.max_record_chars)
+        # Records bound with `sample=<kind>` are kept one in `sample_every`
+        kind = record["extra"].get("sample")
+        if kind is not None and settings.sample_every > 1:
+            count = seen.get(kind, 0)
+            seen[kind] = count + 1
+            record["extra"]["sampled_out"] = count % settings.sample_every != 0
+
+    return patch
+
+
+def _keep(record) -> bool:
+    return not record["extra"].get("sampled_out", False)
 
 
 def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None):
     """Adjust the log level to above level"""
     global _print_level
     _print_level = print_level
+    settings = config.logging or LoggingSettings()
 
     current_date = datetime.now()
     formatted_date = current_date.strftime("%Y%m%d%H%M%S")
     log_name = (
         f"{name}_{formatted_date}" if name else formatted_date
     )  # name a log with prefix name
+    log_path = PROJECT_ROOT / f"logs/{log_name}.log"
 
+    # Stops the previous sinks, writing out what they have queued
     _logger.remove()
-    _logger.add(sys.stderr, level=print_level)
-    _logger.add(PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level)
+    file_writer = _file_writer(log_path, settings)
+    _logger.configure(patcher=_record_patcher(settings))
+    if settings.background:
+        stderr_sink = BackgroundSink(_stream_writer(sys.stderr), "log-stderr")
+        file_sink = BackgroundSink(file_writer, "log-file")
+    else:
+        stderr_sink = sys.stderr
+        file_sink = file_writer
+    _logger.add(
+        stderr_sink, level=print_level, filter=_keep, colorize=sys.stderr.isatty()
+    )
+    _logger.add(
+        file_sink, level=logfile_level, filter=_keep, serialize=settings.serialize
+    )
     return _logger
 
 
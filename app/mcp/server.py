@@ -9,43 +9,86 @@ import asyncio
 import atexit
 import json
 from inspect import Parameter, Signature
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
-from app.logger import logger
+from app import tool as tool_package
+from app.logger import clip, logger
+from app.mcp.session_tools import SessionToolPool
 from app.tool.base import BaseTool
-from app.tool.bash import Bash
-from app.tool.browser_use_tool import BrowserUseTool
-from app.tool.str_replace_editor import StrReplaceEditor
-from app.tool.terminate import Terminate
 
 
-class MCPServer:
-    """MCP Server implementation with tool registration and management."""
+# Standard tools by registration name. Classes are resolved from app.tool on
+# demand, so disabled tools never import their dependencies.
+STANDARD_TOOLS: Dict[str, str] = {
+    "bash": "Bash",
+    "browser": "BrowserUseTool",
+    "editor": "StrReplaceEditor",
+    "terminate": "Terminate",
+}
+
 
-    def __init__(self, name: str = "openmanus"):
-        self.server = FastMCP(name)
+class MCPServer:
+    """MCP Server implementation with tool registration and management.
+
+    Standard tools are instantiated per client session, so concurrent clients
+    never share a shell, browser or editor history.
+    """
+
+    def __init__(
+        self,
+        name: str = "openmanus",
+        tools: Optional[List[str]] = None,
+        max_sessions: int = 32,
+        idle_timeout: float = 600.0,
+        **settings: Any,
+    ):
+        self.server = FastMCP(name, **settings)
+        # Prototype instances, used for schemas only
         self.tools: Dict[str, BaseTool] = {}
+        factories = {}
 
         # Initialize standard tools
-        self.tools["bash"] = Bash()
-        self.tools["browser"] = BrowserUseTool()
-        self.tools["editor"] = StrReplaceEditor()
-        self.tools["terminate"] = Terminate()
+        for tool_name in tools or STANDARD_TOOLS:
+            if tool_name not in STANDARD_TOOLS:
+                raise ValueError(f"Unknown tool: {tool_name}")
+            tool_class = getattr(tool_package, STANDARD_TOOLS[tool_name])
+            self.tools[tool_name] = tool_class()
+            factories[tool_name] = tool_class
+
+        self.sessions = SessionToolPool(
+            factories, max_sessions=max_sessions, idle_timeout=idle_timeout
+        )
 
     def register_tool(self, tool: BaseTool, method_name: Optional[str] = None) -> None:
-        """Register a tool with parameter validation and documentation."""
+        """Register a tool with parameter validation and documentation.
+
+        Standard tools run on the calling session's own instance; any other
+        tool is shared by all sessions.
+        """
         tool_name = method_name or tool.name
         tool_param = tool.to_param()
         tool_function = tool_param["function"]
+        pool_name = next(
+            (name for name, proto in self.tools.items() if proto is tool), None
+        )
 
         # Define the async function to be registered
-        async def tool_method(**kwargs):
-            logger.info(f"Executing {tool_name}: {kwargs}")
-            result = await tool.execute(**kwargs)
-
-            logger.info(f"Result of {tool_name}: {result}")
+        async def tool_method(ctx: Optional[Context] = None, **kwargs):
+            logger.bind(sample="mcp.call").info(
+                "Executing {tool}: {arguments}", tool=tool_name, arguments=clip(kwargs)
+            )
+            if pool_name is None:
+                result = await tool.execute(**kwargs)
+            else:
+                session = ctx.session if ctx is not None else self
+                async with self.sessions.use(session, pool_name) as session_tool:
+                    result = await session_tool.execute(**kwargs)
+
+            logger.bind(sample="mcp.result").info(
+                "Result of {tool}: {result}", tool=tool_name, result=clip(result)
+            )
 
             # Handle different types of results (match original logic)
             if hasattr(result, "model_dump"):
@@ -133,14 +176,21 @@ class MCPServer:
             )
             parameters.append(param)
 
+        # Injected by FastMCP to identify the calling client session
+        parameters.append(
+            Parameter(
+                name="ctx",
+                kind=Parameter.KEYWORD_ONLY,
+                default=None,
+                annotation=Context,
+            )
+        )
         return Signature(parameters=parameters)
 
     async def cleanup(self) -> None:
         """Clean up server resources."""
         logger.info("Cleaning up resources")
-        # Follow original cleanup logic - only clean browser tool
-        if "browser" in self.tools and hasattr(self.tools["browser"], "cleanup"):
-            await self.tools["browser"].cleanup()
+        await self.sessions.close()
 
     def register_all_tools(self) -> None:
         """Register all tools with the server."""
@@ -165,16 +215,54 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="OpenManus MCP Server")
     parser.add_argument(
         "--transport",
-        choices=["stdio"],
+        choices=["stdio", "sse"],
         default="stdio",
-        help="Communication method: stdio or http (default: stdio)",
+        help="Communication method: stdio or sse (default: stdio)",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="SSE bind host (default: 127.0.0.1). The tools run commands "
+        "without authentication; bind other interfaces, e.g. 0.0.0.0, only on "
+        "trusted networks",
+    )
+    parser.add_argument("--port", type=int, default=8000, help="SSE bind port")
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=32,
+        help="Client sessions holding tool instances at once (default: 32)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=600.0,
+        help="Seconds before an idle session's tools are closed (default: 600)",
+    )
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        choices=list(STANDARD_TOOLS),
+        default=None,
+        help="Tools to serve (default: all)",
     )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.transport == "sse" and args.host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning(
+            f"Serving tools without authentication on {args.host}:{args.port}; "
+            "any host that can reach it can run commands"
+        )
 
     # Create and run server (maintaining original flow)
-    server = MCPServer()
+    server = MCPServer(
+        tools=args.tools,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        host=args.host,
+        port=args.port,
+    )
     server.run(transport=args.transport)
@@ -0,0 +1,198 @@
+"""Per-client-session tool instances for the MCP server.
+
+Stateful tools (a bash shell, a browser, an editor's undo history) must not be
+shared between MCP clients. `SessionToolPool` creates tool instances on demand
+for each client session, serializes calls to the same tool within a session,
+and evicts sessions that stay idle or exceed the session cap.
+"""
+
+import asyncio
+import os
+import signal
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from app.exceptions import ToolError
+from app.logger import logger
+from app.tool.base import BaseTool
+
+
+ToolFactory = Callable[[], BaseTool]
+
+
+@dataclass
+class _Session:
+    ref: Optional[Callable[[], Any]]
+    tools: Dict[str, BaseTool] = field(default_factory=dict)
+    locks: Dict[str, asyncio.Lock] = field(default_factory=dict)
+    last_used: float = field(default_factory=time.monotonic)
+    active: int = 0
+
+    def owned_by(self, session: Any) -> bool:
+        return self.ref is None or self.ref() is session
+
+
+async def close_tool(tool: BaseTool) -> None:
+    """Release the resources held by a tool instance."""
+    try:
+        cleanup = getattr(tool, "cleanup", None)
+        if cleanup is not None and asyncio.iscoroutinefunction(cleanup):
+            await cleanup()
+        # Bash keeps a shell process without exposing a cleanup hook
+        process = getattr(getattr(tool, "_session", None), "_process", None)
+        if process is not None and process.returncode is None:
+            # The shell runs in its own process group; end its children too
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except RuntimeError:
+                # Created on a loop that is gone (cleanup at exit); the signal
+                # is enough
+                pass
+    except Exception as e:
+        logger.warning(f"Error closing tool {tool.name}: {e}")
+
+
+class SessionToolPool:
+    """Tool instances per client session, created from factories on demand.
+
+    Attributes:
+        max_sessions: Sessions holding tools at once; the least recently used
+            idle session is evicted to admit a new one.
+        idle_timeout: Seconds after which an idle session's tools are closed.
+    """
+
+    def __init__(
+        self,
+        factories: Dict[str, ToolFactory],
+        max_sessions: int = 32,
+        idle_timeout: float = 600.0,
+    ):
+        self.factories = factories
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[int, _Session]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @asynccontextmanager
+    async def use(self, session: Any, tool_name: str) -> AsyncIterator[BaseTool]:
+        """Borrow `session`'s instance of a tool, creating it if needed.
+
+        Calls to the same tool of one session run one at a time; different
+        sessions and different tools run concurrently.
+
+        Raises:
+            ToolError: If the tool is unknown or every session slot is busy.
+        """
+        if tool_name not in self.factories:
+            raise ToolError(f"Unknown tool: {tool_name}")
+        self._start_sweeper()
+
+        entry = await self._get_session(session)
+        entry.active += 1
+        try:
+            lock = entry.locks.setdefault(tool_name, asyncio.Lock())
+            async with lock:
+                tool = entry.tools.get(tool_name)
+                if tool is None:
+                    tool = entry.tools[tool_name] = self.factories[tool_name]()
+                yield tool
+        finally:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+    async def evict_idle(self) -> int:
+        """Close sessions idle for longer than `idle_timeout`."""
+        now = time.monotonic()
+        async with self._lock:
+            expired = [
+                key
+                for key, entry in self._sessions.items()
+                if not entry.active and now - entry.last_used > self.idle_timeout
+            ]
+            entries = [self._sessions.pop(key) for key in expired]
+        for entry in entries:
+            await self._close_session(entry)
+        if expired:
+            logger.info(f"Evicted {len(expired)} idle MCP session(s)")
+        return len(expired)
+
+    async def close(self) -> None:
+        """Close every session's tools."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        async with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            await self._close_session(entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "active_sessions": sum(1 for e in self._sessions.values() if e.active),
+            "tools": sum(len(e.tools) for e in self._sessions.values()),
+            "max_sessions": self.max_sessions,
+        }
+
+    async def _get_session(self, session: Any) -> _Session:
+        key = id(session)
+        stale: list[_Session] = []
+        async with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and not entry.owned_by(session):
+                # The id was reused by a new session after the old one was freed
+                stale.append(self._sessions.pop(key))
+                entry = None
+
+            if entry is None:
+                if len(self._sessions) >= self.max_sessions:
+                    victim = next(
+                        (k for k, e in self._sessions.items() if not e.active), None
+                    )
+                    if victim is None:
+                        raise ToolError(
+                            f"Too many concurrent MCP sessions (max {self.max_sessions})"
+                        )
+                    stale.append(self._sessions.pop(victim))
+                try:
+                    ref = weakref.ref(session)
+                except TypeError:
+                    ref = None
+                entry = self._sessions[key] = _Session(ref=ref)
+            self._sessions.move_to_end(key)
+
+        for old in stale:
+            await self._close_session(old)
+        return entry
+
+    async def _close_session(self, entry: _Session) -> None:
+        for tool in entry.tools.values():
+            await close_tool(tool)
+        entry.tools.clear()
+
+    def _start_sweeper(self) -> None:
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+
+        async def sweep():
+            while True:
+                await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+                try:
+                    await self.evict_idle()
+                except Exception as e:
+                    logger.error(f"Error evicting idle MCP sessions: {e}")
+
+        self._sweeper = asyncio.create_task(sweep())
@@ -6,8 +6,10 @@ and isolation for running untrusted code.
 """
 from app.sandbox.client import (
     BaseSandboxClient,
+    LeasedSandboxClient,
     LocalSandboxClient,
     create_sandbox_client,
+    get_sandbox_manager,
 )
 from app.sandbox.core.exceptions import (
     SandboxError,
@@ -23,7 +25,9 @@ __all__ = [
     "SandboxManager",
     "BaseSandboxClient",
     "LocalSandboxClient",
+    "LeasedSandboxClient",
     "create_sandbox_client",
+    "get_sandbox_manager",
     "SandboxError",
     "SandboxTimeoutError",
     "SandboxResourceError",
@@ -1,7 +1,10 @@
+import uuid
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from typing import Dict, Optional, Protocol
 
-from app.config import SandboxSettings
+from app.config import SandboxSettings, config
+from app.sandbox.core.manager import SandboxManager
 from app.sandbox.core.sandbox import DockerSandbox
 
 
@@ -189,6 +192,86 @@ class LocalSandboxClient(BaseSandboxClient):
             self.sandbox = None
 
 
+class LeasedSandboxClient(LocalSandboxClient):
+    """Sandbox client backed by a sandbox leased from a `SandboxManager`.
+
+    `create` acquires the session's sandbox, reusing the one from a previous run
+    while it is still alive, and `cleanup` returns the lease instead of
+    destroying the container. Each client uses its own session, so concurrent
+    agents never share a sandbox.
+    """
+
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        manager: Optional[SandboxManager] = None,
+    ):
+        """Initializes leased sandbox client.
+
+        Args:
+            session_id: Lease owner; a random one is used if not given.
+            manager: Sandbox manager; the shared manager is used if not given.
+        """
+        super().__init__()
+        self.session_id = session_id or f"session-{uuid.uuid4().hex[:12]}"
+        self._manager = manager
+
+    async def create(
+        self,
+        config: Optional[SandboxSettings] = None,
+        volume_bindings: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Acquires the session's sandbox, creating it if needed.
+
+        Args:
+            config: Sandbox configuration, used when a new sandbox is created.
+            volume_bindings: Volume mappings, used when a new sandbox is created.
+
+        Raises:
+            RuntimeError: If sandbox creation fails.
+        """
+        if self._manager is None:
+            self._manager = get_sandbox_manager()
+        sandbox_id = await self._manager.acquire_sandbox(
+            self.session_id, config, volume_bindings
+        )
+        self.sandbox = await self._manager.get_sandbox(sandbox_id)
+
+    async def cleanup(self) -> None:
+        """Returns the lease; the sandbox is destroyed once it goes idle."""
+        if self.sandbox and self._manager:
+            await self._manager.release_sandbox(self.session_id)
+        self.sandbox = None
+
+
+_SANDBOX_MANAGER: Optional[SandboxManager] = None
+
+# Client used by sandbox-backed tools in the current task, set by the running agent
+CURRENT_SANDBOX_CLIENT: ContextVar[Optional[BaseSandboxClient]] = ContextVar(
+    "current_sandbox_client", default=None
+)
+
+
+def get_sandbox_manager() -> SandboxManager:
+    """Returns the process-wide sandbox manager, creating it on first use.
+
+    Must be called from a running event loop, since the manager starts its
+    idle cleanup task on creation.
+    """
+    global _SANDBOX_MANAGER
+    if _SANDBOX_MANAGER is None:
+        _SANDBOX_MANAGER = SandboxManager(idle_timeout=config.sandbox.idle_timeout)
+    return _SANDBOX_MANAGER
+
+
+async def shutdown_sandbox_manager() -> None:
+    """Destroys every leased or idle sandbox of the shared manager."""
+    global _SANDBOX_MANAGER
+    if _SANDBOX_MANAGER is not None:
+        manager, _SANDBOX_MANAGER = _SANDBOX_MANAGER, None
+        await manager.cleanup()
+
+
 def create_sandbox_client() -> LocalSandboxClient:
     """Creates a sandbox client.
 
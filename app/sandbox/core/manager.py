@@ -24,6 +24,8 @@ class SandboxManager:
         cleanup_interval: Cleanup check interval in seconds.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
+        _sessions: Sandbox leased by each session, kept for reuse after release.
+        _leased: Sandboxes currently leased, never reclaimed as idle.
     """
 
     def __init__(
@@ -55,6 +57,11 @@ class SandboxManager:
         self._global_lock = asyncio.Lock()
         self._active_operations: Set[str] = set()
 
+        # Leases
+        self._sessions: Dict[str, str] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._leased: Set[str] = set()
+
         # Cleanup task
         self._cleanup_task: Optional[asyncio.Task] = None
         self._is_shutting_down = False
@@ -171,6 +178,55 @@ class SandboxManager:
         async with self.sandbox_operation(sandbox_id) as sandbox:
             return sandbox
 
+    async def acquire_sandbox(
+        self,
+        session_id: str,
+        config: Optional[SandboxSettings] = None,
+        volume_bindings: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Leases a sandbox to a session, reusing the session's previous one.
+
+        A released sandbox stays alive for `idle_timeout` seconds, so the next
+        run of the same session skips container creation. Sandboxes are never
+        shared between sessions.
+
+        Args:
+            session_id: Agent or session identifier owning the lease.
+            config: Sandbox configuration, used when a new sandbox is created.
+            volume_bindings: Volume mapping, used when a new sandbox is created.
+
+        Returns:
+            str: Sandbox ID.
+
+        Raises:
+            RuntimeError: If max sandbox count reached or creation fails.
+        """
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            sandbox_id = self._sessions.get(session_id)
+            if sandbox_id is None or sandbox_id not in self._sandboxes:
+                sandbox_id = await self.create_sandbox(config, volume_bindings)
+                self._sessions[session_id] = sandbox_id
+            else:
+                logger.info(f"Reusing sandbox {sandbox_id} for session {session_id}")
+
+            self._leased.add(sandbox_id)
+            self._last_used[sandbox_id] = asyncio.get_event_loop().time()
+            return sandbox_id
+
+    async def release_sandbox(self, session_id: str) -> None:
+        """Returns a session's lease; the sandbox is kept until it goes idle.
+
+        Args:
+            session_id: Agent or session identifier owning the lease.
+        """
+        sandbox_id = self._sessions.get(session_id)
+        if sandbox_id is None:
+            return
+        self._leased.discard(sandbox_id)
+        if sandbox_id in self._sandboxes:
+            self._last_used[sandbox_id] = asyncio.get_event_loop().time()
+
     def start_cleanup_task(self) -> None:
         """Starts automatic cleanup task."""
 
@@ -193,6 +249,7 @@ class SandboxManager:
             for sandbox_id, last_used in self._last_used.items():
                 if (
                     sandbox_id not in self._active_operations
+                    and sandbox_id not in self._leased
                     and current_time - last_used > self.idle_timeout
                 ):
                     to_cleanup.append(sandbox_id)
@@ -238,6 +295,9 @@ class SandboxManager:
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
+        self._sessions.clear()
+        self._session_locks.clear()
+        self._leased.clear()
 
         logger.info("Manager cleanup completed")
 
@@ -271,6 +331,12 @@ class SandboxManager:
                     self._sandboxes.pop(sandbox_id, None)
                     self._last_used.pop(sandbox_id, None)
                     self._locks.pop(sandbox_id, None)
+                    self._leased.discard(sandbox_id)
+                    self._sessions = {
+                        session: sid
+                        for session, sid in self._sessions.items()
+                        if sid != sandbox_id
+                    }
                     logger.info(f"Deleted sandbox {sandbox_id}")
         except Exception as e:
             logger.error(f"Error during cleanup of sandbox {sandbox_id}: {e}")
@@ -305,6 +371,7 @@ class SandboxManager:
         """
         return {
             "total_sandboxes": len(self._sandboxes),
+            "leased_sandboxes": len(self._leased),
             "active_operations": len(self._active_operations),
             "max_sandboxes": self.max_sandboxes,
             "idle_timeout": self.idle_timeout,
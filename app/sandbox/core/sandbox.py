@@ -13,6 +13,7 @@ from docker.models.containers import Container
 from app.config import SandboxSettings
 from app.sandbox.core.exceptions import SandboxTimeoutError
 from app.sandbox.core.terminal import AsyncDockerizedTerminal
+from app.tracing import tracer
 
 
 class DockerSandbox:
@@ -155,9 +156,12 @@ class DockerSandbox:
             raise RuntimeError("Sandbox not initialized")
 
         try:
-            return await self.terminal.run_command(
-                cmd, timeout=timeout or self.config.timeout
-            )
+            with tracer.span("sandbox.command", target="docker") as span:
+                output = await self.terminal.run_command(
+                    cmd, timeout=timeout or self.config.timeout
+                )
+                span.set(bytes=len(output))
+                return output
         except TimeoutError:
             raise SandboxTimeoutError(
                 f"Command execution timed out after {timeout or self.config.timeout} seconds"
@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Role(str, Enum):
@@ -61,6 +61,26 @@ class Message(BaseModel):
     tool_call_id: Optional[str] = Field(default=None)
     base64_image: Optional[str] = Field(default=None)
 
+    # Provider-formatted dicts keyed on whether the target model supports images
+    _formatted: Dict[bool, Optional[dict]] = PrivateAttr(default_factory=dict)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._formatted.clear()
+
+    # Copies start without the cache: `model_copy(update=...)` sets fields
+    # without `__setattr__`, so a shared cache would show the old values
+    def __copy__(self) -> "Message":
+        copied = super().__copy__()
+        copied._formatted = {}
+        return copied
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> "Message":
+        copied = super().__deepcopy__(memo)
+        copied._formatted = {}
+        return copied
+
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
         if isinstance(other, list):
@@ -96,6 +116,55 @@ class Message(BaseModel):
             message["base64_image"] = self.base64_image
         return message
 
+    def to_formatted_dict(self, supports_images: bool = False) -> Optional[dict]:
+        """Return the provider-formatted dict for this message.
+
+        The result is computed once per `supports_images` value and shared by
+        reference on later calls, so the image data URL is only built once.
+        Callers must not mutate the returned dict. Returns None for messages
+        that carry neither content nor tool calls.
+        """
+        if supports_images not in self._formatted:
+            self._formatted[supports_images] = self.format_dict(
+                self.to_dict(), supports_images
+            )
+        return self._formatted[supports_images]
+
+    @staticmethod
+    def format_dict(message: dict, supports_images: bool = False) -> Optional[dict]:
+        """Convert a message dict to OpenAI format, embedding or dropping images.
+
+        Returns None if the message has neither content nor tool calls.
+        """
+        message = dict(message)
+        base64_image = message.pop("base64_image", None)
+
+        if supports_images and base64_image:
+            # Initialize or convert content to appropriate format
+            content = message.get("content")
+            if not content:
+                content = []
+            elif isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            elif isinstance(content, list):
+                # Convert string items to proper text objects
+                content = [
+                    {"type": "text", "text": item} if isinstance(item, str) else item
+                    for item in content
+                ]
+
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
+                }
+            )
+            message["content"] = content
+
+        if "content" in message or "tool_calls" in message:
+            return message
+        return None
+
     @classmethod
     def user_message(
         cls, content: str, base64_image: Optional[str] = None
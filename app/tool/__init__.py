@@ -1,13 +1,30 @@
+from importlib import import_module
+
 from app.tool.base import BaseTool
 from app.tool.bash import Bash
-from app.tool.browser_use_tool import BrowserUseTool
-from app.tool.crawl4ai import Crawl4aiTool
 from app.tool.create_chat_completion import CreateChatCompletion
 from app.tool.planning import PlanningTool
 from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.terminate import Terminate
 from app.tool.tool_collection import ToolCollection
-from app.tool.web_search import WebSearch
+
+
+# Tools pulling in heavy third-party packages (browser_use/playwright, crawl4ai,
+# search engine clients) are only imported on first attribute access.
+_LAZY_TOOLS = {
+    "BrowserUseTool": "app.tool.browser_use_tool",
+    "Crawl4aiTool": "app.tool.crawl4ai",
+    "WebSearch": "app.tool.web_search",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_TOOLS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
@@ -0,0 +1,292 @@
+"""Run-scoped store for large tool outputs, and the tool that reads them back.
+
+An output above the agent's threshold is stored once as an artifact; the
+model sees a head/tail preview with the artifact id and pages through or
+greps the full text with `read_artifact` instead of re-running the command.
+Recent artifacts are kept in memory, older ones on disk, both bounded.
+"""
+
+import asyncio
+import hashlib
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.exceptions import ToolError
+from app.tool.base import BaseTool, ToolResult
+
+
+# Longest text `read_artifact` returns, below any spill threshold
+MAX_READ_CHARS = 6000
+MAX_LINE_CHARS = 500
+
+
+@dataclass
+class Artifact:
+    id: str
+    chars: int
+    lines: int
+    digest: str
+    path: Optional[Path] = None
+
+
+class ArtifactStore:
+    """Large tool outputs of one run, in memory up to a budget, then on disk.
+
+    The most recent artifacts stay in memory; older ones are moved to a
+    temporary directory, and the oldest on disk are dropped once the disk
+    budget is used. Identical outputs are stored once.
+    """
+
+    def __init__(
+        self,
+        max_memory_chars: int = 4_000_000,
+        max_disk_chars: int = 200_000_000,
+    ):
+        self.max_memory_chars = max_memory_chars
+        self.max_disk_chars = max_disk_chars
+        self._artifacts: Dict[str, Artifact] = {}
+        self._by_digest: Dict[str, str] = {}
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_chars = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_chars = 0
+        self._directory: Optional[Path] = None
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    async def put(self, text: str) -> Artifact:
+        """Store `text`, or return the artifact already holding it."""
+        digest = hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+        existing = self._by_digest.get(digest)
+        if existing is not None:
+            return self._artifacts[existing]
+
+        self._counter += 1
+        artifact = Artifact(
+            id=f"a{self._counter}",
+            chars=len(text),
+            lines=text.count("\n") + 1,
+            digest=digest,
+        )
+        self._artifacts[artifact.id] = artifact
+        self._by_digest[digest] = artifact.id
+        self._memory[artifact.id] = text
+        self._memory_chars += len(text)
+        await self._spill()
+        return artifact
+
+    async def _spill(self) -> None:
+        # Keep the newest artifact in memory even if it alone is over budget
+        while self._memory_chars > self.max_memory_chars and len(self._memory) > 1:
+            artifact_id, text = self._memory.popitem(last=False)
+            self._memory_chars -= len(text)
+            artifact = self._artifacts[artifact_id]
+            if self._directory is None:
+                self._directory = Path(tempfile.mkdtemp(prefix="openmanus-artifacts-"))
+            artifact.path = self._directory / f"{artifact_id}.txt"
+            await asyncio.to_thread(
+                artifact.path.write_text, text, "utf-8", "surrogatepass"
+            )
+            self._disk[artifact_id] = len(text)
+            self._disk_chars += len(text)
+        while self._disk_chars > self.max_disk_chars and self._disk:
+            artifact_id, chars = self._disk.popitem(last=False)
+            self._disk_chars -= chars
+            self._drop(artifact_id)
+
+    def _drop(self, artifact_id: str) -> None:
+        artifact = self._artifacts.pop(artifact_id)
+        self._by_digest.pop(artifact.digest, None)
+        if artifact.path is not None:
+            artifact.path.unlink(missing_ok=True)
+
+    async def get(self, artifact_id: str) -> str:
+        """Full text of an artifact.
+
+        Raises:
+            ToolError: If the id is unknown or the artifact was evicted.
+        """
+        if artifact_id in self._memory:
+            return self._memory[artifact_id]
+        artifact = self._artifacts.get(artifact_id)
+        if artifact is None or artifact.path is None:
+            raise ToolError(
+                f"Artifact {artifact_id} is not available; it expired or belongs "
+                "to an earlier run. Re-run the command to see its output."
+            )
+        return await asyncio.to_thread(
+            artifact.path.read_text, "utf-8", "surrogatepass"
+        )
+
+    def clear(self) -> None:
+        """Forget every artifact and delete the files on disk."""
+        self._artifacts.clear()
+        self._by_digest.clear()
+        self._memory.clear()
+        self._memory_chars = 0
+        self._disk.clear()
+        self._disk_chars = 0
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+
+# Store of the running agent, see `ToolCallAgent.run`
+CURRENT_ARTIFACT_STORE: ContextVar[Optional[ArtifactStore]] = ContextVar(
+    "current_artifact_store", default=None
+)
+
+
+def _clip_line(line: str) -> str:
+    if len(line) <= MAX_LINE_CHARS:
+        return line
+    return f"{line[:MAX_LINE_CHARS]}… [{len(line) - MAX_LINE_CHARS} more chars]"
+
+
+def preview(
+    text: str, artifact: Artifact, head_lines: int = 40, tail_lines: int = 20
+) -> str:
+    """Head and tail of a stored output, with how to read the rest."""
+    lines = text.split("\n")
+    notice = (
+        f"[Output of {artifact.chars:,} chars in {artifact.lines:,} lines stored as "
+        f"artifact {artifact.id}. Use `read_artifact` with artifact_id "
+        f'"{artifact.id}" to read more lines or grep it instead of re-running '
+        "the command.]"
+    )
+    if len(lines) <= head_lines + tail_lines:
+        head, omitted, tail = lines, 0, []
+    else:
+        head, tail = lines[:head_lines], lines[-tail_lines:]
+        omitted = len(lines) - head_lines - tail_lines
+    parts = [notice, *map(_clip_line, head)]
+    if omitted:
+        parts.append(f"... [{omitted:,} lines omitted] ...")
+    parts.extend(map(_clip_line, tail))
+    shown = "\n".join(parts)
+    if len(shown) > MAX_READ_CHARS:
+        shown = shown[:MAX_READ_CHARS] + "\n... [preview clipped] ..."
+    return shown
+
+
+_NOTICE = re.compile(
+    r"\[Output of ([\d,]+) chars in ([\d,]+) lines stored as artifact (\w+)\. "
+    r"Use `read_artifact`[^\]]*\]"
+)
+
+
+def expire_previews(text: str) -> str:
+    """Rewrite the notices of `preview` once their artifacts were cleared."""
+    return _NOTICE.sub(
+        r"[Output of \1 chars in \2 lines; artifact \3 expired with an earlier "
+        "run, only this preview is left. Re-run the command to see the rest.]",
+        text,
+    )
+
+
+_READ_ARTIFACT_DESCRIPTION = """Read a large tool output that was stored as an artifact.
+Outputs too large to show in full are replaced by a preview naming an artifact id.
+* `read` returns `max_lines` lines starting at line `start_line` (1-based)
+* `grep` returns the numbered lines matching the regular expression `pattern`
+"""
+
+
+class ReadArtifact(BaseTool):
+    """Pages through or greps the artifacts of the current run."""
+
+    name: str = "read_artifact"
+    description: str = _READ_ARTIFACT_DESCRIPTION
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "artifact_id": {
+                "description": "Artifact id from the preview, e.g. a1.",
+                "type": "string",
+            },
+            "command": {
+                "description": "`read` a range of lines or `grep` for a pattern.",
+                "enum": ["read", "grep"],
+                "type": "string",
+            },
+            "start_line": {
+                "description": "First line to read (1-based). Default 1.",
+                "type": "integer",
+            },
+            "max_lines": {
+                "description": "Lines to read, or matches to return. Default 200.",
+                "type": "integer",
+            },
+            "pattern": {
+                "description": "Regular expression, required for `grep`.",
+                "type": "string",
+            },
+        },
+        "required": ["artifact_id", "command"],
+    }
+
+    def memo_scope(self, **kwargs) -> Optional[str]:
+        return "artifacts"
+
+    def invalidated_scopes(self, **kwargs) -> Optional[List[str]]:
+        return []
+
+    async def execute(
+        self,
+        artifact_id: str,
+        command: str = "read",
+        start_line: int = 1,
+        max_lines: int = 200,
+        pattern: Optional[str] = None,
+        **kwargs,
+    ) -> ToolResult:
+        store = CURRENT_ARTIFACT_STORE.get()
+        if store is None:
+            raise ToolError("No artifacts are stored outside an agent run")
+        lines = (await store.get(artifact_id)).split("\n")
+        max_lines = max(1, max_lines)
+
+        if command == "read":
+            start = max(1, start_line)
+            selected = [
+                (number, lines[number - 1])
+                for number in range(start, min(len(lines), start + max_lines - 1) + 1)
+            ]
+            end = start + len(selected) - 1
+            header = f"Artifact {artifact_id}, lines {start}-{end} of {len(lines)}"
+        elif command == "grep":
+            if not pattern:
+                raise ToolError("Parameter `pattern` is required for command: grep")
+            try:
+                regex = re.compile(pattern)
+            except re.error as e:
+                raise ToolError(f"Invalid pattern {pattern!r}: {e}")
+            selected = [
+                (number, line)
+                for number, line in enumerate(lines, 1)
+                if regex.search(line)
+            ]
+            header = f"Artifact {artifact_id}, {len(selected)} lines match {pattern!r}"
+            if len(selected) > max_lines:
+                header += f", showing the first {max_lines}"
+                selected = selected[:max_lines]
+        else:
+            raise ToolError(f"Unrecognized command {command}; use `read` or `grep`")
+
+        body = []
+        size = len(header)
+        for number, line in selected:
+            entry = f"{number:6}\t{_clip_line(line)}"
+            size += len(entry) + 1
+            if size > MAX_READ_CHARS:
+                body.append(f"... [output limit reached at line {number}] ...")
+                break
+            body.append(entry)
+        return ToolResult(output="\n".join([header, *body]))
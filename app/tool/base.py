@@ -1,6 +1,6 @@
 import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -121,6 +121,28 @@ class BaseTool(ABC, BaseModel):
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    def memo_scope(self, **kwargs) -> Optional[str]:
+        """Scope of a read-only call whose result may be reused within a run.
+
+        Identical calls (same name and arguments) return the first result until
+        a call invalidates its scope, see `ToolResultCache`. Scopes starting
+        with ``web:`` depend only on the outside world.
+
+        Returns:
+            What the result depends on, e.g. ``file:<path>``, or None if the
+            call must always run (the default).
+        """
+        return None
+
+    def invalidated_scopes(self, **kwargs) -> Optional[List[str]]:
+        """Scopes whose cached results a non-cacheable call may change.
+
+        Returns:
+            The scopes to drop, or None (the default) if the effects of the
+            call are unknown and every cached local result must be dropped.
+        """
+        return None
+
     def to_param(self) -> Dict:
         """Convert tool to function call format.
 
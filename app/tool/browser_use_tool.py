@@ -1,7 +1,7 @@
 import asyncio
 import base64
 import json
-from typing import Generic, Optional, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from browser_use import Browser as BrowserUseBrowser
 from browser_use import BrowserConfig
@@ -187,6 +187,16 @@ class BrowserUseTool(BaseTool, Generic[Context]):
 
         return self.context
 
+    def memo_scope(self, action: str = "", **kwargs) -> Optional[str]:
+        """Reads of the current page are reused until the page changes."""
+        if action in ("extract_content", "get_dropdown_options"):
+            return "browser"
+        return None
+
+    def invalidated_scopes(self, **kwargs) -> Optional[List[str]]:
+        """Any other action may navigate or change the page."""
+        return ["browser"]
+
     async def execute(
         self,
         action: str,
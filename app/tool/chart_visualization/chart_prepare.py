@@ -23,7 +23,8 @@ class VisualizationPrepare(NormalPythonExecute):
 2. Csv Data and chart description generate
 2.1 Csv data (The data you want to visulazation, cleaning / transform from origin data, saved in .csv)
 2.2 Chart description of csv data (The chart title or description should be concise and clear. Examples: 'Product sales distribution', 'Monthly revenue trend'.)
-3. Save information in json file.( format: {"csvFilePath": string, "chartTitle": string}[])
+3. Save information in json file.( format: {"csvFilePath": string, "chartTitle": string, "columns"?: string[]}[])
+3.1 "columns" is optional: the csv columns to chart, so a wide csv need not be split into files. They are read in csv order and the first of them is the x axis; all columns are used if omitted.
 ## Insight Type
 1. Select the insights from the data_visualization results that you want to add to the chart.
 2. Save information in json file.( format: {"chartPath": string, "insights_id": number[]}[])
@@ -0,0 +1,306 @@
+"""Bounded data preparation for chart generation.
+
+CSV files are read in typed chunks and reduced to a point budget before they
+are sent to VMind:
+
+* series (numeric or date x axis): Largest-Triangle-Three-Buckets downsampling
+  per series, which keeps the visual shape of the line;
+* categories (text x axis): values are summed per category and only the top-k
+  categories are kept, the rest are folded into an "Other" row.
+
+Other text columns split the data into series only if they have few distinct
+values; text columns such as ids or free text are dropped. If the result still
+exceeds the budget, the series are merged into one.
+
+The result is sent as a compact columnar payload,
+``{"columns": [...], "values": [[column 0 values], [column 1 values], ...]}``.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MAX_POINTS: int = 2000
+DEFAULT_TOP_K: int = 20
+DEFAULT_CHUNKSIZE: int = 200_000
+
+OTHER_CATEGORY: str = "Other"
+
+# Internal sort key of the x axis in series mode
+_X_KEY = "__x_key__"
+
+
+@dataclass
+class ReducedData:
+    columns: List[str]
+    values: List[List[Any]]
+    total_rows: int
+    method: str  # "none", "lttb" or "top_k"
+
+    @property
+    def rows(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {"columns": self.columns, "values": self.values}
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    `x` must be sorted. The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])
+
+    x = x.astype(float)
+    y = np.nan_to_num(y.astype(float))
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def _read_chunks(
+    path: str, columns: Optional[Sequence[str]], chunksize: int
+) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(
+        path, usecols=list(columns) if columns else None, chunksize=chunksize
+    )
+
+
+def _x_kind(values: pd.Series) -> Optional[str]:
+    """Kind of a series x axis, "numeric" or "datetime"; None if categorical."""
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    sample = values.dropna().head(100)
+    if sample.empty:
+        return None
+    parsed = pd.to_datetime(sample, errors="coerce", format="mixed")
+    return "datetime" if parsed.notna().mean() >= 0.9 else None
+
+
+def _x_key(values: pd.Series, kind: str) -> pd.Series:
+    """Numeric sort key of an x column; unparsable values become NaN."""
+    if kind == "numeric":
+        return pd.to_numeric(values, errors="coerce").astype(float)
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    return parsed.astype("int64").astype(float).where(parsed.notna())
+
+
+def _group_columns(frame: pd.DataFrame, candidates: List[str], limit: int) -> List[str]:
+    """Columns to split by, keeping the number of value combinations within `limit`.
+
+    Columns are taken in order and skipped when they would exceed the limit,
+    so high-cardinality columns (ids, free text) are never used.
+    """
+    groups, combinations = [], 1
+    for column in candidates:
+        distinct = frame[column].nunique(dropna=False)
+        if combinations * distinct <= limit:
+            groups.append(column)
+            combinations *= distinct
+    return groups
+
+
+def _downsample(
+    frame: pd.DataFrame, measures: List[str], groups: List[str], budget: int
+) -> pd.DataFrame:
+    """LTTB per series, splitting `budget` across series and measures.
+
+    With more series than the budget allows (at least 3 points each), the
+    rows are downsampled as a single series instead.
+    """
+    if len(frame) <= budget:
+        return frame
+    grouped = frame.groupby(groups, sort=False, dropna=False) if groups else None
+    if grouped is not None and grouped.ngroups > max(1, budget // 3):
+        grouped = None
+    series = [part for _, part in grouped] if grouped else [frame]
+    per_series = max(3, budget // len(series))
+    per_measure = max(3, per_series // max(1, len(measures)))
+
+    kept = []
+    for part in series:
+        part = part.sort_values(_X_KEY, kind="stable")
+        if len(part) <= per_series:
+            kept.append(part)
+            continue
+        x = part[_X_KEY].to_numpy()
+        index = set()
+        for measure in measures or [_X_KEY]:
+            y = part[measure].to_numpy()
+            index.update(lttb_indices(x, y, per_measure).tolist())
+        kept.append(part.iloc[sorted(index)])
+    return pd.concat(kept)
+
+
+def _reduce_series(
+    chunks: Iterator[pd.DataFrame],
+    first: pd.DataFrame,
+    x: str,
+    kind: str,
+    max_points: int,
+) -> pd.DataFrame:
+    measures = [
+        c for c in first.columns if c != x and pd.api.types.is_numeric_dtype(first[c])
+    ]
+    groups = _group_columns(
+        first,
+        [c for c in first.columns if c != x and c not in measures],
+        max(1, max_points // 3),
+    )
+    kept_columns = [c for c in first.columns if c == x or c in measures + groups]
+
+    reduced: List[pd.DataFrame] = []
+    buffered = 0
+    for chunk in chunks:
+        chunk = chunk[kept_columns]
+        chunk = chunk.assign(**{_X_KEY: _x_key(chunk[x], kind)})
+        chunk = chunk.dropna(subset=[_X_KEY])
+        reduced.append(_downsample(chunk, measures, groups, max_points))
+        buffered += len(reduced[-1])
+        # Keep the buffer bounded by re-reducing what was kept so far
+        if buffered > 4 * max_points:
+            reduced = [_downsample(pd.concat(reduced), measures, groups, max_points)]
+            buffered = len(reduced[0])
+
+    frame = _downsample(pd.concat(reduced), measures, groups, max_points)
+    if len(frame) > max_points:
+        # Later chunks added more series than the budget holds
+        frame = _downsample(frame, measures, [], max_points)
+    return frame.sort_values(groups + [_X_KEY], kind="stable").drop(columns=_X_KEY)
+
+
+def _reduce_categories(
+    chunks: Iterator[pd.DataFrame],
+    first: pd.DataFrame,
+    x: str,
+    top_k: int,
+    max_points: int,
+) -> pd.DataFrame:
+    measures = [
+        c for c in first.columns if c != x and pd.api.types.is_numeric_dtype(first[c])
+    ]
+    # Each of the top-k categories and "Other" gets a row per dimension value
+    dims = _group_columns(
+        first,
+        [c for c in first.columns if c != x and c not in measures],
+        max(1, max_points // (top_k + 1)),
+    )
+    keys = [c for c in first.columns if c == x or c in dims]
+
+    partials = []
+    for chunk in chunks:
+        if measures:
+            partial = chunk.groupby(keys, dropna=False)[measures].sum()
+        else:
+            partial = chunk.groupby(keys, dropna=False).size().rename("count")
+        partials.append(partial)
+    totals = pd.concat(partials).groupby(level=keys, dropna=False).sum().reset_index()
+    measures = measures or ["count"]
+
+    frame = _top_k(totals, x, dims, measures, top_k)
+    if len(frame) > max_points and dims:
+        # Later chunks added more dimension values than the budget holds
+        totals = totals.groupby(x, dropna=False)[measures].sum().reset_index()
+        frame = _top_k(totals, x, [], measures, top_k)
+    return frame
+
+
+def _top_k(
+    totals: pd.DataFrame, x: str, dims: List[str], measures: List[str], top_k: int
+) -> pd.DataFrame:
+    """Rows of the `top_k` categories by the first measure, plus "Other"."""
+    ranking = totals.groupby(x, dropna=False)[measures[0]].sum()
+    if len(ranking) <= top_k:
+        return totals
+    top = ranking.nlargest(top_k).index
+    kept = totals[totals[x].isin(top)]
+    rest = totals[~totals[x].isin(top)]
+
+    if dims:
+        other = rest.groupby(dims, dropna=False)[measures].sum().reset_index()
+    else:
+        other = rest[measures].sum().to_frame().T
+    other[x] = OTHER_CATEGORY
+    return pd.concat([kept, other[totals.columns]], ignore_index=True)
+
+
+def _to_columns(frame: pd.DataFrame) -> List[List[Any]]:
+    frame = frame.astype(object).where(pd.notnull(frame), None)
+    return [frame[column].tolist() for column in frame.columns]
+
+
+def reduce_csv(
+    path: str,
+    max_points: int = DEFAULT_MAX_POINTS,
+    top_k: int = DEFAULT_TOP_K,
+    columns: Optional[Sequence[str]] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> ReducedData:
+    """Read a CSV in chunks and reduce it to at most about `max_points` rows.
+
+    The first column is the x axis. Files that already fit the budget are
+    passed through unchanged.
+
+    Args:
+        path: CSV file path.
+        max_points: Row budget of the reduced data.
+        top_k: Categories kept when the x axis is categorical.
+        columns: Columns to read, in file order; all columns if not given.
+        chunksize: Rows read at a time, which bounds memory use.
+    """
+    chunks = _read_chunks(path, columns, chunksize)
+    first = next(chunks, None)
+    if first is None or first.empty:
+        header = list(first.columns) if first is not None else []
+        return ReducedData(header, [[] for _ in header], 0, "none")
+
+    # Peek: small files are sent as they are
+    second = next(chunks, None)
+    if second is None and len(first) <= max_points:
+        return ReducedData(list(first.columns), _to_columns(first), len(first), "none")
+
+    total_rows = 0
+
+    def all_chunks() -> Iterator[pd.DataFrame]:
+        nonlocal total_rows
+        for chunk in (first, second):
+            if chunk is not None:
+                total_rows += len(chunk)
+                yield chunk
+        for chunk in chunks:
+            total_rows += len(chunk)
+            yield chunk
+
+    x = first.columns[0]
+    kind = _x_kind(first[x])
+    if kind is not None:
+        frame = _reduce_series(all_chunks(), first, x, kind, max_points)
+        method = "lttb"
+    else:
+        frame = _reduce_categories(all_chunks(), first, x, top_k, max_points)
+        method = "top_k"
+    return ReducedData(list(frame.columns), _to_columns(frame), total_rows, method)
@@ -1,15 +1,75 @@
 import asyncio
 import json
 import os
-from typing import Any, Hashable
+from pathlib import Path
+from typing import Any, List, Optional
 
-import pandas as pd
 from pydantic import Field, model_validator
 
 from app.config import config
 from app.llm import LLM
 from app.logger import logger
 from app.tool.base import BaseTool
+from app.tool.chart_visualization.data_reduction import reduce_csv
+from app.utils.node_worker import NodeWorkerPool
+
+
+CHART_DIR = Path(__file__).parent
+
+# Shared by every DataVisualization instance running on the same event loop
+_vmind_pool: Optional[NodeWorkerPool] = None
+_vmind_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def vmind_worker_command() -> List[str]:
+    """Command for a VMind worker, compiling the TypeScript sources if stale.
+
+    Falls back to ts-node when compilation is not possible, which still only
+    costs the TypeScript startup once per worker instead of once per chart.
+    """
+    compiled = CHART_DIR / "dist" / "worker.js"
+    sources = list((CHART_DIR / "src").glob("*.ts"))
+
+    def is_fresh() -> bool:
+        return compiled.exists() and all(
+            compiled.stat().st_mtime >= src.stat().st_mtime for src in sources
+        )
+
+    if not is_fresh():
+        process = await asyncio.create_subprocess_exec(
+            "npx",
+            "tsc",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=CHART_DIR,
+        )
+        output, _ = await process.communicate()
+        if process.returncode != 0 or not is_fresh():
+            logger.warning(
+                f"Compiling VMind worker failed, using ts-node: "
+                f"{output.decode('utf-8', errors='replace')[-500:]}"
+            )
+            return ["npx", "ts-node", "src/worker.ts"]
+    return ["node", str(compiled)]
+
+
+def get_vmind_pool() -> NodeWorkerPool:
+    """The VMind worker pool for the running event loop."""
+    global _vmind_pool, _vmind_pool_loop
+    loop = asyncio.get_running_loop()
+    if _vmind_pool is None or _vmind_pool_loop is not loop:
+        if _vmind_pool is not None:
+            # Pipes of the old pool belong to a loop that is gone
+            _vmind_pool.kill()
+        settings = config.run_flow_config
+        _vmind_pool = NodeWorkerPool(
+            vmind_worker_command,
+            cwd=str(CHART_DIR),
+            size=settings.vmind_workers,
+            max_concurrency=settings.vmind_max_concurrency,
+        )
+        _vmind_pool_loop = loop
+    return _vmind_pool
 
 
 class DataVisualization(BaseTool):
@@ -25,7 +85,7 @@ Outputs:
         "properties": {
             "json_path": {
                 "type": "string",
-                "description": """file path of json info with ".json" in the end""",
+                "description": """file path of json info with ".json" in the end; each item may list the csv "columns" to chart""",
             },
             "output_type": {
                 "description": "Rendering format (html=interactive)",
@@ -96,18 +156,32 @@ Outputs:
     ) -> str:
         data_list = []
         csv_file_path = self.get_file_path(json_info, "csvFilePath")
+        settings = config.run_flow_config
+        reduced_list = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    reduce_csv,
+                    csv_file_path[index],
+                    max_points=settings.chart_max_points,
+                    top_k=settings.chart_top_k,
+                    columns=item.get("columns"),
+                )
+                for index, item in enumerate(json_info)
+            )
+        )
         for index, item in enumerate(json_info):
-            df = pd.read_csv(csv_file_path[index], encoding="utf-8")
-            df = df.astype(object)
-            df = df.where(pd.notnull(df), None)
-            data_dict_list = df.to_json(orient="records", force_ascii=False)
-
+            reduced = reduced_list[index]
+            if reduced.method != "none":
+                logger.info(
+                    f"Reduced {csv_file_path[index]} from {reduced.total_rows} to "
+                    f"{reduced.rows} rows ({reduced.method})"
+                )
             data_list.append(
                 {
                     "file_name": os.path.basename(csv_file_path[index]).replace(
                         ".csv", ""
                     ),
-                    "dict_data": data_dict_list,
+                    "dict_data": reduced.to_payload(),
                     "chartTitle": item["chartTitle"],
                 }
             )
@@ -138,8 +212,9 @@ Outputs:
                     }
                 )
         if len(error_list) > 0:
+            errors = "\n".join(error_list)
             return {
-                "observation": f"# Error chart generated{'\n'.join(error_list)}\n{self.success_output_template(success_list)}",
+                "observation": f"# Error chart generated{errors}\n{self.success_output_template(success_list)}",
                 "success": False,
             }
         else:
@@ -186,8 +261,9 @@ Outputs:
             else ""
         )
         if len(error_list) > 0:
+            errors = "\n".join(error_list)
             return {
-                "observation": f"# Error in chart insights:{'\n'.join(error_list)}\n{success_template}",
+                "observation": f"# Error in chart insights:{errors}\n{success_template}",
                 "success": False,
             }
         else:
@@ -220,7 +296,7 @@ Outputs:
         output_type: str,
         task_type: str,
         insights_id: list[str] = None,
-        dict_data: list[dict[Hashable, Any]] = None,
+        dict_data: dict[str, Any] = None,
         chart_description: str = None,
         language: str = "en",
     ):
@@ -240,24 +316,9 @@ Outputs:
             "directory": str(config.workspace_root),
             "language": language,
         }
-        # build async sub process
-        process = await asyncio.create_subprocess_exec(
-            "npx",
-            "ts-node",
-            "src/chartVisualize.ts",
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=os.path.dirname(__file__),
-        )
-        input_json = json.dumps(vmind_params, ensure_ascii=False).encode("utf-8")
         try:
-            stdout, stderr = await process.communicate(input_json)
-            stdout_str = stdout.decode("utf-8")
-            stderr_str = stderr.decode("utf-8")
-            if process.returncode == 0:
-                return json.loads(stdout_str)
-            else:
-                return {"error": f"Node.js Error: {stderr_str}"}
+            return await get_vmind_pool().request(vmind_params)
+        except asyncio.TimeoutError:
+            return {"error": "Node.js Error: VMind worker timed out"}
         except Exception as e:
-            return {"error": f"Subprocess Error: {str(e)}"}
+            return {"error": f"Node.js Error: {str(e)}"}
@@ -21,24 +21,50 @@ enum AlgorithmType {
   Volatility = "volatility",
 }
 
+/** Headless browser shared by all png renders of this process */
+let browserPromise: ReturnType<typeof puppeteer.launch> | null = null;
+
+const getBrowser = () => {
+  if (!browserPromise) {
+    browserPromise = puppeteer.launch();
+    browserPromise
+      .then((browser) =>
+        browser.on("disconnected", () => (browserPromise = null))
+      )
+      .catch(() => (browserPromise = null));
+  }
+  return browserPromise;
+};
+
+export const closeBrowser = async () => {
+  if (browserPromise) {
+    const browser = await browserPromise;
+    browserPromise = null;
+    await browser.close();
+  }
+};
+
 const getBase64 = async (spec: any, width?: number, height?: number) => {
   spec.animation = false;
   width && (spec.width = width);
   height && (spec.height = height);
-  const browser = await puppeteer.launch();
+  const browser = await getBrowser();
   const page = await browser.newPage();
-  await page.setContent(getHtmlVChart(spec, width, height));
+  try {
+    await page.setContent(getHtmlVChart(spec, width, height));
 
-  const dataUrl = await page.evaluate(() => {
-    const canvas: any = document
-      .getElementById("chart-container")
-      ?.querySelector("canvas");
-    return canvas?.toDataURL("image/png");
-  });
+    const dataUrl = await page.evaluate(() => {
+      const canvas: any = document
+        .getElementById("chart-container")
+        ?.querySelector("canvas");
+      return canvas?.toDataURL("image/png");
+    });
 
-  const base64Data = dataUrl.replace(/^data:image\/png;base64,/, "");
-  await browser.close();
-  return Buffer.from(base64Data, "base64");
+    const base64Data = dataUrl.replace(/^data:image\/png;base64,/, "");
+    return Buffer.from(base64Data, "base64");
+  } finally {
+    await page.close();
+  }
 };
 
 const serializeSpec = (spec: any) => {
@@ -169,10 +195,26 @@ async function saveChartRes(options: {
   return savedPath;
 }
 
+/** Expand a `{columns, values}` payload from the Python side into records */
+const fromColumnar = (dataset: any): DataTable => {
+  if (!dataset || Array.isArray(dataset) || !Array.isArray(dataset.columns)) {
+    return dataset;
+  }
+  const { columns, values } = dataset as { columns: string[]; values: any[][] };
+  const rows = values.length ? values[0].length : 0;
+  const records = new Array(rows);
+  for (let i = 0; i < rows; i++) {
+    const record: Record<string, any> = {};
+    columns.forEach((column, j) => (record[column] = values[j][i]));
+    records[i] = record;
+  }
+  return records;
+};
+
 async function generateChart(
   vmind: VMind,
   options: {
-    dataset: string | DataTable;
+    dataset: string | DataTable | { columns: string[]; values: any[][] };
     userPrompt: string;
     directory: string;
     outputType: "png" | "html";
@@ -200,7 +242,8 @@ async function generateChart(
   } = options;
   try {
     // Get chart spec and save in local file
-    const jsonDataset = isString(dataset) ? JSON.parse(dataset) : dataset;
+    const parsedDataset = isString(dataset) ? JSON.parse(dataset) : dataset;
+    const jsonDataset = fromColumnar(parsedDataset);
     const { spec, error, chartType } = await vmind.generateChart(
       userPrompt,
       undefined,
@@ -219,9 +262,7 @@ async function generateChart(
     spec.title = {
       text: userPrompt,
     };
-    if (!fs.existsSync(path.join(directory, "visualization"))) {
-      fs.mkdirSync(path.join(directory, "visualization"));
-    }
+    fs.mkdirSync(path.join(directory, "visualization"), { recursive: true });
     const specPath = getSavedPathName(directory, fileName, "json");
     res.chart_path = await saveChartRes({
       directory,
@@ -321,9 +362,29 @@ async function updateChartWithInsight(
   }
 }
 
-async function executeVMind() {
-  const input = await readStdin();
-  const inputData = JSON.parse(input);
+/** VMind clients reused across tasks with the same llm config */
+const vmindCache = new Map<string, VMind>();
+
+const getVMind = (llmConfig: any) => {
+  const { base_url: baseUrl, model, api_key: apiKey } = llmConfig;
+  const key = JSON.stringify([baseUrl, model, apiKey]);
+  let vmind = vmindCache.get(key);
+  if (!vmind) {
+    vmind = new VMind({
+      url: `${baseUrl}/chat/completions`,
+      model,
+      headers: {
+        "api-key": apiKey,
+        Authorization: `Bearer ${apiKey}`,
+      },
+    });
+    vmindCache.set(key, vmind);
+  }
+  return vmind;
+};
+
+/** Run one visualization or insight task, as sent by the Python tool */
+export async function executeVMindTask(inputData: any) {
   let res;
   const {
     llm_config,
@@ -338,15 +399,7 @@ async function executeVMind() {
     insights_id: insightsId = [],
     language = "en",
   } = inputData;
-  const { base_url: baseUrl, model, api_key: apiKey } = llm_config;
-  const vmind = new VMind({
-    url: `${baseUrl}/chat/completions`,
-    model,
-    headers: {
-      "api-key": apiKey,
-      Authorization: `Bearer ${apiKey}`,
-    },
-  });
+  const vmind = getVMind(llm_config);
   if (taskType === "visualization") {
     res = await generateChart(vmind, {
       dataset,
@@ -366,7 +419,16 @@ async function executeVMind() {
       insightsId,
     });
   }
+  return res;
+}
+
+async function executeVMind() {
+  const input = await readStdin();
+  const res = await executeVMindTask(JSON.parse(input));
+  await closeBrowser();
   console.log(JSON.stringify(res));
 }
 
-executeVMind();
+if (require.main === module) {
+  executeVMind();
+}
@@ -0,0 +1,49 @@
+/**
+ * Long-lived VMind worker.
+ *
+ * Reads one JSON request per line from stdin, `{"id": number, "params": {...}}`,
+ * runs requests concurrently and writes one JSON response per line to stdout,
+ * `{"id": number, "result": {...}}` or `{"id": number, "error": string}`.
+ * The worker exits when stdin is closed.
+ */
+import readline from "readline";
+import { closeBrowser, executeVMindTask } from "./chartVisualize";
+
+// stdout carries the protocol only; route library logging to stderr
+console.log = console.error;
+console.info = console.error;
+console.warn = console.error;
+
+const send = (message: object) => {
+  process.stdout.write(JSON.stringify(message) + "\n");
+};
+
+const pending = new Set<Promise<void>>();
+
+const handle = async (line: string) => {
+  let id: number | undefined;
+  try {
+    const request = JSON.parse(line);
+    id = request.id;
+    const result = await executeVMindTask(request.params);
+    send({ id, result: result || {} });
+  } catch (error: any) {
+    send({ id, error: error?.toString() || "Unknown error" });
+  }
+};
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+
+rl.on("line", (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  const task = handle(line).finally(() => pending.delete(task));
+  pending.add(task);
+});
+
+rl.on("close", async () => {
+  await Promise.allSettled(pending);
+  await closeBrowser();
+  process.exit(0);
+});
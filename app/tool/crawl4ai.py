@@ -6,7 +6,7 @@ providing fast, precise, and AI-ready data extraction with clean Markdown genera
 """
 
 import asyncio
-from typing import List, Union
+from typing import List, Optional, Union
 from urllib.parse import urlparse
 
 from app.logger import logger
@@ -62,6 +62,10 @@ class Crawl4aiTool(BaseTool):
         "required": ["urls"],
     }
 
+    def memo_scope(self, bypass_cache: bool = False, **kwargs) -> Optional[str]:
+        """Pages are crawled once per run unless the cache is bypassed."""
+        return None if bypass_cache else "web:crawl"
+
     async def execute(
         self,
         urls: Union[str, List[str]],
@@ -0,0 +1,215 @@
+"""Bounded, diff-based undo history for file editing tools."""
+
+import hashlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.exceptions import ToolError
+
+
+# Default memory budget for all recorded edits of one history instance
+DEFAULT_HISTORY_MAX_BYTES: int = 32 * 1024 * 1024
+
+# Chunk size used when scanning for the common prefix/suffix of two texts
+_SCAN_CHUNK: int = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ReverseDiff:
+    """A single-hunk patch that turns the edited text back into the original.
+
+    The edited text is `prefix + <changed> + suffix`; undoing replaces the
+    `end - start` characters at `start` with `original`.
+    """
+
+    start: int
+    end: int
+    original: str
+    digest: str
+
+    @property
+    def size(self) -> int:
+        """Approximate memory footprint of the stored patch in bytes."""
+        return len(self.original) + len(self.digest) + 64
+
+    def apply(self, text: str) -> str:
+        """Restore the original text from the edited one."""
+        return text[: self.start] + self.original + text[self.end :]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the common prefix, comparing whole chunks before single chars."""
+    limit = min(len(a), len(b))
+    pos = 0
+    while pos < limit:
+        end = min(pos + _SCAN_CHUNK, limit)
+        if a[pos:end] != b[pos:end]:
+            break
+        pos = end
+    else:
+        return limit
+
+    # Binary search for the first mismatch inside the differing chunk
+    lo, hi = pos, min(pos + _SCAN_CHUNK, limit)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[lo : mid + 1] == b[lo : mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _common_suffix_len(a: str, b: str, prefix: int) -> int:
+    """Length of the common suffix that does not overlap `prefix`."""
+    limit = min(len(a), len(b)) - prefix
+    pos = 0
+    while pos < limit:
+        end = min(pos + _SCAN_CHUNK, limit)
+        if a[len(a) - end : len(a) - pos] != b[len(b) - end : len(b) - pos]:
+            break
+        pos = end
+    else:
+        return limit
+
+    lo, hi = pos, min(pos + _SCAN_CHUNK, limit)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[len(a) - mid - 1 : len(a) - lo] == b[len(b) - mid - 1 : len(b) - lo]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def make_reverse_diff(original: str, edited: str) -> ReverseDiff:
+    """Build the patch that restores `original` from `edited`."""
+    prefix = _common_prefix_len(original, edited)
+    suffix = _common_suffix_len(original, edited, prefix)
+    return ReverseDiff(
+        start=prefix,
+        end=len(edited) - suffix,
+        original=original[prefix : len(original) - suffix],
+        digest=_digest(edited),
+    )
+
+
+class EditHistory:
+    """Per-instance undo history that stores reverse diffs under a byte budget.
+
+    Each recorded edit keeps only the changed region of the original text plus
+    a digest of the edited text. When the total size exceeds `max_bytes` the
+    oldest edits, across all paths, are dropped first.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_HISTORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._edits: Dict[str, Deque[Tuple[int, ReverseDiff]]] = {}
+        # Insertion-ordered index of (sequence, path) used for eviction
+        self._order: "OrderedDict[int, str]" = OrderedDict()
+        self._seq = 0
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def has_history(self, path: str) -> bool:
+        """Whether an undoable edit is recorded for `path`."""
+        return bool(self._edits.get(str(path)))
+
+    def record(self, path: str, original: str, edited: str) -> None:
+        """Record an edit of `path` from `original` to `edited`."""
+        path = str(path)
+        diff = make_reverse_diff(original, edited)
+        if diff.size > self.max_bytes:
+            # A single edit larger than the whole budget cannot be kept
+            self.clear(path)
+            return
+
+        self._seq += 1
+        self._edits.setdefault(path, deque()).append((self._seq, diff))
+        self._order[self._seq] = path
+        self.total_bytes += diff.size
+        self._evict()
+
+    def undo(self, path: str, current: str) -> str:
+        """Pop the latest edit of `path` and return the restored text.
+
+        Raises:
+            ToolError: If there is no history or the file changed since the edit.
+        """
+        path = str(path)
+        edits = self._edits.get(path)
+        if not edits:
+            raise ToolError(f"No edit history found for {path}.")
+
+        seq, diff = edits[-1]
+        if _digest(current) != diff.digest:
+            raise ToolError(
+                f"Cannot undo the last edit to {path}: the file was modified outside "
+                f"of this editor since then."
+            )
+
+        edits.pop()
+        self._forget(seq, path, diff)
+        return diff.apply(current)
+
+    def clear(self, path: Optional[str] = None) -> None:
+        """Drop the history of `path`, or of every path if none is given."""
+        if path is None:
+            self._edits.clear()
+            self._order.clear()
+            self.total_bytes = 0
+            return
+
+        for seq, diff in self._edits.pop(str(path), ()):
+            self._order.pop(seq, None)
+            self.total_bytes -= diff.size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form of the recorded edits, oldest first."""
+        return {
+            "edits": [
+                [path, diff.start, diff.end, diff.original, diff.digest]
+                for path, diff in self._ordered()
+            ]
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Any], max_bytes: int = DEFAULT_HISTORY_MAX_BYTES
+    ) -> "EditHistory":
+        """Rebuild a history from `to_dict` output."""
+        history = cls(max_bytes=max_bytes)
+        for path, start, end, original, digest in data.get("edits", []):
+            diff = ReverseDiff(start=start, end=end, original=original, digest=digest)
+            history._seq += 1
+            history._edits.setdefault(path, deque()).append((history._seq, diff))
+            history._order[history._seq] = path
+            history.total_bytes += diff.size
+        history._evict()
+        return history
+
+    def _ordered(self) -> List[Tuple[str, ReverseDiff]]:
+        diffs = {seq: diff for edits in self._edits.values() for seq, diff in edits}
+        return [(path, diffs[seq]) for seq, path in self._order.items()]
+
+    def _forget(self, seq: int, path: str, diff: ReverseDiff) -> None:
+        self._order.pop(seq, None)
+        self.total_bytes -= diff.size
+        if not self._edits.get(path):
+            self._edits.pop(path, None)
+
+    def _evict(self) -> None:
+        """Drop the oldest edits until the history fits its budget."""
+        while self.total_bytes > self.max_bytes and self._order:
+            seq, path = self._order.popitem(last=False)
+            seq, diff = self._edits[path].popleft()
+            self.total_bytes -= diff.size
+            if not self._edits[path]:
+                del self._edits[path]
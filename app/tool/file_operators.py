@@ -1,16 +1,55 @@
 """File operation interfaces and implementations for local and sandbox environments."""
 
 import asyncio
+import base64
+import codecs
+import mmap
+import os
+import shlex
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Protocol, Tuple, Union, runtime_checkable
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
 
 from app.config import SandboxSettings
 from app.exceptions import ToolError
-from app.sandbox.client import SANDBOX_CLIENT
+from app.sandbox.client import CURRENT_SANDBOX_CLIENT, SANDBOX_CLIENT, BaseSandboxClient
 
 
 PathLike = Union[str, Path]
 
+# Bytes covered by one line-index checkpoint, and number of indexed files kept
+LINE_INDEX_CHUNK: int = 256 * 1024
+LINE_INDEX_CACHE_SIZE: int = 32
+
+# Bytes sampled to detect a file's encoding, and number of detections kept
+ENCODING_SAMPLE_SIZE: int = 64 * 1024
+ENCODING_CACHE_SIZE: int = 256
+
+# Seconds sandbox path metadata is reused for, unless written through the operator
+STAT_CACHE_TTL: float = 1.0
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """Metadata of a path; `size` and `mtime` are 0 if it does not exist."""
+
+    exists: bool
+    is_dir: bool = False
+    size: int = 0
+    mtime: float = 0.0
+
 
 @runtime_checkable
 class FileOperator(Protocol):
@@ -24,6 +63,17 @@ class FileOperator(Protocol):
         """Write content to a file."""
         ...
 
+    async def read_line_range(
+        self, path: PathLike, start_line: int, end_line: int
+    ) -> Tuple[str, int]:
+        """Read lines `start_line`..`end_line` (1-based, inclusive, -1 for EOF).
+
+        Returns the lines joined by newlines, matching a slice of
+        `content.split("\n")`, and the total number of lines in the file. An
+        empty string is returned if the range lies outside the file.
+        """
+        ...
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
         ...
@@ -32,6 +82,14 @@ class FileOperator(Protocol):
         """Check if path exists."""
         ...
 
+    async def stat_many(self, paths: Sequence[PathLike]) -> Dict[str, FileStat]:
+        """Metadata of several paths, keyed by `str(path)`."""
+        ...
+
+    async def stat(self, path: PathLike) -> FileStat:
+        """Metadata of a single path."""
+        ...
+
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
@@ -39,6 +97,51 @@ class FileOperator(Protocol):
         ...
 
 
+@dataclass
+class LineIndex:
+    """Newline counts at fixed byte checkpoints of a file.
+
+    `checkpoints[i]` is the number of newlines before byte `i * chunk_size`,
+    so locating a line only scans a single chunk.
+    """
+
+    mtime_ns: int
+    size: int
+    checkpoints: List[int]
+    newlines: int
+    chunk_size: int = LINE_INDEX_CHUNK
+
+    @property
+    def total_lines(self) -> int:
+        return self.newlines + 1
+
+    @classmethod
+    def build(cls, path: Path, chunk_size: int = LINE_INDEX_CHUNK) -> "LineIndex":
+        stat = path.stat()
+        checkpoints = []
+        newlines = 0
+        with path.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                checkpoints.append(newlines)
+                newlines += chunk.count(b"\n")
+        return cls(stat.st_mtime_ns, stat.st_size, checkpoints, newlines, chunk_size)
+
+    def is_fresh(self, stat: os.stat_result) -> bool:
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def newline_offset(self, data: mmap.mmap, n: int) -> int:
+        """Byte offset of the `n`-th (1-based) newline in the file."""
+        chunk = bisect_right(self.checkpoints, n - 1) - 1
+        pos = chunk * self.chunk_size
+        remaining = n - self.checkpoints[chunk]
+        while True:
+            pos = data.find(b"\n", pos)
+            remaining -= 1
+            if remaining == 0:
+                return pos
+            pos += 1
+
+
 class LocalFileOperator(FileOperator):
     """File operations implementation for local filesystem."""
 
@@ -46,42 +149,181 @@ class LocalFileOperator(FileOperator):
     # Common encodings to try when UTF-8 fails
     FALLBACK_ENCODINGS = ["utf-8", "gbk", "gb2312", "latin-1", "cp1252", "iso-8859-1"]
 
-    async def read_file(self, path: PathLike) -> str:
-        """Read content from a local file, trying multiple encodings."""
-        path_obj = Path(path)
+    def __init__(self):
+        self._line_indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+        # path -> (mtime_ns, size, encoding) as of the last read or write
+        self._encodings: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
 
-        # Try primary encoding first
+    @property
+    def _candidate_encodings(self) -> List[str]:
+        return list(dict.fromkeys([self.encoding, *self.FALLBACK_ENCODINGS]))
+
+    def _decode_any(self, data: bytes) -> Tuple[str, str]:
+        """Decode bytes with the first candidate encoding that fits them."""
+        for encoding in self._candidate_encodings:
+            try:
+                return data.decode(encoding), encoding
+            except (UnicodeDecodeError, LookupError):
+                continue
+        # Fallback: replace invalid characters
+        return data.decode("utf-8", errors="replace"), "utf-8"
+
+    def _decode(self, data: bytes) -> str:
+        """Decode bytes with the primary encoding, then the fallbacks."""
+        return self._decode_any(data)[0]
+
+    def _detect_encoding(self, sample: bytes, complete: bool) -> Optional[str]:
+        """First candidate encoding that decodes `sample`.
+
+        Unless the sample is the `complete` file, a multi-byte sequence cut
+        off at its end is accepted.
+        """
+        for encoding in self._candidate_encodings:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=complete)
+                return encoding
+            except (UnicodeDecodeError, LookupError):
+                continue
+        return None
+
+    def _remember_encoding(
+        self, key: str, mtime_ns: int, size: int, encoding: str
+    ) -> None:
+        # Only single dict operations, as reads run in concurrent threads
+        self._encodings.pop(key, None)
+        self._encodings[key] = (mtime_ns, size, encoding)
+        while len(self._encodings) > ENCODING_CACHE_SIZE:
+            try:
+                self._encodings.popitem(last=False)
+            except KeyError:
+                break
+
+    def _encoding_of(
+        self, key: str, mtime_ns: int, size: int, sample: bytes
+    ) -> Optional[str]:
+        """Cached encoding of an unchanged file, else one detected from `sample`."""
+        cached = self._encodings.get(key)
+        if cached is not None and cached[:2] == (mtime_ns, size):
+            return cached[2]
+        encoding = self._detect_encoding(sample, complete=len(sample) >= size)
+        if encoding is not None:
+            self._remember_encoding(key, mtime_ns, size, encoding)
+        return encoding
+
+    def _read_file(self, path: Path) -> str:
+        with path.open("rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        key = str(path)
+        sample = data[:ENCODING_SAMPLE_SIZE]
+        encoding = self._encoding_of(key, stat.st_mtime_ns, len(data), sample)
+        text = None
+        if encoding is not None:
+            try:
+                text = data.decode(encoding)
+            except UnicodeDecodeError:
+                pass
+        if text is None:
+            # The sample was misleading; try the fallbacks on the whole file
+            text, encoding = self._decode_any(data)
+            self._remember_encoding(key, stat.st_mtime_ns, len(data), encoding)
+        # Universal newlines, as in text mode
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def _write_file(self, path: Path, content: str) -> None:
+        key = str(path)
+        # Keep the encoding the file was read with, if it can hold the content
+        cached = self._encodings.get(key)
+        encoding = cached[2] if cached is not None else self.encoding
+        if os.linesep != "\n":
+            content = content.replace("\n", os.linesep)
         try:
-            return path_obj.read_text(encoding=self.encoding)
-        except UnicodeDecodeError:
-            # Try fallback encodings
-            for encoding in self.FALLBACK_ENCODINGS:
-                if encoding == self.encoding:
-                    continue  # Already tried
-                try:
-                    return path_obj.read_text(encoding=encoding)
-                except (UnicodeDecodeError, LookupError):
-                    continue
-
-            # If all encodings fail, read as binary and decode with errors='replace'
+            data = content.encode(encoding)
+        except UnicodeEncodeError:
+            encoding = self.encoding
+            data = content.encode(encoding)
+        path.write_bytes(data)
+        self._remember_encoding(key, path.stat().st_mtime_ns, len(data), encoding)
+
+    def _get_line_index(self, path: Path) -> LineIndex:
+        """Return the cached line index of `path`, rebuilding it if stale."""
+        key = str(path)
+        index = self._line_indexes.get(key)
+        if index is None or not index.is_fresh(path.stat()):
+            index = LineIndex.build(path)
+            self._line_indexes[key] = index
+        self._line_indexes.move_to_end(key)
+        while len(self._line_indexes) > LINE_INDEX_CACHE_SIZE:
+            self._line_indexes.popitem(last=False)
+        return index
+
+    def _read_line_range(
+        self, path: Path, start_line: int, end_line: int
+    ) -> Tuple[str, int]:
+        index = self._get_line_index(path)
+        total = index.total_lines
+        if end_line == -1 or end_line > total:
+            end_line = total
+        if start_line < 1 or start_line > end_line or index.size == 0:
+            return "", total
+
+        with path.open("rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            start = (
+                0 if start_line == 1 else index.newline_offset(data, start_line - 1) + 1
+            )
+            end = (
+                index.size
+                if end_line == total
+                else index.newline_offset(data, end_line)
+            )
+            encoding = self._encoding_of(
+                str(path),
+                index.mtime_ns,
+                index.size,
+                data[:ENCODING_SAMPLE_SIZE],
+            )
+            chunk = data[start:end]
             try:
-                content = path_obj.read_bytes()
-                return content.decode("utf-8", errors="replace")
-            except Exception as e:
-                raise ToolError(
-                    f"Failed to read {path}: Unable to decode file with any encoding. "
-                    f"Last error: {str(e)}"
-                ) from None
+                content = chunk.decode(encoding or self.encoding)
+            except UnicodeDecodeError:
+                content = self._decode(chunk)
+        if end < index.size and content.endswith("\r"):
+            # The range stops at a newline: this is the first half of a CRLF
+            content = content[:-1]
+        # Universal newlines, as in `_read_file`
+        return content.replace("\r\n", "\n").replace("\r", "\n"), total
+
+    async def read_file(self, path: PathLike) -> str:
+        """Read content from a local file in a worker thread.
+
+        The encoding is detected from the first bytes of the file and cached
+        until the file changes.
+        """
+        try:
+            return await asyncio.to_thread(self._read_file, Path(path))
         except Exception as e:
             raise ToolError(f"Failed to read {path}: {str(e)}") from None
 
     async def write_file(self, path: PathLike, content: str) -> None:
-        """Write content to a local file."""
+        """Write content to a local file in a worker thread."""
         try:
-            Path(path).write_text(content, encoding=self.encoding)
+            await asyncio.to_thread(self._write_file, Path(path), content)
         except Exception as e:
             raise ToolError(f"Failed to write to {path}: {str(e)}") from None
 
+    async def read_line_range(
+        self, path: PathLike, start_line: int, end_line: int
+    ) -> Tuple[str, int]:
+        """Read a line range through a cached, mmap-backed line index."""
+        try:
+            return await asyncio.to_thread(
+                self._read_line_range, Path(path), start_line, end_line
+            )
+        except Exception as e:
+            raise ToolError(f"Failed to read {path}: {str(e)}") from None
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
         return Path(path).is_dir()
@@ -90,6 +332,28 @@ class LocalFileOperator(FileOperator):
         """Check if path exists."""
         return Path(path).exists()
 
+    @staticmethod
+    def _stat(path: str) -> FileStat:
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return FileStat(exists=False)
+        return FileStat(
+            exists=True,
+            is_dir=os.path.isdir(path),
+            size=st.st_size,
+            mtime=st.st_mtime,
+        )
+
+    async def stat_many(self, paths: Sequence[PathLike]) -> Dict[str, FileStat]:
+        """Stat local paths in a worker thread."""
+        keys = [str(path) for path in paths]
+        return await asyncio.to_thread(lambda: {key: self._stat(key) for key in keys})
+
+    async def stat(self, path: PathLike) -> FileStat:
+        """Metadata of a local path."""
+        return (await self.stat_many([path]))[str(path)]
+
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
@@ -103,21 +367,10 @@ class LocalFileOperator(FileOperator):
                 process.communicate(), timeout=timeout
             )
             # Try multiple encodings for stdout/stderr
-            def safe_decode(data: bytes) -> str:
-                if not data:
-                    return ""
-                for encoding in self.FALLBACK_ENCODINGS:
-                    try:
-                        return data.decode(encoding)
-                    except (UnicodeDecodeError, LookupError):
-                        continue
-                # Fallback: replace invalid characters
-                return data.decode("utf-8", errors="replace")
-
             return (
                 process.returncode or 0,
-                safe_decode(stdout),
-                safe_decode(stderr),
+                self._decode(stdout),
+                self._decode(stderr),
             )
         except asyncio.TimeoutError as exc:
             try:
@@ -132,8 +385,17 @@ class LocalFileOperator(FileOperator):
 class SandboxFileOperator(FileOperator):
     """File operations implementation for sandbox environment."""
 
-    def __init__(self):
-        self.sandbox_client = SANDBOX_CLIENT
+    def __init__(self, sandbox_client: Optional[BaseSandboxClient] = None):
+        self._sandbox_client = sandbox_client
+        # path -> ("<mtime> <size>", line count) from the last ranged read
+        self._line_counts: Dict[str, Tuple[str, int]] = {}
+        # path -> (monotonic time of the query, metadata)
+        self._stats: Dict[str, Tuple[float, FileStat]] = {}
+
+    @property
+    def sandbox_client(self) -> BaseSandboxClient:
+        """The injected client, else the running agent's lease, else the global one."""
+        return self._sandbox_client or CURRENT_SANDBOX_CLIENT.get() or SANDBOX_CLIENT
 
     async def _ensure_sandbox_initialized(self):
         """Ensure sandbox is initialized."""
@@ -151,32 +413,148 @@ class SandboxFileOperator(FileOperator):
     async def write_file(self, path: PathLike, content: str) -> None:
         """Write content to a file in sandbox."""
         await self._ensure_sandbox_initialized()
+        self._stats.pop(str(path), None)
         try:
             await self.sandbox_client.write_file(str(path), content)
         except Exception as e:
             raise ToolError(f"Failed to write to {path} in sandbox: {str(e)}") from None
 
-    async def is_directory(self, path: PathLike) -> bool:
-        """Check if path points to a directory in sandbox."""
+    async def read_line_range(
+        self, path: PathLike, start_line: int, end_line: int
+    ) -> Tuple[str, int]:
+        """Read a line range in sandbox with `head`/`tail`, in a single exec call.
+
+        The line count is cached per path and only recounted with `wc -l`
+        when the file's mtime or size changed. Content is base64 encoded so
+        blank lines survive the terminal's output cleanup.
+        """
         await self._ensure_sandbox_initialized()
-        result = await self.sandbox_client.run_command(
-            f"test -d {path} && echo 'true' || echo 'false'"
+        key = str(path)
+        quoted = shlex.quote(key)
+        cached_sig, cached_count = self._line_counts.get(key, ("", 0))
+
+        if start_line < 1 or (end_line != -1 and end_line < start_line):
+            read_cmd = "true"
+        elif end_line == -1:
+            read_cmd = f"tail -n +{start_line} {quoted} | base64 -w0"
+        else:
+            read_cmd = (
+                f"head -n {end_line} {quoted} | tail -n +{start_line} | base64 -w0"
+            )
+
+        cmd = (
+            f"s=$(stat -c '%y %s' {quoted}) && echo \"stat:$s\" && "
+            f'{{ [ "$s" = {shlex.quote(cached_sig)} ] && echo count:cached '
+            f'|| echo "count:$(wc -l < {quoted})"; }} && '
+            f"printf 'data:' && {read_cmd}; echo"
         )
-        return result.strip() == "true"
+        try:
+            output = await self.sandbox_client.run_command(cmd)
+        except Exception as e:
+            raise ToolError(f"Failed to read {path} in sandbox: {str(e)}") from None
+
+        fields = dict(
+            line.strip().split(":", 1)
+            for line in output.splitlines()
+            if line.strip().startswith(("stat:", "count:", "data:"))
+        )
+        if "stat" not in fields or "count" not in fields:
+            raise ToolError(f"Failed to read {path} in sandbox: {output}")
+
+        if fields["count"] == "cached":
+            total = cached_count
+        else:
+            total = int(fields["count"]) + 1
+            self._line_counts[key] = (fields["stat"], total)
+
+        content = base64.b64decode(fields.get("data", "")).decode(
+            "utf-8", errors="replace"
+        )
+        # Every line but a final unterminated one is followed by a newline
+        if end_line != -1 and end_line < total and content.endswith("\n"):
+            content = content[:-1]
+        return content, total
+
+    async def stat_many(self, paths: Sequence[PathLike]) -> Dict[str, FileStat]:
+        """Stat paths in sandbox with a single exec call.
+
+        Results are reused for `STAT_CACHE_TTL` seconds; writes through this
+        operator drop the entry of the written path.
+        """
+        now = time.monotonic()
+        if len(self._stats) > 256:
+            self._stats = {
+                key: entry
+                for key, entry in self._stats.items()
+                if now - entry[0] < STAT_CACHE_TTL
+            }
+        keys = list(dict.fromkeys(str(path) for path in paths))
+        result: Dict[str, FileStat] = {}
+        missing = []
+        for key in keys:
+            cached = self._stats.get(key)
+            if cached is not None and now - cached[0] < STAT_CACHE_TTL:
+                result[key] = cached[1]
+            else:
+                missing.append(key)
+        if not missing:
+            return result
 
-    async def exists(self, path: PathLike) -> bool:
-        """Check if path exists in sandbox."""
         await self._ensure_sandbox_initialized()
-        result = await self.sandbox_client.run_command(
-            f"test -e {path} && echo 'true' || echo 'false'"
+        cmd = "; ".join(
+            f"echo \"stat:{i}:$(stat -L -c '%F|%s|%Y' -- {shlex.quote(key)} "
+            f'2>/dev/null || echo missing)"'
+            for i, key in enumerate(missing)
         )
-        return result.strip() == "true"
+        try:
+            output = await self.sandbox_client.run_command(cmd)
+        except Exception as e:
+            raise ToolError(f"Failed to stat paths in sandbox: {str(e)}") from None
+
+        lines = {}
+        for line in output.splitlines():
+            line = line.strip()
+            if line.startswith("stat:"):
+                index, _, value = line[5:].partition(":")
+                lines[int(index)] = value
+        now = time.monotonic()
+        for i, key in enumerate(missing):
+            value = lines.get(i)
+            if value is None:
+                raise ToolError(f"Failed to stat {key} in sandbox: {output}")
+            if value == "missing":
+                stat = FileStat(exists=False)
+            else:
+                kind, size, mtime = value.rsplit("|", 2)
+                stat = FileStat(
+                    exists=True,
+                    is_dir=kind == "directory",
+                    size=int(size),
+                    mtime=float(mtime),
+                )
+            self._stats[key] = (now, stat)
+            result[key] = stat
+        return result
+
+    async def stat(self, path: PathLike) -> FileStat:
+        """Metadata of a path in sandbox."""
+        return (await self.stat_many([path]))[str(path)]
+
+    async def is_directory(self, path: PathLike) -> bool:
+        """Check if path points to a directory in sandbox."""
+        return (await self.stat(path)).is_dir
+
+    async def exists(self, path: PathLike) -> bool:
+        """Check if path exists in sandbox."""
+        return (await self.stat(path)).exists
 
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
         """Run a command in sandbox environment."""
         await self._ensure_sandbox_initialized()
+        # The command may change any file
+        self._stats.clear()
         try:
             stdout = await self.sandbox_client.run_command(
                 cmd, timeout=int(timeout) if timeout else None
@@ -1,13 +1,17 @@
-from contextlib import AsyncExitStack
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
-from mcp.types import ListToolsResult, TextContent
+from mcp.types import ListToolsResult, TextContent, Tool, ToolListChangedNotification
 
+from app.config import MCPSettings, config
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.mcp_connection import MCPConnection, StreamsFactory
 from app.tool.tool_collection import ToolCollection
 
 
@@ -15,17 +19,21 @@ class MCPClientTool(BaseTool):
     """Represents a tool proxy that can be called on the MCP server from the client side."""
 
     session: Optional[ClientSession] = None
+    connection: Optional[MCPConnection] = None
     server_id: str = ""  # Add server identifier
     original_name: str = ""
 
     async def execute(self, **kwargs) -> ToolResult:
         """Execute the tool by making a remote call to the MCP server."""
-        if not self.session:
+        if not self.session and not self.connection:
             return ToolResult(error="Not connected to MCP server")
 
         try:
             logger.info(f"Executing tool: {self.original_name}")
-            result = await self.session.call_tool(self.original_name, kwargs)
+            if self.connection is not None:
+                result = await self.connection.call_tool(self.original_name, kwargs)
+            else:
+                result = await self.session.call_tool(self.original_name, kwargs)
             content_str = ", ".join(
                 item.text for item in result.content if isinstance(item, TextContent)
             )
@@ -39,13 +47,29 @@ class MCPClients(ToolCollection):
     A collection of tools that connects to multiple MCP servers and manages available tools through the Model Context Protocol.
     """
 
-    sessions: Dict[str, ClientSession] = {}
-    exit_stacks: Dict[str, AsyncExitStack] = {}
     description: str = "MCP client tools for server interaction"
 
-    def __init__(self):
+    def __init__(self, settings: Optional[MCPSettings] = None):
         super().__init__()  # Initialize with empty tools list
         self.name = "mcp"  # Keep name for backward compatibility
+        self.settings = settings or config.mcp_config or MCPSettings()
+        self.connections: Dict[str, MCPConnection] = {}
+        # Servers announcing tools/list_changed, and those that sent it since
+        # their last refresh
+        self._notifying: Set[str] = set()
+        self._stale: Set[str] = set()
+        # Per server: hash of the whole tool list and of each tool
+        self._list_hashes: Dict[str, str] = {}
+        self._tool_hashes: Dict[str, Dict[str, str]] = {}
+
+    @property
+    def sessions(self) -> Dict[str, Optional[ClientSession]]:
+        """Sessions of live servers; None while a server is reconnecting."""
+        return {
+            server_id: connection.session
+            for server_id, connection in self.connections.items()
+            if connection.alive
+        }
 
     async def connect_sse(self, server_url: str, server_id: str = "") -> None:
         """Connect to an MCP server using SSE transport."""
@@ -53,20 +77,7 @@ class MCPClients(ToolCollection):
             raise ValueError("Server URL is required.")
 
         server_id = server_id or server_url
-
-        # Always ensure clean disconnection before new connection
-        if server_id in self.sessions:
-            await self.disconnect(server_id)
-
-        exit_stack = AsyncExitStack()
-        self.exit_stacks[server_id] = exit_stack
-
-        streams_context = sse_client(url=server_url)
-        streams = await exit_stack.enter_async_context(streams_context)
-        session = await exit_stack.enter_async_context(ClientSession(*streams))
-        self.sessions[server_id] = session
-
-        await self._initialize_and_list_tools(server_id)
+        await self.connect(server_id, lambda: sse_client(url=server_url))
 
     async def connect_stdio(
         self, command: str, args: List[str], server_id: str = ""
@@ -76,54 +87,148 @@ class MCPClients(ToolCollection):
             raise ValueError("Server command is required.")
 
         server_id = server_id or command
+        server_params = StdioServerParameters(command=command, args=args)
+        await self.connect(server_id, lambda: stdio_client(server_params))
+
+    async def connect(self, server_id: str, open_streams: StreamsFactory) -> None:
+        """Connect to an MCP server over the transport opened by `open_streams`.
 
+        The connection is supervised: it is pinged when idle and reopened with
+        backoff when it breaks, see `MCPConnection`.
+        """
         # Always ensure clean disconnection before new connection
-        if server_id in self.sessions:
+        if server_id in self.connections:
             await self.disconnect(server_id)
 
-        exit_stack = AsyncExitStack()
-        self.exit_stacks[server_id] = exit_stack
-
-        server_params = StdioServerParameters(command=command, args=args)
-        stdio_transport = await exit_stack.enter_async_context(
-            stdio_client(server_params)
+        connection = MCPConnection(
+            server_id,
+            open_streams,
+            self.settings,
+            on_connect=self._on_connect,
+            on_message=self._on_message,
+        )
+        self.connections[server_id] = connection
+        try:
+            await connection.start()
+        except BaseException:
+            self.connections.pop(server_id, None)
+            self._forget_server(server_id)
+            raise
+        logger.info(
+            f"Connected to server {server_id} with tools: "
+            f"{list(self._tool_hashes[server_id])}"
         )
-        read, write = stdio_transport
-        session = await exit_stack.enter_async_context(ClientSession(read, write))
-        self.sessions[server_id] = session
-
-        await self._initialize_and_list_tools(server_id)
-
-    async def _initialize_and_list_tools(self, server_id: str) -> None:
-        """Initialize session and populate tool map."""
-        session = self.sessions.get(server_id)
-        if not session:
-            raise RuntimeError(f"Session not initialized for server {server_id}")
-
-        await session.initialize()
-        response = await session.list_tools()
 
-        # Create proper tool objects for each server tool
-        for tool in response.tools:
-            original_name = tool.name
-            tool_name = f"mcp_{server_id}_{original_name}"
-            tool_name = self._sanitize_tool_name(tool_name)
+    async def _on_connect(self, connection: MCPConnection) -> None:
+        """Populate the tool map of a new or re-established connection."""
+        server_id = connection.server_id
+        tools_capability = connection.init_result.capabilities.tools
+        if tools_capability and tools_capability.listChanged:
+            self._notifying.add(server_id)
+        else:
+            self._notifying.discard(server_id)
+
+        await self._refresh_server(server_id)
+        for tool in self.tool_map.values():
+            if getattr(tool, "server_id", None) == server_id:
+                tool.session = connection.session
+
+    def _on_message(self, server_id: str, message: Any) -> None:
+        """Mark a server's tools stale when it announces a tool list change."""
+        if isinstance(getattr(message, "root", None), ToolListChangedNotification):
+            logger.debug(f"Tool list of MCP server {server_id} changed")
+            self._stale.add(server_id)
+
+    @property
+    def has_pending_changes(self) -> bool:
+        """Whether a server announced a tool list change not yet refreshed."""
+        return bool(self._stale)
+
+    async def refresh_tools(
+        self, force: bool = False
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Update the tool map from servers whose tools may have changed.
+
+        Servers that support `tools/list_changed` are only queried after they
+        sent it. Other servers are queried on every call, but their tools are
+        only rebuilt when the hash of the tool list differs.
+
+        Args:
+            force: Query every server regardless of notifications.
+
+        Returns:
+            A tuple of (added_tools, removed_tools, changed_tools)
+        """
+        added, removed, changed = [], [], []
+        for server_id, connection in list(self.connections.items()):
+            if not connection.alive:
+                # Reconnecting gave up; drop the server and its tools
+                removed += self._server_tool_names(server_id)
+                await self.disconnect(server_id)
+                continue
+            if not connection.connected or (
+                not force
+                and server_id in self._notifying
+                and server_id not in self._stale
+            ):
+                # Reconnecting servers refresh their tools once connected
+                continue
+            try:
+                server_changes = await self._refresh_server(server_id)
+            except Exception as e:
+                logger.warning(f"Failed to refresh tools of {server_id}: {e!r}")
+                self._stale.add(server_id)
+                continue
+            server_added, server_removed, server_changed = server_changes
+            added += server_added
+            removed += server_removed
+            changed += server_changed
+        return added, removed, changed
+
+    async def _refresh_server(
+        self, server_id: str
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """List one server's tools and apply the difference to the tool map."""
+        connection = self.connections[server_id]
+        # Cleared before the request so a change announced meanwhile is kept
+        self._stale.discard(server_id)
+        response = await asyncio.wait_for(
+            connection.session.list_tools(), timeout=self.settings.call_timeout
+        )
 
+        tools = {tool.name: tool for tool in response.tools}
+        hashes = {name: _tool_hash(tool) for name, tool in tools.items()}
+        list_hash = _hash(json.dumps(hashes, sort_keys=True))
+        if list_hash == self._list_hashes.get(server_id):
+            return [], [], []
+
+        previous = self._tool_hashes.get(server_id, {})
+        added, removed, changed = [], [], []
+        for original_name, tool in tools.items():
+            if previous.get(original_name) == hashes[original_name]:
+                continue
             server_tool = MCPClientTool(
-                name=tool_name,
+                name=self._sanitize_tool_name(f"mcp_{server_id}_{original_name}"),
                 description=tool.description,
                 parameters=tool.inputSchema,
-                session=session,
+                session=connection.session,
+                connection=connection,
                 server_id=server_id,
                 original_name=original_name,
             )
-            self.tool_map[tool_name] = server_tool
-
+            self.tool_map[server_tool.name] = server_tool
+            (changed if original_name in previous else added).append(server_tool.name)
+        for original_name in previous.keys() - tools.keys():
+            tool_name = self._sanitize_tool_name(f"mcp_{server_id}_{original_name}")
+            self.tool_map.pop(tool_name, None)
+            removed.append(tool_name)
+
+        self._list_hashes[server_id] = list_hash
+        self._tool_hashes[server_id] = hashes
         # Update tools tuple
         self.tools = tuple(self.tool_map.values())
-        logger.info(
-            f"Connected to server {server_id} with tools: {[tool.name for tool in response.tools]}"
-        )
+        self.invalidate_params(*added, *removed, *changed)
+        return added, removed, changed
 
     def _sanitize_tool_name(self, name: str) -> str:
         """Sanitize tool name to match MCPClientTool requirements."""
@@ -148,47 +253,67 @@ class MCPClients(ToolCollection):
         """List all available tools."""
         tools_result = ListToolsResult(tools=[])
         for session in self.sessions.values():
+            if session is None:
+                continue
             response = await session.list_tools()
             tools_result.tools += response.tools
         return tools_result
 
+    def get_metrics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Latency and error summaries per server and tool."""
+        return {
+            server_id: connection.get_metrics()
+            for server_id, connection in self.connections.items()
+        }
+
     async def disconnect(self, server_id: str = "") -> None:
         """Disconnect from a specific MCP server or all servers if no server_id provided."""
         if server_id:
-            if server_id in self.sessions:
+            connection = self.connections.pop(server_id, None)
+            if connection is not None:
                 try:
-                    exit_stack = self.exit_stacks.get(server_id)
-
-                    # Close the exit stack which will handle session cleanup
-                    if exit_stack:
-                        try:
-                            await exit_stack.aclose()
-                        except RuntimeError as e:
-                            if "cancel scope" in str(e).lower():
-                                logger.warning(
-                                    f"Cancel scope error during disconnect from {server_id}, continuing with cleanup: {e}"
-                                )
-                            else:
-                                raise
-
-                    # Clean up references
-                    self.sessions.pop(server_id, None)
-                    self.exit_stacks.pop(server_id, None)
-
-                    # Remove tools associated with this server
-                    self.tool_map = {
-                        k: v
-                        for k, v in self.tool_map.items()
-                        if v.server_id != server_id
-                    }
-                    self.tools = tuple(self.tool_map.values())
-                    logger.info(f"Disconnected from MCP server {server_id}")
+                    await connection.close()
                 except Exception as e:
                     logger.error(f"Error disconnecting from server {server_id}: {e}")
+
+                # Clean up references
+                self._forget_server(server_id)
+
+                # Remove tools associated with this server
+                self.tool_map = {
+                    k: v
+                    for k, v in self.tool_map.items()
+                    if getattr(v, "server_id", None) != server_id
+                }
+                self.tools = tuple(self.tool_map.values())
+                self.invalidate_params()
+                logger.info(f"Disconnected from MCP server {server_id}")
         else:
             # Disconnect from all servers in a deterministic order
-            for sid in sorted(list(self.sessions.keys())):
+            for sid in sorted(list(self.connections.keys())):
                 await self.disconnect(sid)
             self.tool_map = {}
             self.tools = tuple()
+            self.invalidate_params()
             logger.info("Disconnected from all MCP servers")
+
+    def _server_tool_names(self, server_id: str) -> List[str]:
+        return [
+            name
+            for name, tool in self.tool_map.items()
+            if getattr(tool, "server_id", None) == server_id
+        ]
+
+    def _forget_server(self, server_id: str) -> None:
+        self._notifying.discard(server_id)
+        self._stale.discard(server_id)
+        self._list_hashes.pop(server_id, None)
+        self._tool_hashes.pop(server_id, None)
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _tool_hash(tool: Tool) -> str:
+    return _hash(json.dumps(tool.model_dump(mode="json"), sort_keys=True))
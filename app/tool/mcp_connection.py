@@ -0,0 +1,308 @@
+"""Supervised connection to one MCP server."""
+
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Optional
+
+import anyio
+from mcp import ClientSession
+from mcp.types import CallToolResult, InitializeResult
+
+from app.config import MCPSettings
+from app.exceptions import ToolError
+from app.logger import logger
+from app.utils.metrics import Histogram
+
+
+StreamsFactory = Callable[[], AsyncContextManager[Any]]
+
+# Errors raised when the transport under a session is gone
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+# Set by the write stream once the request of the current call went out
+_REQUEST_SENT: ContextVar[Optional[asyncio.Event]] = ContextVar(
+    "mcp_request_sent", default=None
+)
+
+
+class TrackedSendStream:
+    """Write stream of a session that records when a call's request was sent.
+
+    A call that fails before its request went out can safely be retried; once
+    it was sent, the server may have run the tool.
+    """
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def send(self, item: Any) -> None:
+        await self._stream.send(item)
+        sent = _REQUEST_SENT.get()
+        if sent is not None:
+            sent.set()
+
+    async def __aenter__(self) -> "TrackedSendStream":
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> Optional[bool]:
+        return await self._stream.__aexit__(*exc_info)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class MCPConnection:
+    """A session with one MCP server, kept alive by a background task.
+
+    The task opens the transport and session, pings the server when the
+    connection has been idle, and reopens both with exponential backoff when
+    a ping fails or the transport breaks. Transports are opened and closed in
+    that same task, as anyio's cancel scopes require.
+
+    Calls wait for the connection to be ready, are limited to
+    `settings.max_inflight` at a time and fail after `settings.call_timeout`.
+    The latency of each call is recorded per tool in `metrics`.
+    """
+
+    def __init__(
+        self,
+        server_id: str,
+        open_streams: StreamsFactory,
+        settings: MCPSettings,
+        on_connect: Optional[Callable[["MCPConnection"], Awaitable[None]]] = None,
+        on_message: Optional[Callable[[str, Any], None]] = None,
+    ):
+        self.server_id = server_id
+        self.settings = settings
+        self.session: Optional[ClientSession] = None
+        self.init_result: Optional[InitializeResult] = None
+        self.metrics: Dict[str, Histogram] = {}
+        self.connects = 0
+        self.last_ok = time.monotonic()
+
+        self._open_streams = open_streams
+        self._on_connect = on_connect
+        self._on_message = on_message
+        self._limit = asyncio.Semaphore(settings.max_inflight)
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._lost = False
+        self._probe = False
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None and self._ready.is_set()
+
+    @property
+    def alive(self) -> bool:
+        """False once the connection was closed or reconnecting gave up."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Connect, raising the error of the first attempt if it fails."""
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.session is None:
+            await self._task
+            raise self._error or ConnectionError(
+                f"Could not connect to MCP server {self.server_id}"
+            )
+
+    async def close(self) -> None:
+        """Close the session and stop the background task."""
+        self._closing = True
+        self._wake.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=10)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"Timed out closing MCP server {self.server_id}")
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        """Call a tool, waiting out a reconnect if one is in progress.
+
+        A call whose request could not be sent because the transport broke is
+        retried once on the new connection. Once the request was sent, the
+        tool may have run, so a lost connection fails the call instead.
+
+        Raises:
+            ToolError: If the server is unavailable, the connection was lost
+                or the call times out.
+        """
+        histogram = self.metrics.setdefault(name, Histogram())
+        async with self._limit:
+            for attempt in range(2):
+                session = await self._wait_ready()
+                start = time.monotonic()
+                sent = asyncio.Event()
+                token = _REQUEST_SENT.set(sent)
+                try:
+                    result = await asyncio.wait_for(
+                        session.call_tool(name, arguments),
+                        timeout=self.settings.call_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    histogram.observe(time.monotonic() - start, error=True)
+                    # The server may be hung; check it before the next call
+                    self._request_probe()
+                    raise ToolError(
+                        f"MCP tool {name} on {self.server_id} timed out after "
+                        f"{self.settings.call_timeout}s"
+                    )
+                except CONNECTION_ERRORS as e:
+                    histogram.observe(time.monotonic() - start, error=True)
+                    self._mark_lost(session, e)
+                    if sent.is_set():
+                        raise ToolError(
+                            f"Connection to MCP server {self.server_id} lost while "
+                            f"running {name}; the tool may or may not have run: {e!r}"
+                        )
+                    if attempt:
+                        raise ToolError(
+                            f"Connection to MCP server {self.server_id} lost: {e!r}"
+                        )
+                    continue
+                except Exception:
+                    histogram.observe(time.monotonic() - start, error=True)
+                    raise
+                finally:
+                    _REQUEST_SENT.reset(token)
+                histogram.observe(time.monotonic() - start, error=result.isError)
+                self.last_ok = time.monotonic()
+                return result
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        return {name: h.summary() for name, h in self.metrics.items()}
+
+    async def _wait_ready(self) -> ClientSession:
+        try:
+            await asyncio.wait_for(
+                self._ready.wait(), timeout=self.settings.call_timeout
+            )
+        except asyncio.TimeoutError:
+            pass
+        if self.session is None:
+            raise ToolError(f"MCP server {self.server_id} is unavailable")
+        return self.session
+
+    def _request_probe(self) -> None:
+        self._probe = True
+        self._wake.set()
+
+    def _mark_lost(self, session: ClientSession, error: BaseException) -> None:
+        if session is self.session and not self._lost:
+            logger.warning(f"Lost connection to MCP server {self.server_id}: {error!r}")
+            self._lost = True
+            self._ready.clear()
+            self._wake.set()
+
+    async def _run(self) -> None:
+        failures = 0
+        while not self._closing:
+            try:
+                async with AsyncExitStack() as stack:
+                    await self._connect(stack)
+                    failures = 0
+                    await self._supervise()
+            except Exception as e:
+                self._error = e
+                if not self.connects:
+                    logger.error(
+                        f"Failed to connect to MCP server {self.server_id}: {e}"
+                    )
+                    break
+                logger.warning(f"MCP server {self.server_id} connection error: {e!r}")
+            finally:
+                self.session = None
+                self._ready.clear()
+            if self._closing:
+                break
+
+            failures += 1
+            if failures > self.settings.reconnect_attempts:
+                logger.error(
+                    f"Giving up on MCP server {self.server_id} after "
+                    f"{self.settings.reconnect_attempts} reconnect attempts"
+                )
+                break
+            delay = min(
+                self.settings.reconnect_max_delay,
+                self.settings.reconnect_delay * 2 ** (failures - 1),
+            )
+            logger.info(f"Reconnecting to MCP server {self.server_id} in {delay:.1f}s")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+        # Release waiters; they find no session and fail
+        self._ready.set()
+
+    async def _connect(self, stack: AsyncExitStack) -> None:
+        read_stream, write_stream, *rest = await stack.enter_async_context(
+            self._open_streams()
+        )
+        session = await stack.enter_async_context(
+            ClientSession(read_stream, TrackedSendStream(write_stream), *rest)
+        )
+        # Notifications must be consumed or the session's receive loop stalls
+        listener = asyncio.create_task(self._listen(session))
+        stack.callback(listener.cancel)
+
+        self.init_result = await asyncio.wait_for(
+            session.initialize(), timeout=self.settings.call_timeout
+        )
+        self.session = session
+        self._lost = self._probe = False
+        if self._on_connect is not None:
+            await self._on_connect(self)
+        self.connects += 1
+        self.last_ok = time.monotonic()
+        self._ready.set()
+
+    async def _listen(self, session: ClientSession) -> None:
+        try:
+            async for message in session.incoming_messages:
+                if self._on_message is not None:
+                    self._on_message(self.server_id, message)
+        except Exception as e:
+            logger.debug(f"Stopped listening to MCP server {self.server_id}: {e}")
+
+    async def _supervise(self) -> None:
+        """Return when the connection is lost, fails a ping or is closed."""
+        interval = self.settings.ping_interval
+        while not self._closing and not self._lost:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closing or self._lost:
+                return
+            idle = time.monotonic() - self.last_ok
+            if not self._probe and (not interval or idle < interval):
+                continue
+
+            self._probe = False
+            try:
+                await asyncio.wait_for(
+                    self.session.send_ping(), timeout=self.settings.ping_timeout
+                )
+                self.last_ok = time.monotonic()
+            except Exception as e:
+                self._mark_lost(self.session, e)
+                return
@@ -69,6 +69,10 @@ class PlanningTool(BaseTool):
     plans: dict = {}  # Dictionary to store plans by plan_id
     _current_plan_id: Optional[str] = None  # Track the current active plan
 
+    def invalidated_scopes(self, **kwargs) -> Optional[List[str]]:
+        """Plans live in memory; no cached tool result depends on them."""
+        return []
+
     async def execute(
         self,
         *,
@@ -319,6 +323,15 @@ class PlanningTool(BaseTool):
 
         return ToolResult(output=f"Plan '{plan_id}' has been deleted.")
 
+    def checkpoint_state(self) -> Dict:
+        """Plans and the active plan, for run checkpoints."""
+        return {"plans": self.plans, "current_plan_id": self._current_plan_id}
+
+    def restore_state(self, state: Dict) -> None:
+        """Restore what `checkpoint_state` returned."""
+        self.plans = dict(state.get("plans", {}))
+        self._current_plan_id = state.get("current_plan_id")
+
     def _format_plan(self, plan: Dict) -> str:
         """Format a plan for display."""
         output = f"Plan: {plan['title']} (ID: {plan['plan_id']})\n"
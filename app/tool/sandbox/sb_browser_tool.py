@@ -1,18 +1,22 @@
-import base64
-import io
+import asyncio
 import json
+import shlex
 import traceback
 from typing import Optional  # Add this import for Optional
+from urllib.parse import urlencode
 
-from PIL import Image
+import httpx
 from pydantic import Field
 
+from app.config import config
+from app.daytona.automation import BrowserAutomationClient
 from app.daytona.tool_base import (  # Ensure Sandbox is imported correctly
     Sandbox,
     SandboxToolsBase,
     ThreadMessage,
 )
 from app.tool.base import ToolResult
+from app.utils.image_cache import validate_base64_image, validate_base64_image_cached
 from app.utils.logger import logger
 
 
@@ -126,6 +130,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         },
     }
     browser_message: Optional[ThreadMessage] = Field(default=None, exclude=True)
+    _automation: Optional[BrowserAutomationClient] = None
+    _direct_failed: bool = False
 
     def __init__(
         self, sandbox: Optional[Sandbox] = None, thread_id: Optional[str] = None, **data
@@ -147,129 +153,121 @@ class SandboxBrowserTool(SandboxToolsBase):
             Tuple of (is_valid, error_message)
         """
         try:
-            if not base64_string or len(base64_string) < 10:
-                return False, "Base64 string is empty or too short"
-            if base64_string.startswith("data:"):
-                try:
-                    base64_string = base64_string.split(",", 1)[1]
-                except (IndexError, ValueError):
-                    return False, "Invalid data URL format"
-            import re
-
-            if not re.match(r"^[A-Za-z0-9+/]*={0,2}$", base64_string):
-                return False, "Invalid base64 characters detected"
-            if len(base64_string) % 4 != 0:
-                return False, "Invalid base64 string length"
-            try:
-                image_data = base64.b64decode(base64_string, validate=True)
-            except Exception as e:
-                return False, f"Base64 decoding failed: {str(e)}"
-            max_size_bytes = max_size_mb * 1024 * 1024
-            if len(image_data) > max_size_bytes:
-                return False, f"Image size exceeds limit ({max_size_bytes} bytes)"
-            try:
-                image_stream = io.BytesIO(image_data)
-                with Image.open(image_stream) as img:
-                    img.verify()
-                    supported_formats = {"JPEG", "PNG", "GIF", "BMP", "WEBP", "TIFF"}
-                    if img.format not in supported_formats:
-                        return False, f"Unsupported image format: {img.format}"
-                    image_stream.seek(0)
-                    with Image.open(image_stream) as img_check:
-                        width, height = img_check.size
-                        max_dimension = 8192
-                        if width > max_dimension or height > max_dimension:
-                            return (
-                                False,
-                                f"Image dimensions exceed limit ({max_dimension}x{max_dimension})",
-                            )
-                        if width < 1 or height < 1:
-                            return False, f"Invalid image dimensions: {width}x{height}"
-            except Exception as e:
-                return False, f"Invalid image data: {str(e)}"
-            return True, "Valid image"
+            return validate_base64_image(base64_string, max_size_mb)
         except Exception as e:
             logger.error(f"Unexpected error during base64 image validation: {e}")
             return False, f"Validation error: {str(e)}"
 
+    async def _get_automation_client(self) -> BrowserAutomationClient:
+        client = self._automation
+        if client is None or client.sandbox_id != self.sandbox.id:
+            if client is not None:
+                await client.close()
+            client = self._automation = BrowserAutomationClient(
+                self.sandbox, port=config.daytona.browser_api_port
+            )
+        return client
+
+    async def _request_automation(
+        self, endpoint: str, params: Optional[dict], method: str
+    ) -> dict:
+        """Call the automation API, over HTTP if possible, else with curl.
+
+        Raises:
+            RuntimeError: If the curl command fails.
+            json.JSONDecodeError: If the reply is not JSON.
+        """
+        if config.daytona.browser_direct_http and not self._direct_failed:
+            client = await self._get_automation_client()
+            try:
+                return await client.request(endpoint, params, method)
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                # The preview link is unreachable from here; stay on curl
+                logger.warning(
+                    f"Browser automation API unreachable over HTTP, "
+                    f"falling back to curl in the sandbox: {e}"
+                )
+                self._direct_failed = True
+                await client.close()
+
+        port = config.daytona.browser_api_port
+        url = f"http://localhost:{port}/api/automation/{endpoint}"
+        if method == "GET" and params:
+            url = f"{url}?{urlencode(params)}"
+        curl_cmd = (
+            f"curl -s -X {method} {shlex.quote(url)} "
+            f"-H 'Content-Type: application/json'"
+        )
+        if params and method != "GET":
+            curl_cmd += f" -d {shlex.quote(json.dumps(params))}"
+        logger.debug(f"Executing curl command: {curl_cmd}")
+        response = await asyncio.to_thread(
+            self.sandbox.process.exec, curl_cmd, timeout=30
+        )
+        if response.exit_code != 0:
+            raise RuntimeError(f"Browser automation request failed: {response}")
+        return json.loads(response.result)
+
     async def _execute_browser_action(
         self, endpoint: str, params: dict = None, method: str = "POST"
     ) -> ToolResult:
         """Execute a browser automation action through the sandbox API."""
         try:
             await self._ensure_sandbox()
-            url = f"http://localhost:8003/api/automation/{endpoint}"
-            if method == "GET" and params:
-                query_params = "&".join([f"{k}={v}" for k, v in params.items()])
-                url = f"{url}?{query_params}"
-                curl_cmd = (
-                    f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                )
-            else:
-                curl_cmd = (
-                    f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                )
-                if params:
-                    json_data = json.dumps(params)
-                    curl_cmd += f" -d '{json_data}'"
-            logger.debug(f"Executing curl command: {curl_cmd}")
-            response = self.sandbox.process.exec(curl_cmd, timeout=30)
-            if response.exit_code == 0:
-                try:
-                    result = json.loads(response.result)
-                    result.setdefault("content", "")
-                    result.setdefault("role", "assistant")
-                    if "screenshot_base64" in result:
-                        screenshot_data = result["screenshot_base64"]
-                        is_valid, validation_message = self._validate_base64_image(
-                            screenshot_data
-                        )
-                        if not is_valid:
-                            logger.warning(
-                                f"Screenshot validation failed: {validation_message}"
-                            )
-                            result["image_validation_error"] = validation_message
-                            del result["screenshot_base64"]
-
-                    # added_message = await self.thread_manager.add_message(
-                    #     thread_id=self.thread_id,
-                    #     type="browser_state",
-                    #     content=result,
-                    #     is_llm_message=False
-                    # )
-                    message = ThreadMessage(
-                        type="browser_state", content=result, is_llm_message=False
-                    )
-                    self.browser_message = message
-                    success_response = {
-                        "success": result.get("success", False),
-                        "message": result.get("message", "Browser action completed"),
-                    }
-                    #         if added_message and 'message_id' in added_message:
-                    #             success_response['message_id'] = added_message['message_id']
-                    for field in [
-                        "url",
-                        "title",
-                        "element_count",
-                        "pixels_below",
-                        "ocr_text",
-                        "image_url",
-                    ]:
-                        if field in result:
-                            success_response[field] = result[field]
-                    return (
-                        self.success_response(success_response)
-                        if success_response["success"]
-                        else self.fail_response(success_response)
+            try:
+                result = await self._request_automation(endpoint, params, method)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse response JSON: {e}")
+                return self.fail_response(f"Failed to parse response JSON: {e}")
+            except (RuntimeError, httpx.HTTPError) as e:
+                logger.error(f"Browser automation request failed: {e}")
+                return self.fail_response(f"Browser automation request failed: {e}")
+            result.setdefault("content", "")
+            result.setdefault("role", "assistant")
+            if "screenshot_base64" in result:
+                screenshot_data = result["screenshot_base64"]
+                (
+                    is_valid,
+                    validation_message,
+                ) = await validate_base64_image_cached(screenshot_data)
+                if not is_valid:
+                    logger.warning(
+                        f"Screenshot validation failed: {validation_message}"
                     )
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse response JSON: {e}")
-                    return self.fail_response(f"Failed to parse response JSON: {e}")
-            else:
-                logger.error(f"Browser automation request failed: {response}")
-                return self.fail_response(
-                    f"Browser automation request failed: {response}"
-                )
+                    result["image_validation_error"] = validation_message
+                    del result["screenshot_base64"]
+
+            # added_message = await self.thread_manager.add_message(
+            #     thread_id=self.thread_id,
+            #     type="browser_state",
+            #     content=result,
+            #     is_llm_message=False
+            # )
+            message = ThreadMessage(
+                type="browser_state", content=result, is_llm_message=False
+            )
+            self.browser_message = message
+            success_response = {
+                "success": result.get("success", False),
+                "message": result.get("message", "Browser action completed"),
+            }
+            #         if added_message and 'message_id' in added_message:
+            #             success_response['message_id'] = added_message['message_id']
+            for field in [
+                "url",
+                "title",
+                "element_count",
+                "pixels_below",
+                "ocr_text",
+                "image_url",
+            ]:
+                if field in result:
+                    success_response[field] = result[field]
+            return (
+                self.success_response(success_response)
+                if success_response["success"]
+                else self.fail_response(success_response)
+            )
         except Exception as e:
             logger.error(f"Error executing browser action: {e}")
             logger.debug(traceback.format_exc())
@@ -444,6 +442,12 @@ class SandboxBrowserTool(SandboxToolsBase):
         except Exception as e:
             return ToolResult(error=f"Failed to get browser state: {str(e)}")
 
+    async def cleanup(self) -> None:
+        """Close the HTTP connections to the automation API."""
+        if self._automation is not None:
+            await self._automation.close()
+            self._automation = None
+
     @classmethod
     def create_with_sandbox(cls, sandbox: Sandbox) -> "SandboxBrowserTool":
         """Factory method to create a tool with sandbox."""
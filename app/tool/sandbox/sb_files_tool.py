@@ -91,10 +91,10 @@ class SandboxFilesTool(SandboxToolsBase):
         """Check if a file should be excluded based on path, name, or extension"""
         return should_exclude_file(rel_path)
 
-    def _file_exists(self, path: str) -> bool:
+    async def _file_exists(self, path: str) -> bool:
         """Check if a file exists in the sandbox"""
         try:
-            self.sandbox.fs.get_file_info(path)
+            await asyncio.to_thread(self.sandbox.fs.get_file_info, path)
             return True
         except Exception:
             return False
@@ -106,7 +106,9 @@ class SandboxFilesTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
 
-            files = self.sandbox.fs.list_files(self.workspace_path)
+            files = await asyncio.to_thread(
+                self.sandbox.fs.list_files, self.workspace_path
+            )
             for file_info in files:
                 rel_path = file_info.name
 
@@ -116,7 +118,11 @@ class SandboxFilesTool(SandboxToolsBase):
 
                 try:
                     full_path = f"{self.workspace_path}/{rel_path}"
-                    content = self.sandbox.fs.download_file(full_path).decode()
+                    content = (
+                        await asyncio.to_thread(
+                            self.sandbox.fs.download_file, full_path
+                        )
+                    ).decode()
                     files_state[rel_path] = {
                         "content": content,
                         "is_dir": file_info.is_dir,
@@ -211,7 +217,7 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if self._file_exists(full_path):
+            if await self._file_exists(full_path):
                 return self.fail_response(
                     f"File '{file_path}' already exists. Use full_file_rewrite to modify existing files."
                 )
@@ -219,18 +225,26 @@ class SandboxFilesTool(SandboxToolsBase):
             # Create parent directories if needed
             parent_dir = "/".join(full_path.split("/")[:-1])
             if parent_dir:
-                self.sandbox.fs.create_folder(parent_dir, "755")
+                await asyncio.to_thread(
+                    self.sandbox.fs.create_folder, parent_dir, "755"
+                )
 
             # Write the file content
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, file_contents.encode(), full_path
+            )
+            await asyncio.to_thread(
+                self.sandbox.fs.set_file_permissions, full_path, permissions
+            )
 
             message = f"File '{file_path}' created successfully."
 
             # Check if index.html was created and add 8080 server info (only in root workspace)
             if file_path.lower() == "index.html":
                 try:
-                    website_link = self.sandbox.get_preview_link(8080)
+                    website_link = await asyncio.to_thread(
+                        self.sandbox.get_preview_link, 8080
+                    )
                     website_url = (
                         website_link.url
                         if hasattr(website_link, "url")
@@ -257,10 +271,12 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
+            if not await self._file_exists(full_path):
                 return self.fail_response(f"File '{file_path}' does not exist")
 
-            content = self.sandbox.fs.download_file(full_path).decode()
+            content = (
+                await asyncio.to_thread(self.sandbox.fs.download_file, full_path)
+            ).decode()
             old_str = old_str.expandtabs()
             new_str = new_str.expandtabs()
 
@@ -279,7 +295,9 @@ class SandboxFilesTool(SandboxToolsBase):
 
             # Perform replacement
             new_content = content.replace(old_str, new_str)
-            self.sandbox.fs.upload_file(new_content.encode(), full_path)
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, new_content.encode(), full_path
+            )
 
             # Show snippet around the edit
             replacement_line = content.split(old_str)[0].count("\n")
@@ -304,20 +322,26 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
+            if not await self._file_exists(full_path):
                 return self.fail_response(
                     f"File '{file_path}' does not exist. Use create_file to create a new file."
                 )
 
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, file_contents.encode(), full_path
+            )
+            await asyncio.to_thread(
+                self.sandbox.fs.set_file_permissions, full_path, permissions
+            )
 
             message = f"File '{file_path}' completely rewritten successfully."
 
             # Check if index.html was rewritten and add 8080 server info (only in root workspace)
             if file_path.lower() == "index.html":
                 try:
-                    website_link = self.sandbox.get_preview_link(8080)
+                    website_link = await asyncio.to_thread(
+                        self.sandbox.get_preview_link, 8080
+                    )
                     website_url = (
                         website_link.url
                         if hasattr(website_link, "url")
@@ -342,10 +366,10 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
+            if not await self._file_exists(full_path):
                 return self.fail_response(f"File '{file_path}' does not exist")
 
-            self.sandbox.fs.delete_file(full_path)
+            await asyncio.to_thread(self.sandbox.fs.delete_file, full_path)
             return self.success_response(f"File '{file_path}' deleted successfully.")
         except Exception as e:
             return self.fail_response(f"Error deleting file: {str(e)}")
@@ -5,6 +5,7 @@ from uuid import uuid4
 
 from app.daytona.tool_base import Sandbox, SandboxToolsBase
 from app.tool.base import ToolResult
+from app.tracing import tracer
 from app.utils.logger import logger
 
 
@@ -95,7 +96,7 @@ class SandboxShellTool(SandboxToolsBase):
             session_id = str(uuid4())
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.create_session(session_id)
+                await asyncio.to_thread(self.sandbox.process.create_session, session_id)
                 self._sessions[session_name] = session_id
             except Exception as e:
                 raise RuntimeError(f"Failed to create session: {str(e)}")
@@ -106,7 +107,9 @@ class SandboxShellTool(SandboxToolsBase):
         if session_name in self._sessions:
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.delete_session(self._sessions[session_name])
+                await asyncio.to_thread(
+                    self.sandbox.process.delete_session, self._sessions[session_name]
+                )
                 del self._sessions[session_name]
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
@@ -123,15 +126,20 @@ class SandboxShellTool(SandboxToolsBase):
             command=command, run_async=False, cwd=self.workspace_path
         )
 
-        response = self.sandbox.process.execute_session_command(
-            session_id=session_id,
-            req=req,
-            timeout=30,  # Short timeout for utility commands
-        )
+        with tracer.span("sandbox.command", target="daytona") as span:
+            response = await asyncio.to_thread(
+                self.sandbox.process.execute_session_command,
+                session_id=session_id,
+                req=req,
+                timeout=30,  # Short timeout for utility commands
+            )
 
-        logs = self.sandbox.process.get_session_command_logs(
-            session_id=session_id, command_id=response.cmd_id
-        )
+            logs = await asyncio.to_thread(
+                self.sandbox.process.get_session_command_logs,
+                session_id=session_id,
+                command_id=response.cmd_id,
+            )
+            span.set(exit_code=response.exit_code)
 
         return {"output": logs, "exit_code": response.exit_code}
 
@@ -183,7 +191,7 @@ class SandboxShellTool(SandboxToolsBase):
                 start_time = time.time()
                 while (time.time() - start_time) < timeout:
                     # Wait a bit before checking
-                    time.sleep(2)
+                    await asyncio.sleep(2)
 
                     # Check if session still exists (command might have exited)
                     check_result = await self._execute_raw_command(
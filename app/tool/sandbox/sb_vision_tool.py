@@ -1,14 +1,13 @@
-import base64
+import asyncio
 import mimetypes
 import os
-from io import BytesIO
 from typing import Optional
 
-from PIL import Image
 from pydantic import Field
 
 from app.daytona.tool_base import Sandbox, SandboxToolsBase, ThreadMessage
 from app.tool.base import ToolResult
+from app.utils.image_cache import compress_image, compress_image_cached
 
 
 # 最大文件大小（原图10MB，压缩后5MB）
@@ -66,43 +65,14 @@ class SandboxVisionTool(SandboxToolsBase):
 
     def compress_image(self, image_bytes: bytes, mime_type: str, file_path: str):
         """压缩图片，保持合理质量。"""
-        try:
-            img = Image.open(BytesIO(image_bytes))
-            if img.mode in ("RGBA", "LA", "P"):
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                if img.mode == "P":
-                    img = img.convert("RGBA")
-                background.paste(
-                    img, mask=img.split()[-1] if img.mode == "RGBA" else None
-                )
-                img = background
-            width, height = img.size
-            if width > DEFAULT_MAX_WIDTH or height > DEFAULT_MAX_HEIGHT:
-                ratio = min(DEFAULT_MAX_WIDTH / width, DEFAULT_MAX_HEIGHT / height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            output = BytesIO()
-            if mime_type == "image/gif":
-                img.save(output, format="GIF", optimize=True)
-                output_mime = "image/gif"
-            elif mime_type == "image/png":
-                img.save(
-                    output,
-                    format="PNG",
-                    optimize=True,
-                    compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
-                )
-                output_mime = "image/png"
-            else:
-                img.save(
-                    output, format="JPEG", quality=DEFAULT_JPEG_QUALITY, optimize=True
-                )
-                output_mime = "image/jpeg"
-            compressed_bytes = output.getvalue()
-            return compressed_bytes, output_mime
-        except Exception:
-            return image_bytes, mime_type
+        return compress_image(
+            image_bytes,
+            mime_type,
+            DEFAULT_MAX_WIDTH,
+            DEFAULT_MAX_HEIGHT,
+            DEFAULT_JPEG_QUALITY,
+            DEFAULT_PNG_COMPRESS_LEVEL,
+        )
 
     async def execute(
         self, action: str, file_path: Optional[str] = None, **kwargs
@@ -122,7 +92,9 @@ class SandboxVisionTool(SandboxToolsBase):
             cleaned_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{cleaned_path}"
             try:
-                file_info = self.sandbox.fs.get_file_info(full_path)
+                file_info = await asyncio.to_thread(
+                    self.sandbox.fs.get_file_info, full_path
+                )
                 if file_info.is_dir:
                     return self.fail_response(f"路径 '{cleaned_path}' 是目录，不是图片文件。")
             except Exception:
@@ -132,7 +104,9 @@ class SandboxVisionTool(SandboxToolsBase):
                     f"图片文件 '{cleaned_path}' 过大 ({file_info.size / (1024*1024):.2f}MB)，最大允许 {MAX_IMAGE_SIZE / (1024*1024)}MB。"
                 )
             try:
-                image_bytes = self.sandbox.fs.download_file(full_path)
+                image_bytes = await asyncio.to_thread(
+                    self.sandbox.fs.download_file, full_path
+                )
             except Exception:
                 return self.fail_response(f"无法读取图片文件: {cleaned_path}")
             mime_type, _ = mimetypes.guess_type(full_path)
@@ -150,20 +124,26 @@ class SandboxVisionTool(SandboxToolsBase):
                     return self.fail_response(
                         f"不支持或未知的图片格式: '{cleaned_path}'。支持: JPG, PNG, GIF, WEBP。"
                     )
-            compressed_bytes, compressed_mime_type = self.compress_image(
-                image_bytes, mime_type, cleaned_path
+            # 在线程池中压缩，并按内容哈希缓存结果
+            compressed = await compress_image_cached(
+                image_bytes,
+                mime_type,
+                DEFAULT_MAX_WIDTH,
+                DEFAULT_MAX_HEIGHT,
+                DEFAULT_JPEG_QUALITY,
+                DEFAULT_PNG_COMPRESS_LEVEL,
             )
-            if len(compressed_bytes) > MAX_COMPRESSED_SIZE:
+            if compressed.size > MAX_COMPRESSED_SIZE:
                 return self.fail_response(
-                    f"图片文件 '{cleaned_path}' 压缩后仍过大 ({len(compressed_bytes) / (1024*1024):.2f}MB)，最大允许 {MAX_COMPRESSED_SIZE / (1024*1024)}MB。"
+                    f"图片文件 '{cleaned_path}' 压缩后仍过大 ({compressed.size / (1024*1024):.2f}MB)，最大允许 {MAX_COMPRESSED_SIZE / (1024*1024)}MB。"
                 )
-            base64_image = base64.b64encode(compressed_bytes).decode("utf-8")
+            base64_image = compressed.base64
             image_context_data = {
-                "mime_type": compressed_mime_type,
+                "mime_type": compressed.mime_type,
                 "base64": base64_image,
                 "file_path": cleaned_path,
                 "original_size": file_info.size,
-                "compressed_size": len(compressed_bytes),
+                "compressed_size": compressed.size,
             }
             message = ThreadMessage(
                 type="image_context", content=image_context_data, is_llm_message=False
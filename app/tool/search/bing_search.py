@@ -1,7 +1,7 @@
 from typing import List, Optional, Tuple
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
 
 from app.logger import logger
 from app.tool.search.base import SearchItem, WebSearchEngine
@@ -31,6 +31,10 @@ HEADERS = {
     "Accept-Language": "zh-CN,zh;q=0.9",
 }
 
+# Result items of the page, `li` elements with the b_algo class
+_RESULT_XPATH = './/li[contains(concat(" ", normalize-space(@class), " "), " b_algo ")]'
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
 BING_HOST_URL = "https://www.bing.com"
 BING_SEARCH_URL = "https://www.bing.com/search?q="
 
@@ -85,27 +89,27 @@ class BingSearchEngine(WebSearchEngine):
         """
         try:
             res = self.session.get(url=url)
-            res.encoding = "utf-8"
-            root = BeautifulSoup(res.text, "lxml")
+            # lxml builds the tree in C, several times faster than BeautifulSoup
+            root = lxml.html.fromstring(res.content, parser=_HTML_PARSER)
 
             list_data = []
-            ol_results = root.find("ol", id="b_results")
+            ol_results = root.xpath('//ol[@id="b_results"]')
             if not ol_results:
                 return [], None
 
-            for li in ol_results.find_all("li", class_="b_algo"):
+            for li in ol_results[0].xpath(_RESULT_XPATH):
                 title = ""
                 url = ""
                 abstract = ""
                 try:
-                    h2 = li.find("h2")
-                    if h2:
-                        title = h2.text.strip()
-                        url = h2.a["href"].strip()
+                    h2 = li.find(".//h2")
+                    if h2 is not None:
+                        title = h2.text_content().strip()
+                        url = h2.xpath(".//a/@href")[0].strip()
 
-                    p = li.find("p")
-                    if p:
-                        abstract = p.text.strip()
+                    p = li.find(".//p")
+                    if p is not None:
+                        abstract = p.text_content().strip()
 
                     if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
                         abstract = abstract[:ABSTRACT_MAX_LENGTH]
@@ -123,11 +127,11 @@ class BingSearchEngine(WebSearchEngine):
                 except Exception:
                     continue
 
-            next_btn = root.find("a", title="Next page")
-            if not next_btn:
+            next_href = root.xpath('//a[@title="Next page"]/@href')
+            if not next_href:
                 return list_data, None
 
-            next_url = BING_HOST_URL + next_btn["href"]
+            next_url = BING_HOST_URL + next_href[0]
             return list_data, next_url
         except Exception as e:
             logger.warning(f"Error parsing HTML: {e}")
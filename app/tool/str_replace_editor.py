@@ -1,13 +1,17 @@
 """File and directory manipulation tool with sandbox support."""
 
-from collections import defaultdict
-from pathlib import Path
-from typing import Any, DefaultDict, List, Literal, Optional, get_args
+import posixpath
+from pathlib import Path, PurePath, PurePosixPath
+from typing import Any, List, Literal, Optional, get_args
+
+from pydantic import Field, PrivateAttr, model_validator
 
 from app.config import config
 from app.exceptions import ToolError
 from app.tool import BaseTool
+from app.tool.artifacts import CURRENT_ARTIFACT_STORE
 from app.tool.base import CLIResult, ToolResult
+from app.tool.edit_history import DEFAULT_HISTORY_MAX_BYTES, EditHistory
 from app.tool.file_operators import (
     FileOperator,
     LocalFileOperator,
@@ -98,10 +102,42 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
-    _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
+    max_history_bytes: int = Field(
+        default=DEFAULT_HISTORY_MAX_BYTES,
+        description="Memory budget for undo history; oldest edits are evicted first",
+    )
+    _file_history: Optional[EditHistory] = PrivateAttr(default=None)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
 
+    @model_validator(mode="after")
+    def initialize_history(self) -> "StrReplaceEditor":
+        """Give each editor instance its own bounded undo history."""
+        self._file_history = EditHistory(max_bytes=self.max_history_bytes)
+        return self
+
+    @staticmethod
+    def _scope_path(path: str) -> PurePath:
+        """Normalized path of a cache scope; sandbox paths never touch the host."""
+        if config.sandbox.use_sandbox:
+            return PurePosixPath(posixpath.normpath(path))
+        return Path(path).resolve()
+
+    def memo_scope(self, command: str = "", path: str = "", **kwargs) -> Optional[str]:
+        """Views are reused until the path is edited."""
+        if command == "view" and path:
+            return f"file:{self._scope_path(path)}"
+        return None
+
+    def invalidated_scopes(
+        self, command: str = "", path: str = "", **kwargs
+    ) -> Optional[List[str]]:
+        """An edit changes the views of the file and of its directories."""
+        if not path:
+            return []
+        edited = self._scope_path(path)
+        return [f"file:{p}" for p in (edited, *edited.parents)]
+
     # def _get_operator(self, use_sandbox: bool) -> FileOperator:
     def _get_operator(self) -> FileOperator:
         """Get the appropriate file operator based on execution mode."""
@@ -137,7 +173,7 @@ class StrReplaceEditor(BaseTool):
             if file_text is None:
                 raise ToolError("Parameter `file_text` is required for command: create")
             await operator.write_file(path, file_text)
-            self._file_history[path].append(file_text)
+            self._file_history.record(path, file_text, file_text)
             result = ToolResult(output=f"File created successfully at: {path}")
         elif command == "str_replace":
             if old_str is None:
@@ -171,24 +207,25 @@ class StrReplaceEditor(BaseTool):
         if not path.is_absolute():
             raise ToolError(f"The path {path} is not an absolute path")
 
+        # One metadata query answers both checks
+        stat = await operator.stat(path)
+
         # Only check if path exists for non-create commands
         if command != "create":
-            if not await operator.exists(path):
+            if not stat.exists:
                 raise ToolError(
                     f"The path {path} does not exist. Please provide a valid path."
                 )
 
             # Check if path is a directory
-            is_dir = await operator.is_directory(path)
-            if is_dir and command != "view":
+            if stat.is_dir and command != "view":
                 raise ToolError(
                     f"The path {path} is a directory and only the `view` command can be used on directories"
                 )
 
         # Check if file exists for create command
         elif command == "create":
-            exists = await operator.exists(path)
-            if exists:
+            if stat.exists:
                 raise ToolError(
                     f"File already exists at: {path}. Cannot overwrite files using command `create`."
                 )
@@ -289,8 +326,6 @@ class StrReplaceEditor(BaseTool):
         view_range: Optional[List[int]] = None,
     ) -> CLIResult:
         """Display file content, optionally within a specified line range."""
-        # Read file content
-        file_content = await operator.read_file(path)
         init_line = 1
 
         # Apply view range if specified
@@ -300,10 +335,13 @@ class StrReplaceEditor(BaseTool):
                     "Invalid `view_range`. It should be a list of two integers."
                 )
 
-            file_lines = file_content.split("\n")
-            n_lines_file = len(file_lines)
             init_line, final_line = view_range
 
+            # Only the requested lines are read, via the operator's line index
+            file_content, n_lines_file = await operator.read_line_range(
+                path, init_line, final_line
+            )
+
             # Validate view range
             if init_line < 1 or init_line > n_lines_file:
                 raise ToolError(
@@ -320,12 +358,9 @@ class StrReplaceEditor(BaseTool):
                     f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
                     f"larger or equal than its first `{init_line}`"
                 )
-
-            # Apply range
-            if final_line == -1:
-                file_content = "\n".join(file_lines[init_line - 1 :])
-            else:
-                file_content = "\n".join(file_lines[init_line - 1 : final_line])
+        else:
+            # Read file content
+            file_content = await operator.read_file(path)
 
         # Format and return result
         return CLIResult(
@@ -370,8 +405,8 @@ class StrReplaceEditor(BaseTool):
         # Write the new content to the file
         await operator.write_file(path, new_file_content)
 
-        # Save the original content to history
-        self._file_history[path].append(file_content)
+        # Save a reverse diff to the original content in history
+        self._file_history.record(path, file_content, new_file_content)
 
         # Create a snippet of the edited section
         replacement_line = file_content.split(old_str)[0].count("\n")
@@ -429,7 +464,7 @@ class StrReplaceEditor(BaseTool):
         snippet = "\n".join(snippet_lines)
 
         await operator.write_file(path, new_file_text)
-        self._file_history[path].append(file_text)
+        self._file_history.record(path, file_text, new_file_text)
 
         # Prepare success message
         success_msg = f"The file {path} has been edited. "
@@ -446,16 +481,26 @@ class StrReplaceEditor(BaseTool):
         self, path: PathLike, operator: FileOperator = None
     ) -> CLIResult:
         """Revert the last edit made to a file."""
-        if not self._file_history[path]:
+        if not self._file_history.has_history(path):
             raise ToolError(f"No edit history found for {path}.")
 
-        old_text = self._file_history[path].pop()
+        old_text = self._file_history.undo(path, await operator.read_file(path))
         await operator.write_file(path, old_text)
 
         return CLIResult(
             output=f"Last edit to {path} undone successfully. {self._make_output(old_text, str(path))}"
         )
 
+    def checkpoint_state(self) -> dict:
+        """Undo history, for run checkpoints."""
+        return {"history": self._file_history.to_dict()}
+
+    def restore_state(self, state: dict) -> None:
+        """Restore what `checkpoint_state` returned."""
+        self._file_history = EditHistory.from_dict(
+            state.get("history", {}), max_bytes=self.max_history_bytes
+        )
+
     def _make_output(
         self,
         file_content: str,
@@ -464,7 +509,9 @@ class StrReplaceEditor(BaseTool):
         expand_tabs: bool = True,
     ) -> str:
         """Format file content for display with line numbers."""
-        file_content = maybe_truncate(file_content)
+        # Under an agent, long outputs are stored as artifacts rather than cut
+        if CURRENT_ARTIFACT_STORE.get() is None:
+            file_content = maybe_truncate(file_content)
         if expand_tabs:
             file_content = file_content.expandtabs()
 
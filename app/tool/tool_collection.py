@@ -1,11 +1,82 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from app.exceptions import ToolError
 from app.logger import logger
 from app.tool.base import BaseTool, ToolFailure, ToolResult
 
 
+# Scopes of results that depend only on the outside world, such as web
+# searches; calls with unknown side effects keep them
+EXTERNAL_SCOPE_PREFIX = "web:"
+
+
+class ToolResultCache:
+    """Results of read-only tool calls, reused for identical calls in a run.
+
+    Tools opt in per call with `BaseTool.memo_scope`, naming what the result
+    depends on (e.g. ``file:/workspace/a.py``). Calls invalidate the scopes
+    their tool reports from `BaseTool.invalidated_scopes`; a call whose effects
+    are unknown drops every result outside the external ``web:`` scopes.
+    Failed results are not cached. Each agent owns its cache, since tool
+    collections may be shared by agents running concurrently.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def key(name: str, tool_input: Dict[str, Any]) -> Tuple[str, str]:
+        """Tool name plus canonical JSON of the arguments."""
+        return name, json.dumps(
+            tool_input, sort_keys=True, separators=(",", ":"), default=str
+        )
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple[str, str], scope: str, result: Any) -> None:
+        self._entries[key] = (scope, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, scopes: Optional[Iterable[str]]) -> None:
+        """Drop the results of `scopes`, or all local results if None."""
+        if scopes is None:
+            stale = [
+                key
+                for key, (scope, _) in self._entries.items()
+                if not scope.startswith(EXTERNAL_SCOPE_PREFIX)
+            ]
+        else:
+            scopes = set(scopes)
+            if not scopes:
+                return
+            stale = [
+                key for key, (scope, _) in self._entries.items() if scope in scopes
+            ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget all results and reset the hit counts, e.g. for a new run."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class ToolCollection:
     """A collection of defined tools."""
 
@@ -15,24 +86,82 @@ class ToolCollection:
     def __init__(self, *tools: BaseTool):
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
+        self._params: Optional[List[Dict[str, Any]]] = None
+        self._tool_params: Dict[str, Dict[str, Any]] = {}
+        self._params_tokens: Dict[Callable[[str], int], int] = {}
 
     def __iter__(self):
         return iter(self.tools)
 
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        """Return the function-call schemas of all tools.
+
+        The list is built once and reused until the tool set changes, so callers
+        must treat it as read-only.
+        """
+        if self._params is None:
+            params = []
+            for tool in self.tools:
+                if tool.name not in self._tool_params:
+                    self._tool_params[tool.name] = tool.to_param()
+                params.append(self._tool_params[tool.name])
+            self._params = params
+        return self._params
+
+    def count_params_tokens(self, count_tokens: Callable[[str], int]) -> int:
+        """Return the token cost of `to_params()`, cached per token counter."""
+        if count_tokens not in self._params_tokens:
+            self._params_tokens[count_tokens] = sum(
+                count_tokens(str(param)) for param in self.to_params()
+            )
+        return self._params_tokens[count_tokens]
+
+    def invalidate_params(self, *names: str) -> None:
+        """Drop cached schemas after tools were added, removed or changed.
+
+        Args:
+            *names: Tools whose schemas changed; all schemas are rebuilt if none
+                are given, otherwise the schemas of other tools are reused.
+        """
+        self._params = None
+        self._params_tokens = {}
+        if names:
+            for name in names:
+                self._tool_params.pop(name, None)
+        else:
+            self._tool_params = {}
 
     async def execute(
-        self, *, name: str, tool_input: Dict[str, Any] = None
+        self,
+        *,
+        name: str,
+        tool_input: Dict[str, Any] = None,
+        cache: Optional[ToolResultCache] = None,
     ) -> ToolResult:
+        """Execute a tool, reusing results from `cache` if one is given."""
         tool = self.tool_map.get(name)
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
+        tool_input = tool_input or {}
+        scope = tool.memo_scope(**tool_input) if cache is not None else None
+        if scope is not None:
+            key = cache.key(name, tool_input)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        elif cache is not None:
+            cache.invalidate(tool.invalidated_scopes(**tool_input))
         try:
             result = await tool(**tool_input)
-            return result
         except ToolError as e:
             return ToolFailure(error=e.message)
+        if (
+            scope is not None
+            and result is not None
+            and not getattr(result, "error", None)
+        ):
+            cache.put(key, scope, result)
+        return result
 
     async def execute_all(self) -> List[ToolResult]:
         """Execute all tools in the collection sequentially."""
@@ -59,6 +188,7 @@ class ToolCollection:
 
         self.tools += (tool,)
         self.tool_map[tool.name] = tool
+        self.invalidate_params()
         return self
 
     def add_tools(self, *tools: BaseTool):
@@ -1,8 +1,8 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -17,6 +17,11 @@ from app.tool.search import (
     WebSearchEngine,
 )
 from app.tool.search.base import SearchItem
+from app.utils.html_extract import (
+    DEFAULT_MAX_BYTES,
+    HTML_PARSER_POOL,
+    extract_main_text,
+)
 
 
 class SearchResult(BaseModel):
@@ -107,13 +112,37 @@ class WebContentFetcher:
     """Utility class for fetching web content."""
 
     @staticmethod
-    async def fetch_content(url: str, timeout: int = 10) -> Optional[str]:
+    def _download(
+        url: str, headers: Dict[str, str], timeout: int, max_bytes: int
+    ) -> Tuple[int, bytes, Optional[str]]:
+        """Status, first `max_bytes` of the body and declared charset of a page."""
+        with requests.get(url, headers=headers, timeout=timeout, stream=True) as r:
+            if r.status_code != 200:
+                return r.status_code, b"", None
+            data = bytearray()
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                data += chunk
+                if len(data) >= max_bytes:
+                    break
+            # Without a declared charset the parser detects it from the page
+            declared = "charset" in r.headers.get("content-type", "").lower()
+            encoding = r.encoding if declared else None
+            return r.status_code, bytes(data[:max_bytes]), encoding
+
+    @staticmethod
+    async def fetch_content(
+        url: str, timeout: int = 10, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> Optional[str]:
         """
         Fetch and extract the main content from a webpage.
 
+        Only the first `max_bytes` of the page are downloaded and parsed; the
+        text is extracted in a worker process, off the event loop.
+
         Args:
             url: The URL to fetch content from
             timeout: Request timeout in seconds
+            max_bytes: Bytes of the page considered for extraction
 
         Returns:
             Extracted text content or None if fetching fails
@@ -124,29 +153,22 @@ class WebContentFetcher:
 
         try:
             # Use asyncio to run requests in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: requests.get(url, headers=headers, timeout=timeout)
+            status, data, encoding = await asyncio.to_thread(
+                WebContentFetcher._download, url, headers, timeout, max_bytes
             )
 
-            if response.status_code != 200:
-                logger.warning(
-                    f"Failed to fetch content from {url}: HTTP {response.status_code}"
-                )
+            if status != 200:
+                logger.warning(f"Failed to fetch content from {url}: HTTP {status}")
                 return None
 
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Remove script and style elements
-            for script in soup(["script", "style", "header", "footer", "nav"]):
-                script.extract()
-
-            # Get text content
-            text = soup.get_text(separator="\n", strip=True)
-
-            # Clean up whitespace and limit size (100KB max)
-            text = " ".join(text.split())
-            return text[:10000] if text else None
+            try:
+                text = await HTML_PARSER_POOL.extract(data, 10000, encoding)
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(
+                    f"HTML parser pool unavailable, parsing in a thread: {e}"
+                )
+                text = await asyncio.to_thread(extract_main_text, data, 10000, encoding)
+            return text or None
 
         except Exception as e:
             logger.warning(f"Error fetching content from {url}: {e}")
@@ -198,6 +220,10 @@ class WebSearch(BaseTool):
     }
     content_fetcher: WebContentFetcher = WebContentFetcher()
 
+    def memo_scope(self, **kwargs) -> Optional[str]:
+        """Repeated queries reuse the results instead of spending quota."""
+        return "web:search"
+
     async def execute(
         self,
         query: str,
@@ -0,0 +1,407 @@
+"""Nested timing spans for agent runs, with metrics and trace export.
+
+Spans nest as run → step → think/act → LLM request, tool execution or
+sandbox command, following the async call stack through a context variable.
+Each finished span is
+
+- kept in a bounded in-process buffer, dumped as JSON (`Tracer.dump`),
+- recorded in a latency histogram per span name and target, rendered in the
+  Prometheus text format (`Tracer.render_prometheus`, `GET /metrics`),
+- passed to exporters, such as `OpenTelemetryExporter`.
+
+Tracing is off unless enabled in the `[tracing]` config section; a disabled
+tracer hands out a shared no-op span.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from app.config import TracingSettings, config
+from app.logger import logger
+from app.utils.metrics import Histogram
+
+
+# Numeric attributes that are summed into counters per span name and target
+COUNTED_ATTRIBUTES = ("input_tokens", "completion_tokens", "bytes", "cache_hits")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(Protocol):
+    """Receives spans as they start and end."""
+
+    def on_start(self, span: "Span") -> None:
+        ...
+
+    def on_end(self, span: "Span") -> None:
+        ...
+
+    def shutdown(self) -> None:
+        ...
+
+
+class Span:
+    """A timed operation; use as a context manager to start and end it."""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "target",
+        "attributes",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration",
+        "error",
+        "_start",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, target: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.target = target
+        self.attributes = attributes
+        self.trace_id = ""
+        self.span_id = ""
+        self.parent_id: Optional[str] = None
+        self.start_time = 0  # Unix time in nanoseconds
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add or replace attributes, e.g. token counts known at the end."""
+        self.attributes.update(attributes)
+
+    def set_error(self, error: str) -> None:
+        """Mark the span as failed without an exception, e.g. a tool error."""
+        self.error = error
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        else:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self._token = _current_span.set(self)
+        self.start_time = time.time_ns()
+        self._start = time.perf_counter()
+        self.tracer._on_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "target": self.target,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time / 1e9,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for spans while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def set_error(self, error: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans and aggregates the finished ones."""
+
+    def __init__(self, enabled: bool = False, max_spans: int = 10000):
+        self.enabled = enabled
+        self.exporters: List[SpanExporter] = []
+        self._spans: deque = deque(maxlen=max_spans)
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str, str], float] = {}
+        # Spans end on the event loop, metrics are read by the HTTP thread
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def span(self, name: str, target: str = "", **attributes: Any):
+        """A span for `name` (e.g. "tool.execute") on `target` (e.g. "bash").
+
+        Usage:
+            with tracer.span("llm.request", target=model) as span:
+                response = await client.chat.completions.create(...)
+                span.set(input_tokens=response.usage.prompt_tokens)
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, target, attributes)
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        self.exporters.append(exporter)
+
+    def _on_start(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.on_start(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+    def _on_end(self, span: Span) -> None:
+        key = (span.name, span.target)
+        with self._lock:
+            self._spans.append(span)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(span.duration, span.error is not None)
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)):
+                    counter = (span.name, span.target, attribute)
+                    self._counters[counter] = self._counters.get(counter, 0) + value
+        for exporter in self.exporters:
+            try:
+                exporter.on_end(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Finished spans, oldest first, as JSON-ready dicts."""
+        with self._lock:
+            spans = list(self._spans)
+        return [span.to_dict() for span in spans]
+
+    def dump(self, path: Path) -> None:
+        """Write the buffered spans to `path` as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.spans(), default=str), encoding="utf-8")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Latency summary per "name:target", e.g. "tool.execute:bash"."""
+        with self._lock:
+            items = list(self._histograms.items())
+        return {
+            f"{name}:{target}" if target else name: histogram.summary()
+            for (name, target), histogram in items
+        }
+
+    def render_prometheus(self) -> str:
+        """Span histograms and counters in the Prometheus text format."""
+        with self._lock:
+            histograms = [
+                (key, list(h.buckets), list(h.counts), h.total, h.count, h.errors)
+                for key, h in self._histograms.items()
+            ]
+            counters = list(self._counters.items())
+
+        lines = [
+            "# HELP openmanus_span_duration_seconds Duration of traced operations.",
+            "# TYPE openmanus_span_duration_seconds histogram",
+        ]
+        errors = []
+        for (name, target), buckets, counts, total, count, failed in histograms:
+            labels = f'span="{_escape(name)}",target="{_escape(target)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'openmanus_span_duration_seconds_bucket{{{labels},le="{le}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f"openmanus_span_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"openmanus_span_duration_seconds_count{{{labels}}} {count}")
+            errors.append(f"openmanus_span_errors_total{{{labels}}} {failed}")
+
+        lines += [
+            "# HELP openmanus_span_errors_total Traced operations that failed.",
+            "# TYPE openmanus_span_errors_total counter",
+            *errors,
+        ]
+        for attribute in COUNTED_ATTRIBUTES:
+            metric = f"openmanus_{attribute}_total"
+            lines += [
+                f"# HELP {metric} Sum of the {attribute} attribute of spans.",
+                f"# TYPE {metric} counter",
+            ]
+            for (name, target, counted), value in counters:
+                if counted == attribute:
+                    lines.append(
+                        f'{metric}{{span="{_escape(name)}",target="{_escape(target)}"}}'
+                        f" {value}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve `GET /metrics` (Prometheus) and `GET /trace` (JSON) in a thread."""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = tracer.render_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/trace":
+                    body = json.dumps(tracer.spans(), default=str).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{self._server.server_port}")
+        return self._server
+
+    def shutdown(self) -> None:
+        """Stop the metrics server and flush exporters."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for exporter in self.exporters:
+            exporter.shutdown()
+        self.exporters.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class OpenTelemetryExporter:
+    """Mirrors spans to OpenTelemetry, by default over OTLP/HTTP.
+
+    Needs the optional `opentelemetry-sdk` and
+    `opentelemetry-exporter-otlp-proto-http` packages. Without an `endpoint`,
+    the OTLP exporter reads the standard `OTEL_EXPORTER_OTLP_*` variables.
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        service_name: str = "openmanus",
+        tracer_provider: Any = None,
+    ):
+        try:
+            from opentelemetry import trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.trace import Status, StatusCode
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetry export needs `pip install opentelemetry-sdk "
+                "opentelemetry-exporter-otlp-proto-http`"
+            ) from e
+
+        if tracer_provider is None:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            tracer_provider = TracerProvider(
+                resource=Resource.create({"service.name": service_name})
+            )
+            tracer_provider.add_span_processor(
+                BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint))
+            )
+        self._trace = trace
+        self._error_status = Status(StatusCode.ERROR)
+        self._provider = tracer_provider
+        self._tracer = tracer_provider.get_tracer("openmanus")
+        # OpenTelemetry spans of our spans that have not ended yet
+        self._live: Dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._live.get(span.parent_id)
+        self._live[span.span_id] = self._tracer.start_span(
+            span.name,
+            context=self._trace.set_span_in_context(parent) if parent else None,
+            start_time=span.start_time,
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        if span.target:
+            otel_span.set_attribute("target", span.target)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if span.error:
+            otel_span.set_attribute("error.type", span.error)
+            otel_span.set_status(self._error_status)
+        otel_span.end(end_time=span.start_time + int(span.duration * 1e9))
+
+    def shutdown(self) -> None:
+        self._provider.shutdown()
+
+
+def _create_tracer(settings: Optional[TracingSettings]) -> Tracer:
+    settings = settings or TracingSettings()
+    return Tracer(enabled=settings.enabled, max_spans=settings.max_spans)
+
+
+tracer = _create_tracer(config.tracing)
+
+
+def start_tracing() -> None:
+    """Start the metrics server and exporters configured in `[tracing]`."""
+    settings = config.tracing
+    if not settings or not settings.enabled:
+        return
+    if settings.metrics_port is not None:
+        tracer.serve(settings.metrics_port, settings.metrics_host)
+    if settings.otlp_endpoint:
+        tracer.add_exporter(OpenTelemetryExporter(settings.otlp_endpoint))
+
+
+def stop_tracing() -> None:
+    """Write the configured trace file, then stop the server and exporters."""
+    settings = config.tracing
+    if not settings or not settings.enabled:
+        return
+    if settings.trace_file:
+        tracer.dump(config.root_path / settings.trace_file)
+        logger.info(f"Trace written to {settings.trace_file}")
+    tracer.shutdown()
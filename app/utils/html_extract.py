@@ -0,0 +1,211 @@
+"""Main-text extraction from HTML with pluggable parser backends.
+
+Backends, in order of preference when installed:
+
+* ``lxml``: libxml2 fed incrementally, so extraction stops as soon as enough
+  text was collected instead of parsing the whole document;
+* ``selectolax``: lexbor, parses the (size-capped) document in one pass;
+* ``html.parser``: BeautifulSoup with the pure-Python parser, always available.
+
+Parsing is CPU-bound, so `HtmlParserPool` runs extraction in worker
+processes with a bounded number of queued jobs. This module must stay free of
+``app`` imports so that worker processes start quickly.
+"""
+
+import asyncio
+import multiprocessing
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+
+# Elements whose text is not main content
+SKIP_TAGS = frozenset({"script", "style", "header", "footer", "nav"})
+
+DEFAULT_MAX_CHARS: int = 10_000
+# Bytes of a document considered for extraction
+DEFAULT_MAX_BYTES: int = 512 * 1024
+CHUNK_SIZE: int = 64 * 1024
+
+Extractor = Callable[[bytes, int, Optional[str]], str]
+
+BACKENDS: Dict[str, Extractor] = {}
+
+
+def register_backend(name: str, extractor: Extractor) -> None:
+    """Make `extractor(data, max_chars, encoding)` available as `name`."""
+    BACKENDS[name] = extractor
+
+
+def _collapse(parts: Iterable[str], max_chars: int) -> str:
+    return " ".join("".join(parts).split())[:max_chars]
+
+
+def _extract_html_parser(data: bytes, max_chars: int, encoding: Optional[str]) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(data, "html.parser", from_encoding=encoding)
+    for element in soup(list(SKIP_TAGS)):
+        element.extract()
+    return _collapse([soup.get_text(separator="\n", strip=True)], max_chars)
+
+
+register_backend("html.parser", _extract_html_parser)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _LexborParser
+except ImportError:  # pragma: no cover - optional dependency
+    _LexborParser = None
+
+if _LexborParser is not None:
+
+    def _extract_selectolax(
+        data: bytes, max_chars: int, encoding: Optional[str]
+    ) -> str:
+        tree = _LexborParser(data.decode(encoding or "utf-8", errors="replace"))
+        tree.strip_tags(list(SKIP_TAGS))
+        if tree.root is None:
+            return ""
+        return _collapse([tree.root.text(separator="\n", strip=True)], max_chars)
+
+    register_backend("selectolax", _extract_selectolax)
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional dependency
+    etree = None
+
+if etree is not None:
+
+    class _TextCollector:
+        """lxml parser target collecting text outside of `SKIP_TAGS`."""
+
+        def __init__(self):
+            self.parts: List[str] = []
+            self.chars = 0
+            self._skip = 0
+
+        def start(self, tag, attrib):
+            if tag in SKIP_TAGS:
+                self._skip += 1
+            self.parts.append("\n")
+
+        def end(self, tag):
+            if tag in SKIP_TAGS and self._skip:
+                self._skip -= 1
+            self.parts.append("\n")
+
+        def data(self, text):
+            if not self._skip:
+                self.parts.append(text)
+                self.chars += len(text)
+
+        def close(self):
+            return self.parts
+
+    def _extract_lxml(data: bytes, max_chars: int, encoding: Optional[str]) -> str:
+        collector = _TextCollector()
+        parser = etree.HTMLParser(
+            target=collector, encoding=encoding, recover=True, no_network=True
+        )
+        for start in range(0, len(data), CHUNK_SIZE):
+            parser.feed(data[start : start + CHUNK_SIZE])
+            # Raw text includes whitespace; stop once it surely suffices
+            if collector.chars >= 2 * max_chars and (
+                len(_collapse(collector.parts, max_chars)) >= max_chars
+            ):
+                break
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        return _collapse(collector.parts, max_chars)
+
+    register_backend("lxml", _extract_lxml)
+
+
+def default_backend() -> str:
+    for name in ("lxml", "selectolax", "html.parser"):
+        if name in BACKENDS:
+            return name
+    return "html.parser"
+
+
+def extract_main_text(
+    data: Union[bytes, str],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    encoding: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> str:
+    """Visible text of an HTML document, whitespace collapsed, without
+    scripts, styles, headers, footers and navigation.
+
+    Args:
+        data: The document, or its first bytes.
+        max_chars: Length of the returned text at most.
+        encoding: Document encoding; detected by the parser if not given.
+        backend: Name of a registered backend; the fastest available if None.
+    """
+    if isinstance(data, str):
+        data, encoding = data.encode("utf-8"), "utf-8"
+    extractor = BACKENDS[backend or default_backend()]
+    return extractor(data, max_chars, encoding)
+
+
+class HtmlParserPool:
+    """Runs `extract_main_text` in worker processes.
+
+    At most `max_queued` jobs are submitted at a time; further callers wait,
+    which bounds the memory held by documents queued for parsing. If the
+    pool breaks (e.g. a worker was killed) it is recreated on the next call.
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 8):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._executor: Optional[Executor] = None
+        # Queue slots per event loop, as asyncio primitives bind to one loop
+        self._slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # Spawned workers do not inherit the parent's threads and locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def extract(
+        self,
+        data: bytes,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        encoding: Optional[str] = None,
+        backend: Optional[str] = None,
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_queued)
+        async with slots:
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(),
+                    extract_main_text,
+                    data,
+                    max_chars,
+                    encoding,
+                    backend,
+                )
+            except BrokenProcessPool:
+                self.shutdown()
+                raise
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+HTML_PARSER_POOL = HtmlParserPool()
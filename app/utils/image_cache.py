@@ -0,0 +1,223 @@
+"""Image decoding, validation and compression off the event loop, with caching.
+
+PIL work is CPU-bound, so it runs on a small dedicated thread pool (PIL
+releases the GIL while decoding, resizing and encoding). Results are memoised
+by content hash in a bounded LRU cache; compressed images are cached with
+their base64 encoding, so viewing the same image again costs one hash.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+from PIL import Image
+
+
+SUPPORTED_FORMATS = {"JPEG", "PNG", "GIF", "BMP", "WEBP", "TIFF"}
+MAX_DIMENSION = 8192
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CompressedImage:
+    base64: str
+    mime_type: str
+    size: int  # Compressed size in bytes
+
+
+class ImageCache:
+    """LRU cache bounded by the total size of the cached values."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+IMAGE_CACHE = ImageCache()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                thread_name_prefix="image",
+            )
+        return _EXECUTOR
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor(), func, *args)
+
+
+def compress_image(
+    image_bytes: bytes,
+    mime_type: str,
+    max_width: int = 1920,
+    max_height: int = 1080,
+    jpeg_quality: int = 85,
+    png_compress_level: int = 6,
+) -> Tuple[bytes, str]:
+    """Flatten transparency, fit the image into the given box and re-encode it.
+
+    GIF and PNG keep their format, everything else becomes JPEG. The input is
+    returned unchanged if it cannot be decoded.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        if img.mode in ("RGBA", "LA", "P"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            if img.mode == "P":
+                img = img.convert("RGBA")
+            background.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
+            img = background
+        width, height = img.size
+        if width > max_width or height > max_height:
+            ratio = min(max_width / width, max_height / height)
+            new_size = (int(width * ratio), int(height * ratio))
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        if mime_type == "image/gif":
+            img.save(output, format="GIF", optimize=True)
+            output_mime = "image/gif"
+        elif mime_type == "image/png":
+            img.save(
+                output, format="PNG", optimize=True, compress_level=png_compress_level
+            )
+            output_mime = "image/png"
+        else:
+            img.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+            output_mime = "image/jpeg"
+        return output.getvalue(), output_mime
+    except Exception:
+        return image_bytes, mime_type
+
+
+def _compress_and_encode(image_bytes: bytes, mime_type: str, options: tuple):
+    data, output_mime = compress_image(image_bytes, mime_type, *options)
+    return CompressedImage(
+        base64=base64.b64encode(data).decode("utf-8"),
+        mime_type=output_mime,
+        size=len(data),
+    )
+
+
+async def compress_image_cached(
+    image_bytes: bytes,
+    mime_type: str,
+    max_width: int = 1920,
+    max_height: int = 1080,
+    jpeg_quality: int = 85,
+    png_compress_level: int = 6,
+    cache: ImageCache = IMAGE_CACHE,
+) -> CompressedImage:
+    """`compress_image` on the image pool, memoised with its base64 output."""
+    options = (max_width, max_height, jpeg_quality, png_compress_level)
+    digest = await _run(_sha256, image_bytes)
+    key = ("compress", digest, mime_type, options)
+    image = cache.get(key)
+    if image is None:
+        image = await _run(_compress_and_encode, image_bytes, mime_type, options)
+        cache.put(key, image, len(image.base64))
+    return image
+
+
+def validate_base64_image(
+    base64_string: str, max_size_mb: int = 10
+) -> Tuple[bool, str]:
+    """Check that a base64 string (or data URL) holds a supported image.
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if not base64_string or len(base64_string) < 10:
+        return False, "Base64 string is empty or too short"
+    if base64_string.startswith("data:"):
+        if "," not in base64_string:
+            return False, "Invalid data URL format"
+        base64_string = base64_string.split(",", 1)[1]
+    if len(base64_string) % 4 != 0:
+        return False, "Invalid base64 string length"
+    try:
+        # validate=True rejects characters outside the base64 alphabet
+        image_data = base64.b64decode(base64_string, validate=True)
+    except (binascii.Error, ValueError) as e:
+        return False, f"Base64 decoding failed: {str(e)}"
+    max_size_bytes = max_size_mb * 1024 * 1024
+    if len(image_data) > max_size_bytes:
+        return False, f"Image size exceeds limit ({max_size_bytes} bytes)"
+    try:
+        # Format and size come from the header; verify() then checks the data
+        with Image.open(io.BytesIO(image_data)) as img:
+            if img.format not in SUPPORTED_FORMATS:
+                return False, f"Unsupported image format: {img.format}"
+            width, height = img.size
+            if width > MAX_DIMENSION or height > MAX_DIMENSION:
+                return (
+                    False,
+                    f"Image dimensions exceed limit ({MAX_DIMENSION}x{MAX_DIMENSION})",
+                )
+            if width < 1 or height < 1:
+                return False, f"Invalid image dimensions: {width}x{height}"
+            img.verify()
+    except Exception as e:
+        return False, f"Invalid image data: {str(e)}"
+    return True, "Valid image"
+
+
+async def validate_base64_image_cached(
+    base64_string: str, max_size_mb: int = 10, cache: ImageCache = IMAGE_CACHE
+) -> Tuple[bool, str]:
+    """`validate_base64_image` on the image pool, memoised by content hash."""
+    digest = await _run(_sha256, base64_string.encode())
+    key = ("validate", digest, max_size_mb)
+    result = cache.get(key)
+    if result is None:
+        result = await _run(validate_base64_image, base64_string, max_size_mb)
+        cache.put(key, result, len(result[1]))
+    return result
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,99 @@
+"""Startup import timing report.
+
+Imports each target module in a fresh interpreter with ``-X importtime`` and
+prints where the time went, per module and per top-level package.
+
+Usage:
+    python -m app.utils.import_profile main app.mcp.server --top 20
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List
+
+from app.config import PROJECT_ROOT
+
+
+@dataclass
+class ImportTiming:
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse the ``-X importtime`` report written to stderr."""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        except ValueError:
+            continue
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def profile_import(module: str) -> List[ImportTiming]:
+    """Import `module` in a child interpreter and return its import timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def by_package(timings: List[ImportTiming]) -> Dict[str, int]:
+    """Sum self time per top-level package (app.* modules are kept separate)."""
+    totals: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        parts = timing.name.split(".")
+        key = ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+        totals[key] += timing.self_us
+    return dict(totals)
+
+
+def format_report(module: str, timings: List[ImportTiming], top: int = 15) -> str:
+    total_us = sum(t.self_us for t in timings)
+    lines = [f"Import of {module}: {total_us / 1000:.1f} ms, {len(timings)} modules"]
+
+    lines.append(f"\n  Top {top} packages by self time:")
+    packages = sorted(by_package(timings).items(), key=lambda kv: -kv[1])
+    for name, self_us in packages[:top]:
+        lines.append(f"    {self_us / 1000:9.1f} ms  {name}")
+
+    lines.append(f"\n  Top {top} modules by cumulative time:")
+    for timing in sorted(timings, key=lambda t: -t.cumulative_us)[:top]:
+        lines.append(
+            f"    {timing.cumulative_us / 1000:9.1f} ms  "
+            f"(self {timing.self_us / 1000:7.1f} ms)  {timing.name}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report import cost per module")
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=["main", "app.mcp.server"],
+        help="Modules to import (default: main app.mcp.server)",
+    )
+    parser.add_argument("--top", type=int, default=15, help="Rows per section")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        print(format_report(module, profile_import(module), args.top))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Lightweight in-process metrics."""
+
+import bisect
+import math
+from typing import Dict, List, Sequence
+
+
+# Upper bounds in seconds, suited to tool and network calls
+DEFAULT_BUCKETS: Sequence[float] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    math.inf,
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram that also counts errors.
+
+    Quantiles are estimated as the upper bound of the bucket they fall in, so
+    recording is O(log buckets) and memory does not grow with the sample count.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets: List[float] = sorted(buckets)
+        if self.buckets[-1] != math.inf:
+            self.buckets.append(math.inf)
+        self.counts: List[int] = [0] * len(self.buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.errors += int(error)
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile (0 if empty)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
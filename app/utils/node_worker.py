@@ -0,0 +1,232 @@
+"""Pool of long-lived Node workers speaking newline-delimited JSON over stdio.
+
+Each request is written as one line, ``{"id": <int>, "params": {...}}``, and
+answered by one line, ``{"id": <int>, "result": {...}}`` or
+``{"id": <int>, "error": "<message>"}``. Responses may arrive in any order, so
+a single worker serves many requests at once.
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from app.logger import logger
+
+
+# Largest single response line accepted from a worker
+STREAM_LIMIT: int = 16 * 1024 * 1024
+
+CommandFactory = Callable[[], Awaitable[Sequence[str]]]
+
+
+class NodeWorkerError(RuntimeError):
+    """Raised when a worker rejects a request or dies before answering it."""
+
+
+class NodeWorker:
+    """One worker process with its in-flight requests keyed by id."""
+
+    def __init__(self, command: Sequence[str], cwd: Optional[str] = None):
+        self.command = list(command)
+        self.cwd = cwd
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._stderr_tail: Deque[str] = deque(maxlen=20)
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def load(self) -> int:
+        """Number of requests waiting for a response."""
+        return len(self._pending)
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            limit=STREAM_LIMIT,
+        )
+        self._tasks = [
+            asyncio.create_task(self._read_responses()),
+            asyncio.create_task(self._read_stderr()),
+        ]
+        logger.info(f"Started Node worker pid={self._process.pid}")
+
+    def submit(self, params: dict) -> Tuple[int, asyncio.Future]:
+        """Write one request and register it as in flight, without awaiting."""
+        if not self.alive:
+            raise NodeWorkerError("Node worker is not running")
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps({"id": request_id, "params": params}, ensure_ascii=False)
+        self._process.stdin.write(line.encode("utf-8") + b"\n")
+        return request_id, future
+
+    async def response(self, request_id: int, future: asyncio.Future) -> dict:
+        """Wait for the response of a submitted request."""
+        try:
+            await self._process.stdin.drain()
+            return await future
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise NodeWorkerError(f"Node worker is not accepting requests: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def request(self, params: dict) -> dict:
+        """Send one request and wait for its response."""
+        return await self.response(*self.submit(params))
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Close stdin so the worker drains and exits, killing it if it hangs."""
+        if self._process is None:
+            return
+        if self._process.returncode is None:
+            try:
+                self._process.stdin.close()
+                await asyncio.wait_for(self._process.wait(), timeout)
+            except (asyncio.TimeoutError, ProcessLookupError, BrokenPipeError):
+                self.kill()
+        for task in self._tasks:
+            task.cancel()
+
+    def kill(self) -> None:
+        if self._process is not None and self._process.returncode is None:
+            try:
+                self._process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def _read_responses(self) -> None:
+        try:
+            while line := await self._process.stdout.readline():
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.debug(f"Ignoring non-JSON worker output: {line[:200]!r}")
+                    continue
+                future = self._pending.get(message.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(NodeWorkerError(message["error"]))
+                else:
+                    future.set_result(message.get("result") or {})
+        except Exception as e:
+            logger.error(f"Node worker stdout reader failed: {e}")
+        finally:
+            await self._process.wait()
+            self._fail_pending()
+
+    async def _read_stderr(self) -> None:
+        while line := await self._process.stderr.readline():
+            text = line.decode("utf-8", errors="replace").rstrip()
+            self._stderr_tail.append(text)
+            logger.debug(f"[node worker] {text}")
+
+    def _fail_pending(self) -> None:
+        if not self._pending:
+            return
+        stderr = "\n".join(self._stderr_tail)
+        error = NodeWorkerError(
+            f"Node worker exited with code {self._process.returncode}: {stderr}"
+        )
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+class NodeWorkerPool:
+    """Bounded pool of `NodeWorker` processes.
+
+    At most `max_concurrency` requests are in flight across the pool. Requests
+    go to the least loaded worker, and a new worker is only spawned when every
+    running one is busy. Workers that crashed are replaced on the next request.
+    """
+
+    def __init__(
+        self,
+        command: Union[Sequence[str], CommandFactory],
+        cwd: Optional[str] = None,
+        size: int = 2,
+        max_concurrency: int = 4,
+        request_timeout: Optional[float] = 300,
+    ):
+        self._command = command
+        self.cwd = cwd
+        self.size = max(1, size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+        self._workers: List[NodeWorker] = []
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._lock = asyncio.Lock()
+
+    @property
+    def workers(self) -> List[NodeWorker]:
+        return list(self._workers)
+
+    async def request(self, params: dict) -> dict:
+        """Run one request on a worker, waiting for a free slot if needed.
+
+        Raises:
+            NodeWorkerError: If the worker reports an error or dies.
+            asyncio.TimeoutError: If no response arrives within `request_timeout`.
+        """
+        async with self._semaphore:
+            worker = await self._pick_worker()
+            # Submit right away so the worker's load counts this request
+            request_id, future = worker.submit(params)
+            return await asyncio.wait_for(
+                worker.response(request_id, future), self.request_timeout
+            )
+
+    async def close(self) -> None:
+        async with self._lock:
+            workers, self._workers = self._workers, []
+        await asyncio.gather(*(worker.close() for worker in workers))
+
+    def kill(self) -> None:
+        """Kill all workers without waiting, e.g. when their loop is gone."""
+        for worker in self._workers:
+            worker.kill()
+        self._workers = []
+
+    async def _pick_worker(self) -> NodeWorker:
+        async with self._lock:
+            dead = [worker for worker in self._workers if not worker.alive]
+            for worker in dead:
+                logger.warning("Replacing crashed Node worker")
+                self._workers.remove(worker)
+                await worker.close()
+
+            idle = min(self._workers, key=lambda w: w.load, default=None)
+            if idle is not None and (idle.load == 0 or len(self._workers) >= self.size):
+                return idle
+
+            command = self._command
+            if callable(command):
+                command = await command()
+            worker = NodeWorker(command, cwd=self.cwd)
+            await worker.start()
+            self._workers.append(worker)
+            return worker
@@ -0,0 +1,319 @@
+"""Agent loop benchmark against a local stub LLM server.
+
+Runs the ToolCallAgent, Manus, PlanningFlow and MCPAgent loops against the
+scripted OpenAI-compatible server in `stub_llm`, so results are reproducible
+and need no network or API key. Each scenario runs in a fresh process and
+reports steps per second, the latency of each phase of a step (message
+formatting, token counting, the HTTP request, tool execution) and the peak
+RSS of the process. Results can be saved as a baseline and later runs
+compared against it; the exit status is 1 if a metric regressed by more
+than `--threshold`.
+
+Usage:
+    python -m examples.benchmarks.agent_loop --tasks 5 --latency-ms 20
+    python -m examples.benchmarks.agent_loop --save-baseline bench.json
+    python -m examples.benchmarks.agent_loop --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from examples.benchmarks.stub_llm import StubConfig, StubServer
+
+
+SCENARIOS = ("toolcall", "manus", "flow", "mcp")
+PHASES = ("format", "tokens", "http", "tool", "step")
+# Phase latency changes smaller than this are noise, whatever the ratio
+MIN_REGRESSION_MS = 0.1
+
+# Finer than the default buckets: formatting and counting take microseconds
+PHASE_BUCKETS = tuple(
+    base * scale
+    for scale in (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+    for base in (1.0, 2.5, 5.0)
+)
+
+
+class ApproxTokenizer:
+    """Four characters per token; used when tiktoken cannot load offline."""
+
+    def encode(self, text: str) -> List[int]:
+        return [0] * (len(text) // 4 + 1)
+
+
+def _timed(histogram, func: Callable) -> Callable:
+    # The openai SDK wraps its async methods in plain decorators
+    if inspect.iscoroutinefunction(inspect.unwrap(func)):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, error)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def instrument(llm) -> Dict[str, Any]:
+    """Wrap the phases of an agent step with histograms.
+
+    The hooks are patched in rather than built into the agents, so the
+    benchmark measures the code as shipped.
+    """
+    from app.agent.react import ReActAgent
+    from app.agent.toolcall import ToolCallAgent
+    from app.llm import LLM
+    from app.utils.metrics import Histogram
+
+    histograms = {phase: Histogram(PHASE_BUCKETS) for phase in PHASES}
+    LLM.format_messages = staticmethod(
+        _timed(histograms["format"], LLM.format_messages)
+    )
+    LLM.count_tokens = _timed(histograms["tokens"], LLM.count_tokens)
+    LLM.count_message_tokens = _timed(histograms["tokens"], LLM.count_message_tokens)
+    completions = llm.client.chat.completions
+    completions.create = _timed(histograms["http"], completions.create)
+    ToolCallAgent.execute_tool = _timed(histograms["tool"], ToolCallAgent.execute_tool)
+    ReActAgent.step = _timed(histograms["step"], ReActAgent.step)
+    return histograms
+
+
+def setup_llm(base_url: str) -> tuple:
+    """Point the shared LLM at the stub; returns it and the tokenizer used."""
+    from app.config import LLMSettings
+    from app.llm import LLM
+
+    settings = LLMSettings(
+        model="gpt-4o",
+        base_url=base_url,
+        api_key="stub",
+        max_tokens=1024,
+        temperature=0.0,
+        api_type="openai",
+        api_version="",
+    )
+    LLM._instances.clear()
+    llm = LLM("default", llm_config={"default": settings})
+    try:
+        llm.tokenizer
+        tokenizer = "tiktoken"
+    except Exception:
+        llm._tokenizer = ApproxTokenizer()
+        tokenizer = "approximate"
+    return llm, tokenizer
+
+
+async def run_scenario(scenario: str, tasks: int) -> None:
+    """Run `tasks` tasks of `scenario`, each with a fresh agent."""
+    from app.agent.mcp import MCPAgent
+    from app.agent.toolcall import ToolCallAgent
+    from app.flow.planning import PlanningFlow
+
+    for i in range(tasks):
+        prompt = f"Benchmark task {i}"
+        if scenario == "toolcall":
+            await ToolCallAgent().run(prompt)
+        elif scenario == "manus":
+            from app.agent.manus import Manus
+
+            agent = await Manus.create()
+            try:
+                await agent.run(prompt)
+            finally:
+                await agent.cleanup()
+        elif scenario == "flow":
+            flow = PlanningFlow(agents={"executor": ToolCallAgent()})
+            await flow.execute(prompt)
+        elif scenario == "mcp":
+            # MCP tools are prefixed (mcp_<server>_terminate), which MCPAgent
+            # does not treat as terminating, so its tasks run to max_steps
+            agent = MCPAgent()
+            await agent.initialize(
+                connection_type="stdio",
+                command=sys.executable,
+                args=["-m", "app.mcp.server"],
+            )
+            await agent.run(prompt)
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def _worker(scenario: str, base_url: str, tasks: int, log_level: str, queue) -> None:
+    """Child process entry point; reports one result dict through `queue`."""
+    from app.logger import define_log_level
+
+    define_log_level(print_level=log_level, logfile_level=log_level)
+    llm, tokenizer = setup_llm(base_url)
+    histograms = instrument(llm)
+    start = time.perf_counter()
+    asyncio.run(run_scenario(scenario, tasks))
+    elapsed = time.perf_counter() - start
+    # Agents reset their step counter on finishing; count the steps run
+    steps = histograms["step"].count
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    queue.put(
+        {
+            "scenario": scenario,
+            "tasks": tasks,
+            "steps": steps,
+            "seconds": elapsed,
+            "steps_per_sec": steps / elapsed if elapsed else 0.0,
+            "peak_rss_mb": rss_mb,
+            "tokenizer": tokenizer,
+            "phases": {name: h.summary() for name, h in histograms.items()},
+        }
+    )
+
+
+def run_isolated(scenario: str, base_url: str, tasks: int, log_level: str) -> dict:
+    """Run a scenario in a fresh process so peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_worker, args=(scenario, base_url, tasks, log_level, queue)
+    )
+    process.start()
+    try:
+        result = queue.get(timeout=600)
+    finally:
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+    return result
+
+
+def headline(result: dict) -> Dict[str, float]:
+    """Metrics compared against the baseline; lower is better except steps/s."""
+    metrics = {
+        "steps_per_sec": result["steps_per_sec"],
+        "peak_rss_mb": result["peak_rss_mb"],
+    }
+    for phase, summary in result["phases"].items():
+        if summary["count"]:
+            metrics[f"{phase}_mean_ms"] = summary["mean"] * 1000
+    return metrics
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> List[str]:
+    """Describe the deltas to `baseline`; regressions are marked with `!`."""
+    lines = []
+    current = headline(result)
+    for name, old in baseline.items():
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        delta = (new - old) / old
+        worse = -delta if name == "steps_per_sec" else delta
+        noise = name.endswith("_ms") and new - old < MIN_REGRESSION_MS
+        mark = "!" if worse > threshold and not noise else " "
+        lines.append(f"  {mark} {name:<18} {old:10.3f} -> {new:10.3f} ({delta:+.1%})")
+    return lines
+
+
+def report(result: dict) -> str:
+    lines = [
+        f"{result['scenario']:<9} {result['steps']:>5} steps  "
+        f"{result['seconds']:7.2f} s  {result['steps_per_sec']:8.1f} steps/s  "
+        f"peak RSS {result['peak_rss_mb']:7.1f} MB  "
+        f"tokenizer {result['tokenizer']}"
+    ]
+    for phase, summary in result["phases"].items():
+        if not summary["count"]:
+            continue
+        lines.append(
+            f"  {phase:<7} n={summary['count']:<6} "
+            f"mean {summary['mean'] * 1000:8.3f} ms  "
+            f"p50 {summary['p50'] * 1000:8.3f} ms  "
+            f"p95 {summary['p95'] * 1000:8.3f} ms  errors {summary['errors']}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent loop benchmark")
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--tasks", type=int, default=3, help="Tasks per scenario")
+    parser.add_argument("--steps-per-task", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit-every", type=int, default=0, help="Answer every n-th with 429"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--baseline", type=Path, help="Compare against this file")
+    parser.add_argument("--save-baseline", type=Path, help="Write results here")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Allowed regression (0.1 = 10%%)"
+    )
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every,
+        steps_per_task=args.steps_per_task,
+        seed=args.seed,
+    )
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+
+    results = {}
+    regressed = False
+    with tempfile.TemporaryDirectory() as workdir, StubServer(config) as server:
+        # The editor views a small file rather than a whole directory
+        notes = Path(workdir) / "notes.txt"
+        notes.write_text("".join(f"line {i}\n" for i in range(200)))
+        config.tool_args["str_replace_editor"] = {
+            "command": "view",
+            "path": str(notes),
+            "view_range": ["{turn}", -1],
+        }
+
+        for scenario in args.scenarios:
+            result = run_isolated(scenario, server.base_url, args.tasks, args.log_level)
+            results[scenario] = headline(result)
+            print(report(result))
+            if scenario in baseline:
+                deltas = compare(result, baseline[scenario], args.threshold)
+                print("\n".join(deltas))
+                regressed |= any(line.lstrip().startswith("!") for line in deltas)
+        print(f"stub: {server.requests} requests")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Throughput of the OpenManus MCP server under N concurrent clients.
+
+Each client opens its own MCP session against one in-process server and calls
+the bash tool repeatedly. Because every session gets its own shell, calls of
+different clients run in parallel.
+
+Usage:
+    python -m examples.benchmarks.mcp_throughput --clients 1 4 16 --calls 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from app.mcp.server import MCPServer
+
+
+async def run_client(server: MCPServer, calls: int, command: str) -> List[float]:
+    """Open one session and return the latency of each call in seconds."""
+    latencies = []
+    async with create_connected_server_and_client_session(
+        server.server._mcp_server
+    ) as client:
+        for _ in range(calls):
+            start = time.perf_counter()
+            result = await client.call_tool("bash", {"command": command})
+            latencies.append(time.perf_counter() - start)
+            if result.isError:
+                raise RuntimeError(f"Tool call failed: {result.content}")
+    return latencies
+
+
+async def run(clients: int, calls: int, command: str) -> str:
+    server = MCPServer(tools=["bash"], max_sessions=max(clients, 1))
+    server.register_all_tools()
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_client(server, calls, command) for _ in range(clients))
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.cleanup()
+
+    latencies = sorted(latency for result in results for latency in result)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    return (
+        f"{clients:>4} clients  {len(latencies):>6} calls  {elapsed:7.2f} s  "
+        f"{len(latencies) / elapsed:8.1f} calls/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MCP server throughput benchmark")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1, 4, 16], help="Client counts"
+    )
+    parser.add_argument("--calls", type=int, default=20, help="Calls per client")
+    parser.add_argument(
+        "--command", default="sleep 0.05; echo ok", help="Bash command per call"
+    )
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        print(asyncio.run(run(clients, args.calls, args.command)))
+
+
+if __name__ == "__main__":
+    main()
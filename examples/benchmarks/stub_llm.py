@@ -0,0 +1,285 @@
+"""OpenAI-compatible chat completions server with scripted tool calls.
+
+The stub answers `POST /v1/chat/completions` without a model: requests that
+offer the planning tool get a plan, other tool requests get a call to a
+cheap "work" tool, and every `steps_per_task`-th reply of a conversation
+calls `terminate`. Replies without tools (e.g. a flow's final summary) are
+plain text, streamed if asked to. Latency, jitter and rate limiting (429)
+are configurable, so agent loops can be benchmarked offline.
+
+Usage:
+    python -m examples.benchmarks.stub_llm --port 8089 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+# Work tools by preference, with their arguments; matched by name suffix so
+# that prefixed MCP tools (mcp_<server>_bash) are found too. "{turn}" in a
+# string is replaced by the turn number (a bare "{turn}" by the int), so the
+# calls differ per turn and do not trip the agents' loop detection.
+DEFAULT_TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "str_replace_editor": {"command": "view", "path": "/tmp"},
+    "bash": {"command": "echo ok {turn}"},
+    "create_chat_completion": {"response": "ok {turn}"},
+    "python_execute": {"code": "print('ok', {turn})"},
+}
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Answer every n-th request with 429 (0 disables)
+    rate_limit_every: int = 0
+    steps_per_task: int = 3
+    plan_steps: int = 2
+    content_chars: int = 200
+    tool_args: Dict[str, Dict[str, Any]] = field(
+        default_factory=lambda: dict(DEFAULT_TOOL_ARGS)
+    )
+    seed: Optional[int] = None
+
+
+def _tool_names(body: Dict[str, Any]) -> List[str]:
+    return [tool["function"]["name"] for tool in body.get("tools") or ()]
+
+
+def _find_tool(names: List[str], wanted: str) -> Optional[str]:
+    return next(
+        (name for name in names if name == wanted or name.endswith(f"_{wanted}")),
+        None,
+    )
+
+
+def _tool_call(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def _for_turn(value: Any, turn: int) -> Any:
+    if value == "{turn}":
+        return turn
+    if isinstance(value, str):
+        return value.replace("{turn}", str(turn))
+    if isinstance(value, list):
+        return [_for_turn(item, turn) for item in value]
+    if isinstance(value, dict):
+        return {key: _for_turn(item, turn) for key, item in value.items()}
+    return value
+
+
+def scripted_reply(body: Dict[str, Any], config: StubConfig) -> Dict[str, Any]:
+    """The assistant message the stub answers `body` with."""
+    names = _tool_names(body)
+    turns = sum(1 for m in body.get("messages", []) if m.get("role") == "assistant")
+    # Vary the text per turn, or the agents' stuck detection kicks in
+    content = f"Turn {turns + 1}. " + "Thinking about the next step. " * 20
+    content = content[: config.content_chars]
+    if not names:
+        return {"role": "assistant", "content": content}
+
+    planning = _find_tool(names, "planning")
+    if planning is not None:
+        steps = [f"Step {i + 1} of the task" for i in range(config.plan_steps)]
+        call = _tool_call(
+            planning, {"command": "create", "title": "Benchmark plan", "steps": steps}
+        )
+        return {"role": "assistant", "content": content, "tool_calls": [call]}
+
+    terminate = _find_tool(names, "terminate")
+    if terminate is not None and turns % config.steps_per_task == (
+        config.steps_per_task - 1
+    ):
+        call = _tool_call(terminate, {"status": "success"})
+    else:
+        work = next(
+            (
+                (name, args)
+                for wanted, args in config.tool_args.items()
+                if (name := _find_tool(names, wanted)) is not None
+            ),
+            None,
+        )
+        if work is None:
+            return {"role": "assistant", "content": content}
+        name, args = work
+        call = _tool_call(name, _for_turn(args, turns + 1))
+    return {"role": "assistant", "content": content, "tool_calls": [call]}
+
+
+def _usage(body: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, int]:
+    # Rough estimate; the stub has no tokenizer
+    prompt = len(json.dumps(body.get("messages", []))) // 4
+    completion = len(json.dumps(message)) // 4
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion,
+    }
+
+
+def create_app(config: StubConfig) -> Starlette:
+    rng = random.Random(config.seed)
+    counter = itertools.count(1)
+
+    async def completions(request: Request):
+        body = await request.json()
+        number = next(counter)
+        app.state.requests = number
+        if config.rate_limit_every and number % config.rate_limit_every == 0:
+            app.state.rate_limited += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limited", "type": "rate_limit"}},
+                status_code=429,
+                headers={"retry-after-ms": "10"},
+            )
+
+        delay = config.latency_ms + rng.uniform(-1, 1) * config.jitter_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        message = scripted_reply(body, config)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "stub")
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": "stop"}
+                    ],
+                    "usage": _usage(body, message),
+                }
+            )
+
+        async def chunks():
+            words = (message.get("content") or "").split(" ")
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else f" {word}"}
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    app = Starlette(
+        routes=[
+            Route("/v1/chat/completions", completions, methods=["POST"]),
+            Route("/chat/completions", completions, methods=["POST"]),
+        ]
+    )
+    app.state.requests = 0
+    app.state.rate_limited = 0
+    return app
+
+
+class StubServer:
+    """Runs the stub in a background thread, off the caller's event loop.
+
+    Use as a context manager; `base_url` is the OpenAI base URL to use.
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, port: int = 0):
+        self.config = config or StubConfig()
+        self.app = create_app(self.config)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Inherited by accepted connections; avoids 40 ms delayed-ACK stalls
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.bind(("127.0.0.1", port))
+        self.port = self._socket.getsockname()[1]
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, log_level="warning", access_log=False)
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._socket.close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scripted OpenAI-compatible stub")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit-every", type=int, default=0, help="Answer every n-th with 429"
+    )
+    parser.add_argument("--steps-per-task", type=int, default=3)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every,
+        steps_per_task=args.steps_per_task,
+    )
+    with StubServer(config, port=args.port) as server:
+        print(f"Stub LLM listening on {server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
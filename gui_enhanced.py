@@ -21,6 +21,7 @@ import qasync
 from qasync import QEventLoop, asyncSlot
 
 from app.agent.manus import Manus
+from app.sandbox.client import shutdown_sandbox_manager
 from app.schema import AgentState, Memory
 from loguru import logger
 
@@ -525,6 +526,7 @@ class ManusGUI(QMainWindow):
             try:
                 self.append_log("🧹 正在清理资源...", "INFO")
                 await self.agent.cleanup()
+                await shutdown_sandbox_manager()
                 self.append_log("✨ 清理完成", "INFO")
             except Exception as e:
                 self.append_log(f"⚠️ 清理时出错: {str(e)}", "WARNING")
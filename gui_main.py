@@ -18,6 +18,7 @@ import qasync
 from qasync import QEventLoop, asyncSlot
 
 from app.agent.manus import Manus
+from app.sandbox.client import shutdown_sandbox_manager
 from app.schema import AgentState, Memory
 from app.logger import logger
 
@@ -100,6 +101,7 @@ class ManusWorker(QObject):
         if self.agent:
             try:
                 await self.agent.cleanup()
+                await shutdown_sandbox_manager()
                 self.log_message.emit("🧹 资源清理完成", "INFO")
             except Exception as e:
                 self.error.emit(f"清理失败: {str(e)}")
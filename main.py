@@ -2,7 +2,46 @@ import argparse
 import asyncio
 
 from app.agent.manus import Manus
+from app.checkpoint import RunCheckpoint
 from app.logger import logger
+from app.sandbox.client import shutdown_sandbox_manager
+from app.schema import AgentState
+from app.tracing import start_tracing, stop_tracing
+
+
+async def run_task(agent: Manus, prompt: str) -> None:
+    """Run the agent on a prompt, checkpointing every step."""
+    checkpoint = RunCheckpoint()
+    await checkpoint.start("agent", prompt)
+    agent.checkpoint = checkpoint
+    result = await agent.run(prompt)
+    await checkpoint.finish(result)
+
+
+async def resume_task(agent: Manus, run_id: str) -> None:
+    """Continue a checkpointed run from its last completed step."""
+    try:
+        checkpoint = RunCheckpoint.load(run_id)
+    except FileNotFoundError:
+        logger.error(f"No checkpoint found for run {run_id}")
+        return
+    if checkpoint.meta.get("kind") != "agent":
+        logger.error(f"Run {run_id} is not an agent run; resume it with run_flow.py")
+        return
+    if checkpoint.done:
+        logger.info(f"Run {run_id} already finished:\n{checkpoint.result}")
+        return
+
+    agent.checkpoint = checkpoint
+    if not checkpoint.restore_agent(agent):
+        # Interrupted before the first step completed
+        result = await agent.run(checkpoint.meta.get("prompt"))
+    elif agent.state == AgentState.FINISHED:
+        result = "Resumed run had already finished"
+    else:
+        logger.info(f"Resuming run {run_id} after step {agent.current_step}")
+        result = await agent.run()
+    await checkpoint.finish(result)
 
 
 async def main():
@@ -21,13 +60,24 @@ async def main():
         action="store_true",
         help="Keep conversation memory between tasks (default: clear memory for each task)",
     )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        metavar="RUN_ID",
+        help="Resume an interrupted run from its checkpoint",
+    )
     args = parser.parse_args()
 
+    start_tracing()
     # Create and initialize Manus agent
     agent = await Manus.create()
     try:
+        if args.resume:
+            logger.warning("Resuming run...")
+            await resume_task(agent, args.resume)
+            logger.info("Request processing completed.")
         # Interactive mode: keep running and wait for new prompts
-        if args.interactive or not args.prompt:
+        elif args.interactive or not args.prompt:
             logger.info(
                 "🚀 Starting interactive mode. Type 'exit' or 'quit' to end the session."
             )
@@ -65,7 +115,7 @@ async def main():
                         logger.debug("💾 Keeping previous conversation memory")
 
                     logger.warning("📝 Processing your request...")
-                    await agent.run(prompt)
+                    await run_task(agent, prompt)
                     logger.info("✅ Request processing completed.")
                     logger.info("-" * 60)
 
@@ -82,7 +132,7 @@ async def main():
                 return
 
             logger.warning("Processing your request...")
-            await agent.run(prompt)
+            await run_task(agent, prompt)
             logger.info("Request processing completed.")
 
     except KeyboardInterrupt:
@@ -91,6 +141,8 @@ async def main():
         # Ensure agent resources are cleaned up before exiting
         logger.info("🧹 Cleaning up resources...")
         await agent.cleanup()
+        await shutdown_sandbox_manager()
+        stop_tracing()
         logger.info("✨ Cleanup complete. Goodbye!")
 
 
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from app.agent.data_analysis import DataAnalysis
+from app.agent.manus import Manus
+from app.batch import BatchRunner, read_tasks
+from app.config import config
+from app.flow.flow_factory import FlowFactory, FlowType
+from app.logger import logger
+from app.sandbox.client import LeasedSandboxClient, shutdown_sandbox_manager
+from app.tool import ToolCollection
+from app.tool.ask_human import AskHuman
+from app.tracing import start_tracing, stop_tracing
+
+
+def _without_ask_human(agent: Manus) -> Manus:
+    # Nobody answers in a batch, and stdin may be the task list
+    agent.available_tools = ToolCollection(
+        *(tool for tool in agent.available_tools if tool.name != AskHuman().name)
+    )
+    return agent
+
+
+async def run_agent(prompt: str, session_id: str) -> str:
+    """Run a prompt on a fresh Manus agent."""
+    agent = _without_ask_human(
+        await Manus.create(sandbox_client=LeasedSandboxClient(session_id))
+    )
+    try:
+        return await agent.run(prompt)
+    finally:
+        await agent.cleanup()
+
+
+async def run_flow(prompt: str, session_id: str) -> str:
+    """Run a prompt through a fresh planning flow."""
+    agents = {
+        "manus": _without_ask_human(
+            Manus(sandbox_client=LeasedSandboxClient(session_id))
+        )
+    }
+    if config.run_flow_config.use_data_analysis_agent:
+        agents["data_analysis"] = DataAnalysis(
+            sandbox_client=LeasedSandboxClient(session_id)
+        )
+    flow = FlowFactory.create_flow(flow_type=FlowType.PLANNING, agents=agents)
+    try:
+        return await flow.execute(prompt)
+    finally:
+        for agent in agents.values():
+            await agent.cleanup()
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Run many prompts concurrently through Manus or the planning flow"
+    )
+    parser.add_argument(
+        "--input",
+        default="-",
+        help='JSONL tasks, one {"id": ..., "prompt": ...} per line (default: stdin)',
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="JSONL results, appended to"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent tasks")
+    parser.add_argument(
+        "--flow", action="store_true", help="Run tasks through the planning flow"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=3600, help="Seconds allowed per task"
+    )
+    args = parser.parse_args()
+
+    if args.input == "-":
+        tasks = read_tasks(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            tasks = read_tasks(f)
+
+    start_tracing()
+    runner = BatchRunner(
+        run_flow if args.flow else run_agent,
+        args.output,
+        workers=args.workers,
+        timeout=args.timeout,
+    )
+    try:
+        await runner.run(tasks)
+    except KeyboardInterrupt:
+        logger.warning("Batch interrupted; rerun with the same output to resume.")
+    finally:
+        await shutdown_sandbox_manager()
+        stop_tracing()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,30 +1,72 @@
+import argparse
 import asyncio
 import time
 
 from app.agent.data_analysis import DataAnalysis
 from app.agent.manus import Manus
+from app.checkpoint import RunCheckpoint
 from app.config import config
 from app.flow.flow_factory import FlowFactory, FlowType
 from app.logger import logger
+from app.sandbox.client import LeasedSandboxClient, shutdown_sandbox_manager
+from app.tracing import start_tracing, stop_tracing
 
 
 async def run_flow():
+    parser = argparse.ArgumentParser(description="Run the planning flow")
+    parser.add_argument(
+        "--resume",
+        type=str,
+        metavar="RUN_ID",
+        help="Resume an interrupted run from its checkpoint",
+    )
+    args = parser.parse_args()
+
+    start_tracing()
+    # The agents of the flow work in one sandbox
+    sandbox_client = LeasedSandboxClient()
     agents = {
-        "manus": Manus(),
+        "manus": Manus(sandbox_client=sandbox_client),
     }
     if config.run_flow_config.use_data_analysis_agent:
-        agents["data_analysis"] = DataAnalysis()
+        agents["data_analysis"] = DataAnalysis(sandbox_client=sandbox_client)
     try:
-        prompt = input("Enter your prompt: ")
-
-        if prompt.strip().isspace() or not prompt:
-            logger.warning("Empty prompt provided.")
-            return
-
         flow = FlowFactory.create_flow(
             flow_type=FlowType.PLANNING,
             agents=agents,
         )
+
+        if args.resume:
+            try:
+                checkpoint = RunCheckpoint.load(args.resume)
+            except FileNotFoundError:
+                logger.error(f"No checkpoint found for run {args.resume}")
+                return
+            if checkpoint.meta.get("kind") != "flow":
+                logger.error(
+                    f"Run {args.resume} is not a flow run; resume it with main.py"
+                )
+                return
+            if checkpoint.done:
+                logger.info(f"Run {args.resume} already finished")
+                logger.info(checkpoint.result)
+                return
+            # Without a checkpointed plan the flow starts over from the prompt
+            prompt = (
+                ""
+                if flow.restore_checkpoint(checkpoint)
+                else checkpoint.meta.get("prompt", "")
+            )
+        else:
+            prompt = input("Enter your prompt: ")
+
+            if prompt.strip().isspace() or not prompt:
+                logger.warning("Empty prompt provided.")
+                return
+
+            checkpoint = RunCheckpoint()
+            await checkpoint.start("flow", prompt)
+            flow.checkpoint = checkpoint
         logger.warning("Processing your request...")
 
         try:
@@ -36,6 +78,7 @@ async def run_flow():
             elapsed_time = time.time() - start_time
             logger.info(f"Request processed in {elapsed_time:.2f} seconds")
             logger.info(result)
+            await checkpoint.finish(result)
         except asyncio.TimeoutError:
             logger.error("Request processing timed out after 1 hour")
             logger.info(
@@ -46,6 +89,9 @@ async def run_flow():
         logger.info("Operation cancelled by user.")
     except Exception as e:
         logger.error(f"Error: {str(e)}")
+    finally:
+        await shutdown_sandbox_manager()
+        stop_tracing()
 
 
 if __name__ == "__main__":
@@ -7,5 +7,11 @@ if __name__ == "__main__":
     args = parse_args()
 
     # Create and run server (maintaining original flow)
-    server = MCPServer()
+    server = MCPServer(
+        tools=args.tools,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        host=args.host,
+        port=args.port,
+    )
     server.run(transport=args.transport)
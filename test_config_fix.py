@@ -71,7 +71,8 @@ def test_daytona_tool_base_import():
     print("=" * 60)
 
     try:
-        from app.daytona.tool_base import SandboxToolsBase, daytona
+        from app.daytona.sandbox import daytona
+        from app.daytona.tool_base import SandboxToolsBase
         print("[OK] tool_base 模块导入成功")
 
         if daytona is None:
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.batch import BatchRunner, read_tasks
+from app.config import LLMSettings
+from app.llm import LLM, RequestLimiter, track_token_usage
+
+
+@pytest.fixture
+def llm():
+    settings = LLMSettings(
+        model="gpt-4o",
+        base_url="http://localhost:1",
+        api_key="test",
+        api_type="openai",
+        api_version="",
+    )
+    return LLM("batch-test", llm_config={"default": settings})
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_and_resumes(tmp_path, llm):
+    """Tasks overlap, each reports its own tokens, and reruns skip done ids."""
+    running = 0
+    peak = 0
+
+    async def run_task(prompt: str, session_id: str) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        llm.update_token_count(len(prompt), 1)
+        running -= 1
+        if prompt == "boom":
+            raise RuntimeError("failed")
+        return prompt.upper()
+
+    tasks = read_tasks(['{"id": "a", "prompt": "x"}', "", "yyy", "boom"])
+    output = tmp_path / "results.jsonl"
+    summary = await BatchRunner(run_task, output, workers=3).run(tasks)
+
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert peak == 3
+    assert summary["ok"] == 2 and summary["error"] == 1
+    assert records["a"]["result"] == "X" and records["a"]["input_tokens"] == 1
+    assert records["3"]["result"] == "YYY" and records["3"]["input_tokens"] == 3
+    assert records["4"]["error"] == "RuntimeError: failed"
+
+    summary = await BatchRunner(run_task, output, workers=3).run(tasks)
+    assert summary["skipped"] == 2 and summary["error"] == 1
+
+
+def test_input_token_limit_applies_per_tracked_task(llm):
+    """A task near the limit does not use up the budget of the other tasks."""
+    llm.max_input_tokens = 100
+    llm.total_input_tokens = 0
+    try:
+        with track_token_usage():
+            llm.update_token_count(90)
+            assert not llm.check_token_limit(20)
+        with track_token_usage():
+            assert llm.check_token_limit(20)
+        assert llm.total_input_tokens == 90 and not llm.check_token_limit(20)
+    finally:
+        llm.max_input_tokens = None
+
+
+@pytest.mark.asyncio
+async def test_request_limiter_caps_concurrency_and_pauses():
+    """No more than the limit run at once, and a pause delays new requests."""
+    limiter = RequestLimiter(max_concurrent=2)
+    running = 0
+    peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
+
+    limiter.pause(0.05)
+    start = time.monotonic()
+    await request()
+    assert time.monotonic() - start >= 0.05
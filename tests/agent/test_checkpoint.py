@@ -0,0 +1,94 @@
+import pytest
+from pydantic import Field
+
+from app.agent.base import BaseAgent
+from app.checkpoint import RunCheckpoint
+from app.schema import AgentState, Memory, Message
+from app.tool import PlanningTool, StrReplaceEditor, ToolCollection
+
+
+class EchoAgent(BaseAgent):
+    """Adds two messages per step and finishes after `finish_at` steps."""
+
+    name: str = "echo"
+    finish_at: int = 3
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(PlanningTool(), StrReplaceEditor())
+    )
+
+    async def step(self) -> str:
+        self.memory.add_message(Message.assistant_message(f"a{self.current_step}"))
+        self.memory.add_message(Message.user_message(f"u{self.current_step}"))
+        if self.current_step == 1:
+            await self.available_tools.get_tool("planning").execute(
+                command="create", plan_id="p", title="t", steps=["one", "two"]
+            )
+        if self.current_step >= self.finish_at:
+            self.state = AgentState.FINISHED
+        return f"step {self.current_step}"
+
+
+def contents(agent: BaseAgent) -> list:
+    return [m.content for m in agent.memory.messages]
+
+
+@pytest.mark.asyncio
+async def test_resume_restores_memory_step_and_tool_state(tmp_path):
+    """A run interrupted after a step resumes with the state of that step."""
+    agent = EchoAgent(finish_at=10, max_steps=2)
+    agent.checkpoint = RunCheckpoint("run", tmp_path)
+    await agent.checkpoint.start("agent", "go")
+    await agent.run("go")
+
+    restored = EchoAgent(max_steps=10)
+    checkpoint = RunCheckpoint.load("run", tmp_path)
+    assert checkpoint.meta["prompt"] == "go"
+    assert checkpoint.restore_agent(restored)
+    assert contents(restored) == contents(agent)
+    assert restored.current_step == 2
+    assert restored.state == AgentState.IDLE
+    assert "p" in restored.available_tools.get_tool("planning").plans
+
+    restored.checkpoint = checkpoint
+    await restored.run()
+    assert restored.current_step == 3
+
+    final = EchoAgent()
+    RunCheckpoint.load("run", tmp_path).restore_agent(final)
+    assert contents(final) == contents(restored)
+    assert final.state == AgentState.FINISHED
+
+
+@pytest.mark.asyncio
+async def test_memory_trimming_and_reset_are_replayed(tmp_path):
+    """Messages dropped by the memory limit or replaced wholesale replay."""
+    agent = EchoAgent(memory=Memory(max_messages=3), finish_at=10, max_steps=3)
+    agent.checkpoint = RunCheckpoint("trim", tmp_path)
+    await agent.run("go")
+    agent.memory = Memory(messages=[Message.user_message("fresh")])
+    await agent.checkpoint.save_agent(agent)
+
+    restored = EchoAgent()
+    RunCheckpoint.load("trim", tmp_path).restore_agent(restored)
+    assert contents(restored) == ["fresh"]
+
+    # Replaying up to step 2 gives the memory as trimmed after that step
+    lines = (tmp_path / "trim.jsonl").read_text().splitlines()
+    (tmp_path / "partial.jsonl").write_text("\n".join(lines[:2]) + "\n")
+    replayed = EchoAgent()
+    RunCheckpoint.load("partial", tmp_path).restore_agent(replayed)
+    assert contents(replayed) == ["u1", "a2", "u2"]
+
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    """A record cut short by a crash does not prevent loading the run."""
+    path = tmp_path / "cut.jsonl"
+    path.write_text(
+        '{"t": "meta", "run_id": "cut", "kind": "agent", "prompt": "go"}\n'
+        '{"t": "agent", "key": "echo", "step": 1, "state": "RUNNING", '
+        '"drop": 0, "append": [{"role": "user", "content": "go"}]}\n'
+        '{"t": "agent", "key": "echo", "st'
+    )
+    checkpoint = RunCheckpoint.load("cut", tmp_path)
+    assert checkpoint.agents["echo"].step == 1
+    assert checkpoint.agents["echo"].messages == [{"role": "user", "content": "go"}]
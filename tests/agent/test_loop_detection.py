@@ -0,0 +1,117 @@
+from typing import List
+
+import pytest
+from pydantic import Field
+
+from app.agent.loop_detection import LoopDetector
+from app.agent.toolcall import ToolCallAgent
+from app.schema import AgentState, Function, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool, ToolResult
+
+
+class Lookup(BaseTool):
+    """Returns the same answer for every key."""
+
+    name: str = "lookup"
+    description: str = "lookup"
+
+    async def execute(self, key: str) -> ToolResult:
+        return ToolResult(output="nothing new")
+
+
+class RepeatingAgent(ToolCallAgent):
+    """Calls lookup with the same key every step, without an LLM."""
+
+    name: str = "repeating"
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(Lookup(), Terminate())
+    )
+    offered: List[List[str]] = Field(default_factory=list)
+
+    async def think(self) -> bool:
+        self.offered.append([p["function"]["name"] for p in self._offered_tools()])
+        self.tool_calls = [
+            ToolCall(
+                id=str(self.current_step),
+                function=Function(name="lookup", arguments='{"key": "k"}'),
+            )
+        ]
+        return True
+
+
+class ScriptedAgent(ToolCallAgent):
+    """Looks up the keys of `script`, one list per step, then terminates."""
+
+    name: str = "scripted"
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(Lookup(), Terminate())
+    )
+    script: List[List[str]] = Field(default_factory=list)
+
+    async def think(self) -> bool:
+        keys = self.script.pop(0) if self.script else None
+        self.tool_calls = [
+            ToolCall(
+                id=f"{self.current_step}-{i}",
+                function=(
+                    Function(name="lookup", arguments=f'{{"key": "{key}"}}')
+                    if keys
+                    else Function(name="terminate", arguments='{"status": "success"}')
+                ),
+            )
+            for i, key in enumerate(keys or ["done"])
+        ]
+        return True
+
+
+def test_detects_repeats_and_short_cycles():
+    """A-A-A and A-B-A-B are loops; the same call with new results is not."""
+    detector = LoopDetector()
+    assert detector.record("a", '{"x": 1, "y": 2}', "r") is None
+    assert detector.record("a", '{"y": 2, "x": 1}', "r") is None
+    loop = detector.record("a", '{"x":1,"y":2}', "r")
+    assert loop.period == 1 and loop.tools == ["a"]
+
+    detector.reset()
+    assert [detector.record(name, "{}", "r") for name in "aba"] == [None] * 3
+    assert detector.record("b", "{}", "r").tools == ["a", "b"]
+
+    detector.reset()
+    assert all(detector.record("a", "{}", f"r{i}") is None for i in range(10))
+
+
+@pytest.mark.asyncio
+async def test_repeating_agent_is_warned_blocked_then_stopped():
+    """Escalation ends a stuck run long before max_steps."""
+    agent = RepeatingAgent(max_steps=30)
+    await agent.run("go")
+
+    contents = [m.content or "" for m in agent.memory.messages]
+    assert sum("same arguments and got the same result" in c for c in contents) == 1
+    assert any("`lookup` cannot be used in the next step" in c for c in contents)
+    assert contents[-1].startswith("Stopped early")
+    assert agent.state == AgentState.IDLE and len(agent.offered) < 10
+    assert ["terminate"] in agent.offered
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "script",
+    [
+        # A later A does not extend the loop that B already ended
+        [["a", "a", "a", "b"], ["a"]],
+        # Unrelated loops each get guidance first
+        [["a", "a", "a"], ["b"], ["c", "c", "c"]],
+    ],
+)
+async def test_each_loop_starts_with_guidance(script):
+    """Every call is recorded; a step without a loop resets the escalation."""
+    guided = sum(len(keys) >= 3 for keys in script)
+    agent = ScriptedAgent(script=script)
+    await agent.run("go")
+
+    contents = [m.content or "" for m in agent.memory.messages]
+    guidance = [c for c in contents if "got the same result" in c]
+    assert len(guidance) == guided
+    assert not any("cannot be used in the next step" in c for c in contents)
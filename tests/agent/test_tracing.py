@@ -0,0 +1,102 @@
+import pytest
+
+from app.agent import base, react, toolcall
+from app.agent.toolcall import ToolCallAgent
+from app.schema import Function, ToolCall
+from app.tracing import OpenTelemetryExporter, Tracer
+
+
+class ScriptedAgent(ToolCallAgent):
+    """Calls terminate on its first step, without an LLM."""
+
+    name: str = "scripted"
+
+    async def think(self) -> bool:
+        self.tool_calls = [
+            ToolCall(
+                id="1",
+                function=Function(name="terminate", arguments='{"status": "success"}'),
+            )
+        ]
+        return True
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = Tracer(enabled=True)
+    for module in (base, react, toolcall):
+        monkeypatch.setattr(module, "tracer", tracer)
+    return tracer
+
+
+@pytest.mark.asyncio
+async def test_agent_run_records_nested_spans(tracer):
+    """A step nests think and act, and the tool call nests in act."""
+    await ScriptedAgent().run("go")
+
+    spans = {span["name"]: span for span in tracer.spans()}
+    assert list(spans) == [
+        "agent.think",
+        "tool.execute",
+        "agent.act",
+        "agent.step",
+        "agent.run",
+    ]
+    assert spans["agent.run"]["parent_id"] is None
+    assert spans["agent.run"]["attributes"]["steps"] == 1
+    assert spans["agent.step"]["parent_id"] == spans["agent.run"]["span_id"]
+    assert spans["agent.think"]["parent_id"] == spans["agent.step"]["span_id"]
+    assert spans["tool.execute"]["parent_id"] == spans["agent.act"]["span_id"]
+    assert spans["tool.execute"]["target"] == "terminate"
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+    assert "tool.execute:terminate" in tracer.summary()
+
+
+def test_prometheus_text_counts_errors_and_tokens():
+    """Histograms are cumulative, errors and token attributes are counters."""
+    tracer = Tracer(enabled=True)
+    with tracer.span("llm.request", target="gpt-4o") as span:
+        span.set(input_tokens=100, completion_tokens=20)
+    with pytest.raises(TimeoutError):
+        with tracer.span("llm.request", target="gpt-4o", input_tokens=50):
+            raise TimeoutError
+
+    text = tracer.render_prometheus()
+    labels = 'span="llm.request",target="gpt-4o"'
+    assert f'openmanus_span_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"openmanus_span_duration_seconds_count{{{labels}}} 2" in text
+    assert f"openmanus_span_errors_total{{{labels}}} 1" in text
+    assert f"openmanus_input_tokens_total{{{labels}}} 150" in text
+    assert f"openmanus_completion_tokens_total{{{labels}}} 20" in text
+    assert tracer.spans()[-1]["error"] == "TimeoutError"
+
+    disabled = Tracer()
+    with disabled.span("llm.request") as span:
+        span.set(input_tokens=1)
+    assert disabled.spans() == [] and disabled.summary() == {}
+
+
+def test_opentelemetry_exporter_keeps_parents():
+    """Spans are mirrored to OpenTelemetry with their parent links."""
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    memory = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    tracer = Tracer(enabled=True)
+    tracer.add_exporter(OpenTelemetryExporter(tracer_provider=provider))
+
+    with tracer.span("agent.step", target="manus"):
+        with pytest.raises(RuntimeError):
+            with tracer.span("tool.execute", target="bash", bytes=10):
+                raise RuntimeError
+
+    tool, step = memory.get_finished_spans()
+    assert tool.parent.span_id == step.context.span_id
+    assert tool.attributes["target"] == "bash"
+    assert tool.attributes["bytes"] == 10
+    assert not tool.status.is_ok
@@ -0,0 +1,51 @@
+from app.llm import LLM
+from app.schema import Message
+
+
+def test_formatted_message_is_reused():
+    """Tests that a message is formatted once per image-support mode."""
+    message = Message.user_message("look", base64_image="aGVsbG8=")
+
+    first = LLM.format_messages([message], supports_images=True)[0]
+    second = LLM.format_messages([message], supports_images=True)[0]
+    text_only = LLM.format_messages([message], supports_images=False)[0]
+
+    assert first is second
+    assert first["content"][1]["image_url"]["url"] == "data:image/jpeg;base64,aGVsbG8="
+    assert text_only == {"role": "user", "content": "look"}
+
+
+def test_formatted_cache_invalidated_on_update():
+    """Tests that assigning a field drops the cached format."""
+    message = Message.assistant_message("before")
+    assert LLM.format_messages([message])[0]["content"] == "before"
+
+    message.content = "after"
+
+    assert LLM.format_messages([message])[0]["content"] == "after"
+
+
+def test_copies_are_formatted_from_their_own_fields():
+    """Tests that copies made with `model_copy` do not reuse the original's format."""
+    message = Message.assistant_message("before")
+    assert LLM.format_messages([message])[0]["content"] == "before"
+
+    for deep in (False, True):
+        copied = message.model_copy(update={"content": "after"}, deep=deep)
+        assert LLM.format_messages([copied])[0]["content"] == "after"
+    assert LLM.format_messages([message])[0]["content"] == "before"
+
+
+def test_dict_messages_are_not_mutated():
+    """Tests that raw dict inputs keep their base64_image field."""
+    message = {"role": "user", "content": "hi", "base64_image": "aGVsbG8="}
+
+    formatted = LLM.format_messages([message], supports_images=False)
+
+    assert formatted == [{"role": "user", "content": "hi"}]
+    assert message["base64_image"] == "aGVsbG8="
+
+
+def test_messages_without_content_are_dropped():
+    """Tests that empty messages are skipped."""
+    assert LLM.format_messages([Message(role="assistant")]) == []
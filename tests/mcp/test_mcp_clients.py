@@ -0,0 +1,212 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.lowlevel import NotificationOptions
+from mcp.shared.memory import create_client_server_memory_streams
+
+from app.config import MCPSettings
+from app.exceptions import ToolError
+from app.tool import Terminate
+from app.tool.mcp import MCPClients
+from app.tool.mcp_connection import MCPConnection, TrackedSendStream
+
+
+def make_server() -> FastMCP:
+    """Server with a tool that registers another tool at runtime."""
+    server = FastMCP("test")
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        return text
+
+    @server.tool()
+    async def add_tool(name: str, ctx: Context) -> str:
+        server.add_tool(lambda: name, name=name)
+        await ctx.session.send_tool_list_changed()
+        return "ok"
+
+    @server.tool()
+    async def slow() -> str:
+        await anyio.sleep(5)
+        return "done"
+
+    return server
+
+
+class BrokenSession:
+    """Session whose transport breaks on each call, before or after sending."""
+
+    def __init__(self, send_first: bool):
+        self.send_first = send_first
+        self.calls = 0
+        send, self.receive = anyio.create_memory_object_stream(10)
+        self.write = TrackedSendStream(send)
+
+    async def call_tool(self, name, arguments):
+        self.calls += 1
+        if self.send_first:
+            await self.write.send(name)
+            raise anyio.EndOfStream
+        raise anyio.ClosedResourceError
+
+
+class EchoSession:
+    """Session of a re-established connection, echoing the arguments."""
+
+    async def call_tool(self, name, arguments):
+        return SimpleNamespace(isError=False, content=arguments)
+
+
+def in_memory(server: FastMCP, notify: bool = False, scopes: list = None):
+    """Transport factory running `server` in-process on each connect."""
+    lowlevel = server._mcp_server
+    options = lowlevel.create_initialization_options(
+        NotificationOptions(tools_changed=notify)
+    )
+
+    @asynccontextmanager
+    async def open_streams():
+        async with create_client_server_memory_streams() as (client, server_streams):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(lambda: lowlevel.run(*server_streams, options))
+                if scopes is not None:
+                    scopes.append(tg.cancel_scope)
+                yield client
+                tg.cancel_scope.cancel()
+
+    return open_streams
+
+
+@pytest.mark.asyncio
+async def test_notified_server_refreshes_only_after_change():
+    """Tests that a server with tools/list_changed is queried only when notified."""
+    clients = MCPClients(MCPSettings())
+    await clients.connect("s1", in_memory(make_server(), notify=True))
+    try:
+        assert set(clients.tool_map) == {
+            "mcp_s1_echo",
+            "mcp_s1_add_tool",
+            "mcp_s1_slow",
+        }
+        params = clients.to_params()
+        assert await clients.refresh_tools() == ([], [], [])
+
+        await clients.execute(name="mcp_s1_add_tool", tool_input={"name": "extra"})
+        for _ in range(50):
+            if clients.has_pending_changes:
+                break
+            await asyncio.sleep(0.01)
+        assert clients.has_pending_changes
+
+        assert await clients.refresh_tools() == (["mcp_s1_extra"], [], [])
+        assert not clients.has_pending_changes
+        new_params = clients.to_params()
+        assert len(new_params) == 4
+        # Unchanged tools keep their cached schema
+        assert new_params[0] is params[0]
+    finally:
+        await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_polled_server_applies_changes_by_hash():
+    """Tests that servers without notifications are polled and diffed by hash."""
+    clients = MCPClients(MCPSettings())
+    server = make_server()
+    await clients.connect("s2", in_memory(server))
+    try:
+        tool = clients.tool_map["mcp_s2_echo"]
+        assert await clients.refresh_tools() == ([], [], [])
+        assert clients.tool_map["mcp_s2_echo"] is tool
+
+        server._tool_manager._tools.pop("echo")
+        server.add_tool(lambda: "x", name="other")
+        assert await clients.refresh_tools() == (["mcp_s2_other"], ["mcp_s2_echo"], [])
+        assert "mcp_s2_echo" not in clients.tool_map
+    finally:
+        await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_local_tools_survive_server_changes():
+    """Tests that tools added besides the servers' tools are left alone."""
+    clients = MCPClients(MCPSettings())
+    clients.add_tool(Terminate())
+    await clients.connect("s1", in_memory(make_server()))
+    try:
+        assert await clients.refresh_tools() == ([], [], [])
+        await clients.disconnect("s1")
+        assert list(clients.tool_map) == ["terminate"]
+    finally:
+        await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_call_timeout_is_recorded():
+    """Tests that a hung call fails after the deadline and counts as an error."""
+    clients = MCPClients(MCPSettings(call_timeout=0.2))
+    await clients.connect("s3", in_memory(make_server()))
+    try:
+        result = await clients.execute(name="mcp_s3_slow", tool_input={})
+        assert "timed out" in result.error
+        result = await clients.execute(name="mcp_s3_echo", tool_input={"text": "hi"})
+        assert result.output == "hi"
+
+        metrics = clients.get_metrics()["s3"]
+        assert metrics["slow"]["errors"] == 1
+        assert metrics["echo"]["count"] == 1 and metrics["echo"]["errors"] == 0
+    finally:
+        await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_dead_server_is_reconnected():
+    """Tests that a failed ping reopens the connection and calls resume."""
+    settings = MCPSettings(ping_interval=0.05, ping_timeout=0.2, reconnect_delay=0.01)
+    clients = MCPClients(settings)
+    scopes = []
+    await clients.connect("s4", in_memory(make_server(), scopes=scopes))
+    connection = clients.connections["s4"]
+    try:
+        # Stop the server without closing the transport, like a hung process
+        scopes[0].cancel()
+        for _ in range(100):
+            if connection.connects == 2:
+                break
+            await asyncio.sleep(0.02)
+        assert connection.connects == 2
+
+        result = await clients.execute(name="mcp_s4_echo", tool_input={"text": "back"})
+        assert result.output == "back"
+    finally:
+        await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_only_unsent_calls_are_retried():
+    """Tests that a call is retried after a lost connection only if it was not sent."""
+    connection = MCPConnection("s5", None, MCPSettings(call_timeout=1))
+    sent = BrokenSession(send_first=True)
+    connection.session = sent
+    connection._ready.set()
+    with pytest.raises(ToolError, match="may or may not have run"):
+        await connection.call_tool("write", {})
+    assert sent.calls == 1
+
+    unsent = BrokenSession(send_first=False)
+    connection.session, connection._lost = unsent, False
+    connection._ready.set()
+
+    async def reconnect():
+        while connection._ready.is_set():
+            await asyncio.sleep(0)
+        connection.session = EchoSession()
+        connection._ready.set()
+
+    asyncio.create_task(reconnect())
+    result = await connection.call_tool("write", {"x": 1})
+    assert unsent.calls == 1 and result.content == {"x": 1}
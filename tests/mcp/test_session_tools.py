@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.exceptions import ToolError
+from app.mcp.session_tools import SessionToolPool
+from app.tool.base import BaseTool, ToolResult
+
+
+class CounterTool(BaseTool):
+    """Stateful tool that counts its calls and records cleanup."""
+
+    name: str = "counter"
+    description: str = "Counts calls"
+    calls: int = 0
+    closed: bool = False
+
+    async def execute(self) -> ToolResult:
+        self.calls += 1
+        return ToolResult(output=str(self.calls))
+
+    async def cleanup(self):
+        self.closed = True
+
+
+class Session:
+    """Stand-in for an MCP server session."""
+
+
+@pytest.fixture
+def pool():
+    return SessionToolPool({"counter": CounterTool}, max_sessions=2, idle_timeout=60)
+
+
+@pytest.mark.asyncio
+async def test_sessions_get_their_own_tools(pool):
+    """Tests that each session keeps its own tool instance."""
+    a, b = Session(), Session()
+    async with pool.use(a, "counter") as tool_a:
+        await tool_a.execute()
+    async with pool.use(a, "counter") as again:
+        assert again is tool_a
+        await again.execute()
+    async with pool.use(b, "counter") as tool_b:
+        assert tool_b is not tool_a
+        assert (await tool_b.execute()).output == "1"
+    assert tool_a.calls == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_lru_idle_session_is_evicted(pool):
+    """Tests that the session cap evicts the least recently used idle session."""
+    sessions = [Session() for _ in range(3)]
+    tools = []
+    for session in sessions:
+        async with pool.use(session, "counter") as tool:
+            tools.append(tool)
+
+    assert len(pool) == 2
+    assert tools[0].closed and not tools[1].closed
+    await pool.close()
+    assert all(tool.closed for tool in tools)
+
+
+@pytest.mark.asyncio
+async def test_busy_sessions_are_not_evicted(pool):
+    """Tests that a new session is rejected while every slot is in use."""
+    a, b = Session(), Session()
+    async with pool.use(a, "counter"), pool.use(b, "counter"):
+        with pytest.raises(ToolError):
+            async with pool.use(Session(), "counter"):
+                pass
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_evict_idle(pool):
+    """Tests that sessions idle past the timeout are closed."""
+    pool.idle_timeout = 0
+    async with pool.use(Session(), "counter") as tool:
+        pass
+    await asyncio.sleep(0.01)
+    assert await pool.evict_idle() == 1
+    assert tool.closed and len(pool) == 0
+    await pool.close()
@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.daytona.automation import BrowserAutomationClient
+from app.tool.sandbox.sb_browser_tool import SandboxBrowserTool
+
+
+class FakeSandbox:
+    """Hands out numbered preview tokens and records in-sandbox commands."""
+
+    def __init__(self):
+        self.id = "sb-1"
+        self.links = 0
+        self.commands = []
+        self.process = SimpleNamespace(exec=self._exec)
+
+    def get_preview_link(self, port: int):
+        self.links += 1
+        return SimpleNamespace(url=f"https://{port}-sb-1.proxy", token=f"t{self.links}")
+
+    def _exec(self, command: str, timeout=None):
+        self.commands.append(command)
+        return SimpleNamespace(exit_code=0, result=json.dumps({"success": True}))
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_the_link_and_refresh_an_expired_token():
+    """The preview link is fetched once and again only when its token is refused."""
+    sandbox = FakeSandbox()
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.path, request.headers["X-Daytona-Preview-Token"]))
+        if len(seen) == 3:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"success": True, "url": str(request.url)})
+
+    client = BrowserAutomationClient(sandbox, transport=httpx.MockTransport(handler))
+    await client.request("navigate_to", {"url": "https://example.com"})
+    reply = await client.request("get_dropdown_options", {"index": 2}, method="GET")
+    assert reply["url"].endswith("/api/automation/get_dropdown_options?index=2")
+    await client.request("scroll_down", {"amount": 100})
+    await client.close()
+
+    assert sandbox.links == 2
+    assert [token for _, token in seen] == ["t1", "t1", "t1", "t2"]
+
+
+async def _noop():
+    return None
+
+
+@pytest.mark.asyncio
+async def test_tool_falls_back_to_curl_when_the_link_is_unreachable(monkeypatch):
+    """An unreachable API endpoint switches the tool to curl in the sandbox."""
+    calls = []
+
+    async def unreachable(self, endpoint, params=None, method="POST"):
+        calls.append(endpoint)
+        raise httpx.ConnectError("unreachable")
+
+    monkeypatch.setattr(BrowserAutomationClient, "request", unreachable)
+    sandbox = FakeSandbox()
+    tool = SandboxBrowserTool(sandbox)
+    monkeypatch.setattr(tool, "_ensure_sandbox", lambda: _noop())
+
+    for _ in range(2):
+        result = await tool._execute_browser_action("input_text", {"text": "it's"})
+        assert not result.error
+    await tool.cleanup()
+
+    assert calls == ["input_text"]
+    assert len(sandbox.commands) == 2
+    assert """-d '{"text": "it'"'"'s"}'""" in sandbox.commands[0]
@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.daytona import sandbox as sandbox_module
+from app.daytona.sandbox import SandboxRegistry, SandboxState, wait_for_services
+
+
+class FakeProcess:
+    """Records supervisord calls and fails the first `failures` readiness probes."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.probes = 0
+        self.sessions = []
+
+    def create_session(self, session_id: str) -> None:
+        self.sessions.append(session_id)
+
+    def execute_session_command(self, session_id: str, request) -> None:
+        pass
+
+    def exec(self, command: str, timeout=None):
+        self.probes += 1
+        return SimpleNamespace(exit_code=1 if self.probes <= self.failures else 0)
+
+
+class FakeSandbox:
+    def __init__(self, sandbox_id: str, failures: int = 0):
+        self.id = sandbox_id
+        self.state = SandboxState.STARTED
+        self.process = FakeProcess(failures)
+
+
+class FakeDaytona:
+    """Minimal stand-in for the synchronous Daytona SDK client."""
+
+    def __init__(self):
+        self.created = []
+        self.started = []
+
+    def create(self, params) -> FakeSandbox:
+        sandbox = FakeSandbox(f"sb-{len(self.created)}")
+        self.created.append(sandbox)
+        return sandbox
+
+    def start(self, sandbox: FakeSandbox) -> None:
+        self.started.append(sandbox)
+        sandbox.state = SandboxState.STARTED
+
+    def get(self, sandbox_id: str) -> FakeSandbox:
+        return next(s for s in self.created if s.id == sandbox_id)
+
+    def delete(self, sandbox: FakeSandbox) -> None:
+        self.created.remove(sandbox)
+
+
+@pytest.fixture
+def fake_daytona(monkeypatch) -> FakeDaytona:
+    """Replaces the module-level SDK client with a fake."""
+    fake = FakeDaytona()
+    monkeypatch.setattr(sandbox_module, "daytona", fake)
+    monkeypatch.setattr(sandbox_module.daytona_settings, "readiness_timeout", 1.0)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_concurrent_acquire_creates_one_sandbox(fake_daytona):
+    """Tests that all tools of a project share a sandbox created exactly once."""
+    registry = SandboxRegistry()
+
+    sandboxes = await asyncio.gather(*(registry.acquire("proj") for _ in range(5)))
+
+    assert len(fake_daytona.created) == 1
+    assert all(sandbox is sandboxes[0] for sandbox in sandboxes)
+    assert (await registry.acquire("other")) is not sandboxes[0]
+
+
+@pytest.mark.asyncio
+async def test_sandboxes_without_project_are_not_shared(fake_daytona):
+    """Tests that callers without a project id each get their own sandbox."""
+    registry = SandboxRegistry()
+
+    first, second = await asyncio.gather(registry.acquire(), registry.acquire())
+
+    assert first is not second
+    assert len(fake_daytona.created) == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_restarts_stopped_sandbox(fake_daytona):
+    """Tests that a stopped sandbox is restarted instead of recreated."""
+    registry = SandboxRegistry()
+    sandbox = await registry.acquire("proj")
+    sandbox.state = SandboxState.STOPPED
+
+    assert (await registry.acquire("proj")) is sandbox
+    assert fake_daytona.started == [sandbox]
+    assert sandbox.process.sessions == ["supervisord-session"] * 2
+
+
+@pytest.mark.asyncio
+async def test_wait_for_services_retries_until_ready():
+    """Tests that readiness is polled with backoff instead of a fixed sleep."""
+    sandbox = FakeSandbox("sb", failures=2)
+
+    ready = await wait_for_services(
+        sandbox, ports=[8000], timeout=1, initial_delay=0.01
+    )
+
+    assert ready
+    assert sandbox.process.probes == 3
+
+
+@pytest.mark.asyncio
+async def test_wait_for_services_times_out():
+    """Tests that the probe gives up once the timeout expires."""
+    sandbox = FakeSandbox("sb", failures=1000)
+
+    ready = await wait_for_services(
+        sandbox, ports=[8000], timeout=0.05, initial_delay=0.01
+    )
+
+    assert not ready
+    assert sandbox.process.probes > 1
+
+
+@pytest.mark.asyncio
+async def test_delete_sandbox_forgets_registry_entry(fake_daytona, monkeypatch):
+    """Tests that a deleted sandbox is recreated on the next acquire."""
+    registry = SandboxRegistry()
+    monkeypatch.setattr(sandbox_module, "SANDBOX_REGISTRY", registry)
+    sandbox = await registry.acquire("proj")
+
+    await sandbox_module.delete_sandbox(sandbox.id)
+
+    assert (await registry.acquire("proj")) is not sandbox
@@ -0,0 +1,116 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from app.agent.toolcall import ToolCallAgent
+from app.flow.flow_factory import FlowFactory, FlowType
+from app.sandbox.client import LeasedSandboxClient
+from app.sandbox.core import manager as manager_module
+from app.sandbox.core.manager import SandboxManager
+
+
+class FakeDockerSandbox:
+    """Stands in for DockerSandbox so leases can be tested without Docker."""
+
+    created = 0
+
+    def __init__(self, config=None, volume_bindings=None):
+        self.alive = False
+
+    async def create(self) -> "FakeDockerSandbox":
+        FakeDockerSandbox.created += 1
+        self.alive = True
+        return self
+
+    async def run_command(self, command: str, timeout=None) -> str:
+        return command
+
+    async def cleanup(self) -> None:
+        self.alive = False
+
+
+class FakeDockerClient:
+    class images:
+        @staticmethod
+        def get(image: str) -> None:
+            return None
+
+
+@pytest_asyncio.fixture
+async def manager(monkeypatch) -> AsyncGenerator[SandboxManager, None]:
+    """Creates a manager whose sandboxes are fakes."""
+    monkeypatch.setattr(manager_module.docker, "from_env", FakeDockerClient)
+    monkeypatch.setattr(manager_module, "DockerSandbox", FakeDockerSandbox)
+    FakeDockerSandbox.created = 0
+    manager = SandboxManager(max_sandboxes=4, idle_timeout=60, cleanup_interval=30)
+    try:
+        yield manager
+    finally:
+        await manager.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_session_reuses_sandbox_across_runs(manager):
+    """Tests that a released sandbox is reused by the next run of its session."""
+    client = LeasedSandboxClient("session-a", manager)
+
+    await client.create()
+    first = client.sandbox
+    assert await client.run_command("ls") == "ls"
+    await client.cleanup()
+    assert client.sandbox is None and first.alive
+
+    await client.create()
+    assert client.sandbox is first
+    assert FakeDockerSandbox.created == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_are_isolated(manager):
+    """Tests that concurrent sessions never share a sandbox."""
+    clients = [LeasedSandboxClient(f"session-{i}", manager) for i in range(3)]
+    await asyncio.gather(*(client.create() for client in clients))
+
+    assert len({id(client.sandbox) for client in clients}) == 3
+    assert manager.get_stats()["leased_sandboxes"] == 3
+
+
+@pytest.mark.asyncio
+async def test_idle_cleanup_skips_leased_sandboxes(manager):
+    """Tests that only released sandboxes past the idle TTL are destroyed."""
+    leased = LeasedSandboxClient("leased", manager)
+    released = LeasedSandboxClient("released", manager)
+    await leased.create()
+    await released.create()
+    released_sandbox = released.sandbox
+    await released.cleanup()
+
+    manager.idle_timeout = 0
+    await asyncio.sleep(0.01)
+    await manager._cleanup_idle_sandboxes()
+
+    assert leased.sandbox.alive
+    assert not released_sandbox.alive
+
+    # The session gets a fresh sandbox once its old one was reclaimed
+    await released.create()
+    assert released.sandbox is not released_sandbox
+
+
+def test_flow_agents_share_one_lease():
+    """Tests that the agents of a flow share a sandbox session, unlike two flows."""
+    flows = [
+        FlowFactory.create_flow(
+            FlowType.PLANNING, agents={"a": ToolCallAgent(), "b": ToolCallAgent()}
+        )
+        for _ in range(2)
+    ]
+
+    sessions = [
+        {agent.sandbox_client.session_id for agent in flow.agents.values()}
+        for flow in flows
+    ]
+    assert [len(session) for session in sessions] == [1, 1]
+    assert sessions[0] != sessions[1]
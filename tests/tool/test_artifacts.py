@@ -0,0 +1,117 @@
+from typing import List
+
+import pytest
+from pydantic import Field
+
+from app.agent.toolcall import ToolCallAgent
+from app.exceptions import ToolError
+from app.schema import Function, Message, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.artifacts import (
+    CURRENT_ARTIFACT_STORE,
+    ArtifactStore,
+    ReadArtifact,
+    preview,
+)
+from app.tool.base import BaseTool, ToolResult
+
+
+class LongOutput(BaseTool):
+    """Prints many numbered lines."""
+
+    name: str = "long_output"
+    description: str = "long output"
+
+    async def execute(self) -> ToolResult:
+        return ToolResult(output="\n".join(f"row {i}" for i in range(5000)))
+
+
+class LongOutputAgent(ToolCallAgent):
+    """Calls long_output once, then terminates, without an LLM."""
+
+    name: str = "long_output_agent"
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(LongOutput(), Terminate())
+    )
+    seen: List[str] = Field(default_factory=list)
+
+    async def think(self) -> bool:
+        self.seen.extend(m.content for m in self.memory.messages if m.role == "tool")
+        name = "terminate" if self.seen else "long_output"
+        args = '{"status": "success"}' if self.seen else "{}"
+        self.tool_calls = [
+            ToolCall(id="1", function=Function(name=name, arguments=args))
+        ]
+        return True
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_previewed_and_readable():
+    """The model sees a preview, and read_artifact pages and greps the rest."""
+    agent = ToolCallAgent(available_tools=ToolCollection(LongOutput(), Terminate()))
+    agent.tool_calls = [
+        ToolCall(id="1", function=Function(name="long_output", arguments="{}"))
+    ]
+    token = CURRENT_ARTIFACT_STORE.set(agent.artifacts)
+    try:
+        await agent.act()
+        shown = agent.memory.messages[-1].content
+        assert len(shown) < agent.artifact_threshold
+        assert "artifact a1" in shown and "row 4999" in shown
+        assert "row 2500" not in shown
+        offered = [p["function"]["name"] for p in agent._offered_tools()]
+        assert offered[-1] == "read_artifact"
+        assert "read_artifact" not in agent.available_tools.tool_map
+
+        read = ToolCall(
+            id="2",
+            function=Function(
+                name="read_artifact",
+                arguments='{"artifact_id": "a1", "command": "read", '
+                '"start_line": 2502, "max_lines": 2}',
+            ),
+        )
+        page = await agent.execute_tool(read)
+        assert page.splitlines()[2:] == ["  2502\trow 2500", "  2503\trow 2501"]
+
+        tool = ReadArtifact()
+        found = await tool.execute(artifact_id="a1", command="grep", pattern="row 42$")
+        assert found.output.splitlines()[1:] == ["    44\trow 42"]
+    finally:
+        CURRENT_ARTIFACT_STORE.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_store_spills_to_disk_and_evicts_oldest():
+    """Older artifacts move to disk, the oldest on disk are dropped."""
+    store = ArtifactStore(max_memory_chars=150, max_disk_chars=250)
+    first = await store.put("a" * 100)
+    assert await store.put("a" * 100) is first
+    second = await store.put("b" * 100)
+    third = await store.put("c" * 100)
+    await store.put("d" * 100)
+
+    assert second.path.exists() and await store.get(second.id) == "b" * 100
+    assert await store.get(third.id) == "c" * 100
+    with pytest.raises(ToolError):
+        await store.get(first.id)
+
+    directory = second.path.parent
+    store.clear()
+    assert not directory.exists() and len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_previews_expire_with_their_run():
+    """Previews left from an earlier run or checkpoint stop offering their id."""
+    agent = LongOutputAgent()
+    await agent.run("go")
+    stored = next(m.content for m in agent.memory.messages if m.role == "tool")
+    assert "artifact a1 expired" in stored and "read_artifact" not in stored
+
+    text = "\n".join(f"row {i}" for i in range(5000))
+    restored = preview(text, await ArtifactStore().put(text))
+    agent = LongOutputAgent()
+    agent.memory.add_message(Message.tool_message(restored, "long_output", "0"))
+    await agent.run("go on")
+    assert "read_artifact" not in agent.seen[0]
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.tool.chart_visualization.data_reduction import (
+    OTHER_CATEGORY,
+    lttb_indices,
+    reduce_csv,
+)
+
+
+@pytest.fixture
+def series_csv(tmp_path):
+    """Writes a 50k-row time series with a single spike."""
+    n = 50_000
+    values = np.sin(np.arange(n) / 500)
+    values[31_337] = 10
+    frame = pd.DataFrame(
+        {
+            "time": pd.date_range("2024-01-01", periods=n, freq="min").astype(str),
+            "value": values,
+        }
+    )
+    path = tmp_path / "series.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_lttb_keeps_endpoints_and_budget():
+    """Tests that LTTB returns sorted indices within the budget."""
+    x = np.arange(1000)
+    indices = lttb_indices(x, np.cos(x / 50), 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_small_csv_is_passed_through(tmp_path):
+    """Tests that files within the budget are sent unchanged, column by column."""
+    path = tmp_path / "small.csv"
+    pd.DataFrame({"name": ["a", "b"], "score": [1.5, None]}).to_csv(path, index=False)
+
+    reduced = reduce_csv(str(path))
+
+    assert reduced.method == "none"
+    assert reduced.to_payload() == {
+        "columns": ["name", "score"],
+        "values": [["a", "b"], [1.5, None]],
+    }
+
+
+def test_series_is_downsampled_in_chunks(series_csv):
+    """Tests that a long series fits the budget and keeps its extremes."""
+    reduced = reduce_csv(str(series_csv), max_points=500, chunksize=7_000)
+
+    assert reduced.method == "lttb"
+    assert reduced.total_rows == 50_000
+    assert reduced.rows <= 500
+    times, values = reduced.values
+    assert times == sorted(times)
+    assert max(values) == 10
+
+
+def test_categories_keep_top_k(tmp_path):
+    """Tests that categories are summed and the tail is folded into Other."""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(
+        {
+            "city": rng.choice([f"c{i}" for i in range(50)], 10_000),
+            "sales": rng.random(10_000),
+        }
+    )
+    path = tmp_path / "cities.csv"
+    frame.to_csv(path, index=False)
+
+    reduced = reduce_csv(str(path), max_points=100, top_k=5, chunksize=3_000)
+
+    cities, sales = reduced.values
+    assert reduced.method == "top_k"
+    assert len(cities) == 6 and cities[-1] == OTHER_CATEGORY
+    assert sum(sales) == pytest.approx(frame["sales"].sum())
+    expected_top = frame.groupby("city")["sales"].sum().nlargest(5)
+    assert set(cities[:-1]) == set(expected_top.index)
+
+
+def test_high_cardinality_text_columns_are_not_grouped(tmp_path):
+    """Tests that id-like columns do not split the data into one group per row."""
+    n = 20_000
+    rng = np.random.default_rng(0)
+    series = pd.DataFrame(
+        {
+            "step": np.arange(n),
+            "id": [f"row-{i}" for i in range(n)],
+            "region": rng.choice(["north", "south"], n),
+            "value": rng.random(n),
+        }
+    )
+    series_path = tmp_path / "series.csv"
+    series.to_csv(series_path, index=False)
+
+    reduced = reduce_csv(str(series_path), max_points=300, chunksize=5_000)
+
+    assert reduced.method == "lttb" and reduced.rows <= 300
+    assert reduced.columns == ["step", "region", "value"]
+    assert set(reduced.values[1]) == {"north", "south"}
+
+    categories = series.assign(
+        step=rng.choice([f"c{i}" for i in range(500)], n)
+    ).rename(columns={"step": "city"})
+    categories_path = tmp_path / "categories.csv"
+    categories.to_csv(categories_path, index=False)
+
+    reduced = reduce_csv(str(categories_path), max_points=100, top_k=5)
+
+    assert reduced.method == "top_k" and reduced.rows <= 100
+    assert reduced.columns == ["city", "region", "value"]
+    assert sum(reduced.values[2]) == pytest.approx(categories["value"].sum())
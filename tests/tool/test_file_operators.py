@@ -0,0 +1,117 @@
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app.tool.file_operators import (
+    ENCODING_SAMPLE_SIZE,
+    FileStat,
+    LineIndex,
+    LocalFileOperator,
+    SandboxFileOperator,
+)
+
+
+@pytest.fixture
+def operator() -> LocalFileOperator:
+    """Creates a local file operator with an empty line-index cache."""
+    return LocalFileOperator()
+
+
+@pytest.mark.parametrize("text", ["", "one", "one\n", "a\nb\nc", "a\n\nb\n\n"])
+def test_line_ranges_match_split(operator: LocalFileOperator, tmp_path: Path, text):
+    """Tests that ranged reads agree with slicing `split("\\n")`."""
+    path = tmp_path / "lines.txt"
+    path.write_bytes(text.encode())
+    lines = text.split("\n")
+    operator._line_indexes[str(path)] = LineIndex.build(path, chunk_size=2)
+
+    for start in range(1, len(lines) + 1):
+        for end in [*range(start, len(lines) + 1), -1]:
+            expected = lines[start - 1 :] if end == -1 else lines[start - 1 : end]
+            assert operator._read_line_range(path, start, end) == (
+                "\n".join(expected),
+                len(lines),
+            )
+
+
+@pytest.mark.asyncio
+async def test_line_index_is_rebuilt_on_change(operator, tmp_path: Path):
+    """Tests that a modified file is re-indexed."""
+    path = tmp_path / "log.txt"
+    path.write_text("first\nsecond\n")
+    assert await operator.read_line_range(path, 2, 2) == ("second", 3)
+
+    path.write_text("first\nsecond\nthird\nfourth\n")
+    os.utime(path, ns=(0, 0))
+
+    assert await operator.read_line_range(path, 3, -1) == ("third\nfourth\n", 5)
+
+
+@pytest.mark.asyncio
+async def test_encoding_is_detected_once_and_kept_on_write(operator, tmp_path: Path):
+    """Tests that a GBK file is decoded, cached and written back as GBK."""
+    path = tmp_path / "gbk.txt"
+    path.write_bytes("编码\r\n测试\n".encode("gbk"))
+
+    assert await operator.read_file(path) == "编码\n测试\n"
+    assert operator._encodings[str(path)][2] == "gbk"
+    assert await operator.read_line_range(path, 2, 2) == ("测试", 3)
+
+    await operator.write_file(path, "编码\n已修改\n")
+    assert path.read_bytes() == "编码\n已修改\n".encode("gbk")
+
+    await operator.write_file(path, "emoji 🙂\n")
+    assert path.read_text(encoding="utf-8") == "emoji 🙂\n"
+
+
+@pytest.mark.asyncio
+async def test_misleading_sample_falls_back_to_whole_file(operator, tmp_path: Path):
+    """Tests that bytes past the sample that break its encoding are handled."""
+    path = tmp_path / "mixed.txt"
+    head = b"a" * (ENCODING_SAMPLE_SIZE + 10)
+    path.write_bytes(head + "编码".encode("gbk"))
+
+    assert await operator.read_file(path) == head.decode() + "编码"
+    assert operator._encodings[str(path)][2] == "gbk"
+
+
+class ShellSandboxClient:
+    """Runs sandbox commands in a local shell and counts them."""
+
+    sandbox = True
+
+    def __init__(self):
+        self.commands = []
+
+    async def run_command(self, command: str, timeout=None) -> str:
+        self.commands.append(command)
+        result = subprocess.run(
+            ["bash", "-c", command], capture_output=True, text=True, check=False
+        )
+        return result.stdout
+
+    async def write_file(self, path: str, content: str) -> None:
+        Path(path).write_text(content)
+
+
+@pytest.mark.asyncio
+async def test_sandbox_stats_are_batched_and_cached(tmp_path: Path):
+    """Tests that one exec stats many paths and writes refresh the cache."""
+    client = ShellSandboxClient()
+    operator = SandboxFileOperator(client)
+    file = tmp_path / "it's a file.txt"
+    file.write_text("hello")
+    new = tmp_path / "new.txt"
+
+    stats = await operator.stat_many([file, tmp_path, new])
+    assert stats[str(file)] == FileStat(True, False, 5, stats[str(file)].mtime)
+    assert stats[str(tmp_path)].is_dir
+    assert not stats[str(new)].exists
+    assert await operator.exists(file) and await operator.is_directory(tmp_path)
+    assert len(client.commands) == 1
+
+    await operator.write_file(new, "created")
+    assert await operator.exists(new)
+    assert len(client.commands) == 2
@@ -0,0 +1,60 @@
+import pytest
+
+from app.tool.search.bing_search import BingSearchEngine
+from app.utils.html_extract import BACKENDS, HtmlParserPool, extract_main_text
+
+
+PAGE = b"""<html><head><meta charset="gbk"><title>T</title>
+<style>.a{}</style><script>var x = 1;</script></head>
+<body><nav>menu</nav><header>top</header>
+<p>first <b>bold</b> word</p><p>second</p>
+<footer>bottom</footer></body></html>"""
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_backends_extract_visible_text(backend):
+    """Tests that every backend drops scripts, styles and page chrome."""
+    text = extract_main_text(PAGE, backend=backend, encoding="utf-8")
+    assert text == "T first bold word second"
+
+
+def test_lxml_detects_charset_and_stops_early():
+    """Tests charset detection from the page and the character budget."""
+    page = '<meta charset="gbk"><p>中文</p>'.encode("gbk")
+    assert extract_main_text(page, backend="lxml") == "中文"
+
+    huge = b"<p>" + b"word " * 1_000_000 + b"</p>"
+    text = extract_main_text(huge, max_chars=100, backend="lxml")
+    assert len(text) == 100 and text.startswith("word word")
+
+
+@pytest.mark.asyncio
+async def test_parser_pool():
+    """Tests extraction in worker processes."""
+    pool = HtmlParserPool(workers=1, max_queued=2)
+    try:
+        assert await pool.extract(PAGE, encoding="utf-8") == "T first bold word second"
+    finally:
+        pool.shutdown()
+
+
+def test_bing_results_are_parsed(monkeypatch):
+    """Tests result and next page extraction from a Bing results page."""
+    html = """<html><body><ol id="b_results">
+    <li class="b_algo"><h2><a href="https://a.example/">Alpha</a></h2><p>About a</p></li>
+    <li class="b_ad">ad</li>
+    <li class="b_algo x"><div><h2><a href="https://b.example/">Beta</a></h2></div></li>
+    </ol><a title="Next page" href="/search?q=x&amp;first=11">next</a></body></html>"""
+
+    class Response:
+        content = html.encode()
+
+    engine = BingSearchEngine()
+    monkeypatch.setattr(engine.session, "get", lambda url: Response())
+    items, next_url = engine._parse_html("https://www.bing.com/search?q=x")
+
+    assert [(i.title, i.url, i.description) for i in items] == [
+        ("Alpha", "https://a.example/", "About a"),
+        ("Beta", "https://b.example/", ""),
+    ]
+    assert next_url == "https://www.bing.com/search?q=x&first=11"
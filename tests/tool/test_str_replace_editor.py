@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pytest
+
+from app.config import config
+from app.exceptions import ToolError
+from app.tool.edit_history import EditHistory, make_reverse_diff
+from app.tool.str_replace_editor import StrReplaceEditor
+
+
+@pytest.fixture
+def editor() -> StrReplaceEditor:
+    """Creates an editor with its own history."""
+    return StrReplaceEditor()
+
+
+@pytest.fixture
+def sample_file(tmp_path: Path) -> Path:
+    """Creates a small text file."""
+    path = tmp_path / "sample.txt"
+    path.write_text("alpha\nbeta\ngamma\n")
+    return path
+
+
+def test_reverse_diff_only_keeps_changed_region():
+    """Tests that a reverse diff stores the changed span, not the whole file."""
+    original = "x" * 10000 + "old" + "y" * 10000
+    edited = "x" * 10000 + "new value" + "y" * 10000
+
+    diff = make_reverse_diff(original, edited)
+
+    assert diff.original == "old"
+    assert diff.apply(edited) == original
+
+
+def test_history_evicts_oldest_edits_first():
+    """Tests that the byte budget drops the oldest edits across paths."""
+    history = EditHistory(max_bytes=400)
+    history.record("/a", "a" * 200, "")
+    history.record("/b", "b" * 200, "")
+
+    assert not history.has_history("/a")
+    assert history.undo("/b", "") == "b" * 200
+    assert history.total_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_undo_restores_previous_edits(editor, sample_file):
+    """Tests that consecutive edits are undone in reverse order."""
+    path = str(sample_file)
+    await editor.execute(
+        command="str_replace", path=path, old_str="beta", new_str="BETA"
+    )
+    await editor.execute(command="insert", path=path, insert_line=0, new_str="start")
+
+    await editor.execute(command="undo_edit", path=path)
+    assert sample_file.read_text() == "alpha\nBETA\ngamma\n"
+
+    await editor.execute(command="undo_edit", path=path)
+    assert sample_file.read_text() == "alpha\nbeta\ngamma\n"
+
+    with pytest.raises(ToolError):
+        await editor.execute(command="undo_edit", path=path)
+
+
+@pytest.mark.asyncio
+async def test_view_range_of_crlf_file_matches_full_view(editor, tmp_path: Path):
+    """Tests that ranged views normalize line endings like full views."""
+    path = tmp_path / "windows.txt"
+    path.write_bytes(b"alpha\r\nbeta\r\ngamma\r\n")
+
+    full = await editor.execute(command="view", path=str(path))
+    ranged = await editor.execute(command="view", path=str(path), view_range=[2, 3])
+
+    assert "\r" not in ranged
+    assert ranged.splitlines()[1:] == full.splitlines()[2:4]
+
+
+@pytest.mark.asyncio
+async def test_history_is_per_instance(editor, sample_file):
+    """Tests that editors do not share undo history."""
+    path = str(sample_file)
+    await editor.execute(command="str_replace", path=path, old_str="beta", new_str="B")
+
+    with pytest.raises(ToolError):
+        await StrReplaceEditor().execute(command="undo_edit", path=path)
+
+
+@pytest.mark.asyncio
+async def test_undo_refuses_externally_modified_file(editor, sample_file):
+    """Tests that undo does not clobber changes made outside the editor."""
+    path = str(sample_file)
+    await editor.execute(command="str_replace", path=path, old_str="beta", new_str="B")
+    sample_file.write_text("rewritten\n")
+
+    with pytest.raises(ToolError):
+        await editor.execute(command="undo_edit", path=path)
+    assert sample_file.read_text() == "rewritten\n"
+
+
+def test_sandbox_scopes_are_not_resolved_on_the_host(monkeypatch, tmp_path: Path):
+    """In sandbox mode paths are normalized as given; host symlinks do not apply."""
+    (tmp_path / "link").symlink_to(tmp_path / "target", target_is_directory=True)
+    editor = StrReplaceEditor()
+    monkeypatch.setattr(config.sandbox, "use_sandbox", True)
+
+    scope = editor.memo_scope(command="view", path=f"{tmp_path}/link/x/../a.txt")
+    assert scope == f"file:{tmp_path}/link/a.txt"
+    scopes = editor.invalidated_scopes(path=f"{tmp_path}/link/a.txt")
+    assert scope in scopes and f"file:{tmp_path}/link" in scopes
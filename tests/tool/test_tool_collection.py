@@ -0,0 +1,126 @@
+from typing import Optional
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.tool import Bash, StrReplaceEditor, Terminate, ToolCollection
+from app.tool.base import BaseTool, ToolResult
+from app.tool.tool_collection import ToolResultCache
+
+
+def count_chars(text: str) -> int:
+    """Cheap stand-in for a tokenizer."""
+    return len(text)
+
+
+class CountingSearch(BaseTool):
+    """Read-only web tool that counts its executions."""
+
+    name: str = "search"
+    description: str = "search"
+    calls: int = 0
+
+    def memo_scope(self, **kwargs) -> Optional[str]:
+        return "web:search"
+
+    async def execute(self, query: str) -> ToolResult:
+        self.calls += 1
+        return ToolResult(output=f"{query} #{self.calls}")
+
+
+@pytest.fixture
+def collection() -> ToolCollection:
+    """Creates a collection with a single tool."""
+    return ToolCollection(Terminate())
+
+
+def test_to_params_is_cached(collection: ToolCollection):
+    """Tests that schemas are built once while the tool set is unchanged."""
+    params = collection.to_params()
+    assert params is collection.to_params()
+    assert [p["function"]["name"] for p in params] == ["terminate"]
+
+
+def test_add_tool_invalidates_params(collection: ToolCollection):
+    """Tests that adding a tool rebuilds schemas and their token cost."""
+    tokens = collection.count_params_tokens(count_chars)
+    params = collection.to_params()
+
+    collection.add_tool(Bash())
+
+    assert collection.to_params() is not params
+    assert len(collection.to_params()) == 2
+    assert collection.count_params_tokens(count_chars) > tokens
+
+
+def test_count_params_tokens_matches_per_tool_count(collection: ToolCollection):
+    """Tests that the cached token cost matches counting each schema."""
+    collection.add_tools(Bash())
+    expected = sum(count_chars(str(p)) for p in collection.to_params())
+    assert collection.count_params_tokens(count_chars) == expected
+
+
+@pytest.mark.asyncio
+async def test_identical_read_only_calls_are_memoized(tmp_path):
+    """Tests that views are reused until the file is edited."""
+    path = tmp_path / "notes.txt"
+    path.write_text("one\n")
+    (tmp_path / "sub").mkdir()
+    collection = ToolCollection(StrReplaceEditor())
+    cache = ToolResultCache()
+    view = {"command": "view", "path": str(path)}
+
+    first = await collection.execute(
+        name="str_replace_editor", tool_input=view, cache=cache
+    )
+    path.write_text("changed behind the editor's back\n")
+    again = await collection.execute(
+        name="str_replace_editor", tool_input=view, cache=cache
+    )
+    assert again == first
+
+    await collection.execute(
+        name="str_replace_editor",
+        tool_input={
+            "command": "str_replace",
+            "path": str(tmp_path / "sub" / ".." / "notes.txt"),
+            "old_str": "changed",
+            "new_str": "two",
+        },
+        cache=cache,
+    )
+    assert "two" in await collection.execute(
+        name="str_replace_editor", tool_input=view, cache=cache
+    )
+    assert (cache.hits, cache.misses) == (1, 2)
+    # Without a cache every call runs
+    assert "two" in await collection.execute(name="str_replace_editor", tool_input=view)
+
+
+@pytest.mark.asyncio
+async def test_unknown_side_effects_keep_only_web_results(tmp_path):
+    """Tests that a call with unknown effects drops local results only."""
+    search = CountingSearch()
+    collection = ToolCollection(search, StrReplaceEditor(), Bash())
+    path = tmp_path / "notes.txt"
+    path.write_text("one\n")
+    view = {"command": "view", "path": str(path)}
+    cache = ToolResultCache()
+    await collection.execute(name="search", tool_input={"query": "q"}, cache=cache)
+    await collection.execute(name="str_replace_editor", tool_input=view, cache=cache)
+
+    cache.invalidate(Bash().invalidated_scopes(command="ls"))
+
+    result = await collection.execute(
+        name="search", tool_input={"query": "q"}, cache=cache
+    )
+    assert result.output == "q #1"
+    await collection.execute(name="str_replace_editor", tool_input=view, cache=cache)
+    assert cache.hits == 1
+
+
+def test_agents_sharing_tools_keep_their_own_results():
+    """Tests that agents using the default tool collection do not share a cache."""
+    first, second = ToolCallAgent(), ToolCallAgent()
+    assert first.available_tools is second.available_tools
+    assert first.tool_cache is not second.tool_cache
@@ -0,0 +1,66 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.image_cache import (
+    ImageCache,
+    compress_image_cached,
+    validate_base64_image,
+    validate_base64_image_cached,
+)
+
+
+def png_bytes(size=(64, 32), mode="RGBA") -> bytes:
+    """Encodes a blank image as PNG."""
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    """Tests that the cache stays within its byte budget in LRU order."""
+    cache = ImageCache(max_bytes=10)
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.size == 8
+    cache.put("huge", 4, 11)
+    assert cache.get("huge") is None
+
+
+@pytest.mark.asyncio
+async def test_compressed_image_is_cached_with_base64():
+    """Tests that compression resizes once and later views hit the cache."""
+    cache = ImageCache()
+    data = png_bytes(size=(4000, 2000))
+
+    first = await compress_image_cached(data, "image/png", cache=cache)
+    second = await compress_image_cached(data, "image/png", cache=cache)
+
+    assert second is first
+    assert cache.hits == 1
+    with Image.open(io.BytesIO(base64.b64decode(first.base64))) as img:
+        assert img.size == (1920, 960) and img.mode == "RGB"
+    assert first.size == len(base64.b64decode(first.base64))
+
+
+@pytest.mark.asyncio
+async def test_validate_base64_image():
+    """Tests validation of good, corrupt and oversized images."""
+    good = base64.b64encode(png_bytes()).decode()
+    assert await validate_base64_image_cached(good) == (True, "Valid image")
+    assert validate_base64_image(f"data:image/png;base64,{good}")[0]
+
+    corrupt = base64.b64encode(png_bytes()[:40]).decode()
+    assert not validate_base64_image(corrupt)[0]
+    assert not validate_base64_image("not base64 at all!")[0]
+
+    huge = base64.b64encode(png_bytes(size=(9000, 10), mode="L")).decode()
+    is_valid, message = validate_base64_image(huge)
+    assert not is_valid and "dimensions" in message
@@ -0,0 +1,32 @@
+from app.config import LoggingSettings
+from app.logger import BackgroundSink, _keep, _record_patcher, clip
+
+
+def test_background_sink_writes_queued_records_in_order_on_stop():
+    """Records are written by the writer thread; stopping drains the queue."""
+    written = []
+    sink = BackgroundSink(written.append)
+    for i in range(100):
+        sink.write(f"{i}\n")
+    sink.stop()
+
+    assert "".join(written) == "".join(f"{i}\n" for i in range(100))
+    assert not sink._thread.is_alive()
+
+
+def test_patcher_caps_messages_and_samples_by_kind():
+    """Long messages are clipped; one in N records of a sampled kind is kept."""
+    patch = _record_patcher(LoggingSettings(max_record_chars=10, sample_every=3))
+
+    record = {"message": "x" * 25, "extra": {}}
+    patch(record)
+    assert record["message"] == "x" * 10 + "… [15 more chars]"
+    assert _keep(record)
+
+    kept = []
+    for kind in ["a", "a", "b", "a", "a", "b"]:
+        record = {"message": kind, "extra": {"sample": kind}}
+        patch(record)
+        kept.append(_keep(record))
+    assert kept == [True, False, True, False, True, False]
+    assert clip({"k": "v"}, 100) == "{'k': 'v'}"
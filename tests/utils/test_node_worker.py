@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+import pytest_asyncio
+
+from app.utils.node_worker import NodeWorkerError, NodeWorkerPool
+
+
+# Speaks the worker protocol: answers after `delay` seconds, out of order,
+# reports `fail` params as errors and exits on `crash`.
+FAKE_WORKER = textwrap.dedent(
+    """
+    import asyncio, json, os, sys
+
+    async def handle(request, lock):
+        params = request["params"]
+        if params.get("crash"):
+            os._exit(3)
+        await asyncio.sleep(params.get("delay", 0))
+        if params.get("fail"):
+            message = {"id": request["id"], "error": "bad chart"}
+        else:
+            message = {"id": request["id"], "result": {"echo": params, "pid": os.getpid()}}
+        async with lock:
+            sys.stdout.write(json.dumps(message) + "\\n")
+            sys.stdout.flush()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        lock, tasks = asyncio.Lock(), set()
+        print("not json, ignored", flush=True)
+        while line := await reader.readline():
+            task = asyncio.create_task(handle(json.loads(line), lock))
+            tasks.add(task)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    """
+)
+
+
+@pytest_asyncio.fixture
+async def pool(tmp_path):
+    """Creates a pool of fake workers."""
+    script = tmp_path / "worker.py"
+    script.write_text(FAKE_WORKER)
+    pool = NodeWorkerPool([sys.executable, str(script)], size=2, max_concurrency=3)
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_are_multiplexed(pool):
+    """Tests that responses arriving out of order reach the right caller."""
+    delays = [0.3, 0.1, 0.2, 0.0, 0.15]
+    results = await asyncio.gather(
+        *(pool.request({"n": n, "delay": d}) for n, d in enumerate(delays))
+    )
+
+    assert [r["echo"]["n"] for r in results] == list(range(len(delays)))
+    assert len(pool.workers) == 2
+    assert len({r["pid"] for r in results}) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(pool):
+    """Tests that no more than max_concurrency requests are in flight."""
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, sum(w.load for w in pool.workers))
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.gather(*(pool.request({"delay": 0.05}) for _ in range(10)))
+    watcher.cancel()
+
+    assert 0 < peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_worker_error_is_raised(pool):
+    """Tests that a request-level error does not affect the worker."""
+    with pytest.raises(NodeWorkerError, match="bad chart"):
+        await pool.request({"fail": True})
+    assert (await pool.request({"n": 1}))["echo"]["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_crashed_worker_is_replaced(pool):
+    """Tests that a crash fails the request and a new worker takes over."""
+    with pytest.raises(NodeWorkerError, match="exited with code 3"):
+        await pool.request({"crash": True})
+
+    result = await pool.request({"n": 2})
+    assert result["echo"]["n"] == 2
+    assert len(pool.workers) == 1 and pool.workers[0].alive